@@ -0,0 +1,70 @@
+"""
+Benchmark of the nearest-point engines of cachai.utilities.map_from_curve, used to compute the
+color blend of every chord, and of the drawing of whole diagrams with every blend mode.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_blend
+"""
+import io
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import cachai.utilities as chu
+from   cachai.chplot import chord
+
+def chord_curve(n):
+    """Equidistant quadratic Bézier similar to the mid curve of a chord."""
+    return chu.equidistant(chu.get_bezier_curve([(0.9,0.4),(0.1,0.1),(-0.5,0.8)],n=n))
+
+def block_corr(size,seed=1):
+    """Correlation matrix of ``size`` variables in correlated pairs."""
+    rng  = np.random.default_rng(seed)
+    data = rng.normal(size=(400,size))
+    data[:,1::2] += data[:,::2]
+    return np.corrcoef(data.T)
+
+def save_diagram(corr,blend,dpi=200):
+    """Seconds to draw and save a diagram (collections, no blend cache) as a PNG."""
+    fig, ax = plt.subplots(figsize=(8,8))
+    diagram = chord(corr,ax=ax,threshold=0.05,blend=blend,collection=True,blend_cache=False)
+    start   = time.perf_counter()
+    fig.savefig(io.BytesIO(),format='png',dpi=dpi)
+    elapsed = time.perf_counter() - start
+    plt.close(fig)
+    return len(diagram.chord_source), elapsed
+
+def timeit(func,repeat=5):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best  = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == '__main__':
+    methods = ['cdist','grid','kdtree']
+    print(f'{"bezier_n":>9} {"resolution":>11}' + ''.join(f'{m+" [ms]":>14}' for m in methods)
+          + f'{"mismatch":>10}')
+    for n in [30,100,300]:
+        curve = chord_curve(n)
+        xlim  = (curve[:,0].min(), curve[:,0].max())
+        ylim  = (curve[:,1].min(), curve[:,1].max())
+        for resolution in [100,200,400]:
+            maps, times = {}, {}
+            for method in methods:
+                run = lambda: chu.map_from_curve(curve,xlim,ylim,resolution,method=method)
+                times[method] = timeit(run)*1e3
+                maps[method]  = run()
+            mismatch = max(np.mean(maps[m] != maps['cdist']) for m in methods)
+            print(f'{n:>9} {resolution:>11}' + ''.join(f'{times[m]:>14.2f}' for m in methods)
+                  + f'{mismatch:>10.2%}')
+
+    blends = [False,'mesh','texture',True]
+    print(f'\n{"nodes":>6} {"chords":>7}' + ''.join(f'{str(b)+" [s]":>14}' for b in blends))
+    for size in [20,50,80,110]:
+        corr  = block_corr(size)
+        times = [save_diagram(corr,blend) for blend in blends]
+        print(f'{size:>6} {times[0][0]:>7}' + ''.join(f'{t:>14.2f}' for _,t in times))
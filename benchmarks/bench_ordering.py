@@ -0,0 +1,77 @@
+"""
+Scaling benchmark for the node ordering of cachai's Chord Diagrams.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ordering
+"""
+import time
+import numpy as np
+from   cachai._core.ordering import distance_matrix, prim_order, order_nodes, STRATEGIES
+
+def legacy_prim_order(corr_matrix):
+    """Nested-loop Prim's algorithm used before the vectorized engine (O(n³))."""
+    n_nodes   = corr_matrix.shape[0]
+    distances = distance_matrix(corr_matrix)
+    visited   = set()
+    order     = []
+    start_node = np.argmin(np.sum(distances, axis=0))
+    visited.add(start_node)
+    order.append(int(start_node))
+    while len(visited) < n_nodes:
+        min_dist  = np.inf
+        next_node = -1
+        for node in visited:
+            for neighbor in range(n_nodes):
+                if (neighbor not in visited) and (distances[node,neighbor] < min_dist):
+                    min_dist  = distances[node,neighbor]
+                    next_node = neighbor
+        if next_node == -1: break
+        visited.add(next_node)
+        order.append(next_node)
+    return order
+
+def random_corr(size,seed=42):
+    rng  = np.random.default_rng(seed)
+    base = rng.random((size,size))*2 - 1
+    corr = (base + base.T)/2
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+def block_corr(size,blocks=8,seed=42):
+    """Block-structured correlation matrix with shuffled variables."""
+    rng    = np.random.default_rng(seed)
+    labels = rng.integers(0, blocks, size)
+    corr   = np.where(labels[:,None] == labels[None,:], 0.7, 0.05)
+    corr   = corr + rng.normal(0, 0.05, (size,size))
+    corr   = (corr + corr.T)/2
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+def timeit(func,*args,repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best  = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == '__main__':
+    legacy_limit = 200
+    print(f'{"n":>6} {"legacy [s]":>12} {"vectorized [s]":>16}')
+    for size in [50,100,200,500,1000,2000]:
+        corr = random_corr(size)
+        new  = timeit(lambda c: prim_order(distance_matrix(c)), corr)
+        if size <= legacy_limit:
+            old = timeit(legacy_prim_order, corr, repeat=1)
+            assert legacy_prim_order(corr) == prim_order(distance_matrix(corr))
+            print(f'{size:>6} {old:>12.4f} {new:>16.4f}')
+        else:
+            print(f'{size:>6} {"-":>12} {new:>16.4f}')
+
+    print(f'\n{"n":>6} {"strategy":>12} {"time [s]":>10} {"score":>8}')
+    for size in [100,500,1000]:
+        corr = block_corr(size)
+        for strategy in STRATEGIES:
+            _, stats = order_nodes(corr, strategy)
+            print(f'{size:>6} {strategy:>12} {stats["time"]:>10.4f} {stats["score"]:>8.3f}')
@@ -0,0 +1,33 @@
+"""
+Import time of cachai's modules, each one timed in a fresh interpreter.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup
+"""
+import sys
+import subprocess
+import numpy as np
+
+MODULES = ['cachai','cachai.layout','cachai.utilities','cachai.chplot','cachai.gadgets']
+HEAVY   = ['matplotlib','matplotlib.pyplot','pandas','seaborn','scipy.sparse','scipy.spatial',
+           'scipy.interpolate']
+
+def import_time(module,repeat=5):
+    """Best wall time of ``import module`` after numpy, and the heavy modules it loads."""
+    code = ('import sys, time, numpy; start = time.perf_counter(); '
+            f'import {module}; print(time.perf_counter() - start); '
+            f'print(",".join(m for m in {HEAVY!r} if m in sys.modules))')
+    best = np.inf
+    for _ in range(repeat):
+        out    = subprocess.run([sys.executable,'-c',code], capture_output=True, text=True,
+                                check=True).stdout.split('\n')
+        best   = min(best, float(out[0]))
+        loaded = out[1]
+    return best, loaded
+
+if __name__ == '__main__':
+    print(f'{"module":>18} {"time [s]":>10}  heavy modules loaded')
+    for module in MODULES:
+        best, loaded = import_time(module)
+        print(f'{module:>18} {best:>10.3f}  {loaded or "-"}')
@@ -1,5 +1,19 @@
-from . import data
-from . import tests
-from cachai.tests._run_test import run_tests, get_available_tests
+import importlib
 
-__all__ = ['run_tests','get_available_tests']
\ No newline at end of file
+__all__ = ['run_tests','get_available_tests']
+
+# Submodules and functions are imported on first use (PEP 562), so ``import cachai`` loads neither
+# matplotlib nor pandas or scipy
+_SUBMODULES = ('chplot','layout','gadgets','utilities','data','tests')
+_FUNCTIONS  = {'run_tests'           : 'cachai.tests._run_test',
+               'get_available_tests' : 'cachai.tests._run_test'}
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    if name in _FUNCTIONS:
+        return getattr(importlib.import_module(_FUNCTIONS[name]), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def __dir__():
+    return sorted(list(globals()) + list(_SUBMODULES) + list(_FUNCTIONS))
@@ -0,0 +1,260 @@
+# Basic imports
+import os
+import hashlib
+import threading
+import zipfile
+import numpy as np
+from   collections import OrderedDict
+from   cachai.data._utils import CACHE_DIR
+
+class BlendCache():
+    """
+    In-memory LRU cache of chord blend maps, keyed on the quantized chord geometry and the blend
+    parameters.
+
+    The least recently used entries are dropped when the cached arrays exceed ``max_bytes``. The same
+    cache can be shared by many diagrams (``chplot.chord(..., blend_cache=cache)``). With a
+    ``directory``, every new entry is also saved there as a ``.npz`` file, and entries missing in
+    memory are looked for on disk, so the cache survives between sessions. When the files exceed
+    ``max_disk_bytes`` the least recently used ones are removed, as in :class:`LayoutCache`.
+
+    Parameters
+        max_bytes : :class:`int`, optional
+            Memory budget of the cached arrays in bytes (default: 64 MiB).
+        directory : :class:`str`, optional
+            Directory to persist the entries (default: None, only in memory).
+        decimals : :class:`int`, optional
+            Decimals kept when quantizing the geometry for the keys (default: 9).
+        max_disk_bytes : :class:`int`, optional
+            Size budget of the files in ``directory`` in bytes (default: 256 MiB).
+
+    Attributes
+        hits / misses : :class:`int`
+            Number of lookups found and not found in the cache (memory or disk).
+    """
+    def __init__(self, max_bytes=64*2**20, directory=None, decimals=9, max_disk_bytes=256*2**20):
+        self.max_bytes      = int(max_bytes)
+        self.max_disk_bytes = int(max_disk_bytes)
+        self.directory      = directory
+        self.decimals       = decimals
+        self.hits      = 0
+        self.misses    = 0
+        self.nbytes    = 0
+        self.__entries = OrderedDict()
+        self.__lock    = threading.RLock() # Diagrams computing blends in threads share the cache
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    def key(self, *parts):
+        """
+        Key of a set of parameters. Arrays (and numbers) are rounded to ``decimals``, so chords
+        with the same geometry up to rounding share their entry.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        for part in parts:
+            if isinstance(part, str):
+                digest.update(b's' + part.encode())
+                continue
+            array = np.round(np.asarray(part, dtype=float), self.decimals) + 0.0 # No negative zeros
+            digest.update(repr(array.shape).encode() + array.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Cached arrays of ``key`` (a tuple), or None"""
+        with self.__lock:
+            value = self.__entries.get(key)
+            if value is not None: self.__entries.move_to_end(key)
+        if value is None and self.directory is not None:
+            value = self.__load(key)
+            if value is not None:
+                with self.__lock: self.__store(key, value)
+        with self.__lock:
+            if value is None: self.misses += 1
+            else: self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Cache a tuple of arrays"""
+        value = tuple(np.asarray(v) for v in value)
+        for v in value: v.flags.writeable = False # Shared between diagrams
+        with self.__lock: self.__store(key, value)
+        if self.directory is not None: self.__save(key, value)
+
+    def fetch(self, key, compute):
+        """Cached arrays of ``key``, computing (and caching) them with ``compute()`` if missing"""
+        value = self.get(key)
+        if value is None:
+            value = tuple(compute())
+            self.put(key, value)
+        return value
+
+    def clear(self, disk=False):
+        """Empty the cache and reset its counters (and remove the persisted entries if ``disk``)"""
+        with self.__lock:
+            self.__entries.clear()
+            self.nbytes = self.hits = self.misses = 0
+        if disk and self.directory is not None:
+            for _, _, path in _cache_files(self.directory):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @property
+    def stats(self):
+        """Dictionary with the hits, misses, entries and memory of the cache"""
+        return {'hits'      : self.hits,
+                'misses'    : self.misses,
+                'entries'   : len(self),
+                'bytes'     : self.nbytes,
+                'max_bytes' : self.max_bytes}
+
+    def __store(self, key, value):
+        if key in self.__entries: self.nbytes -= sum(v.nbytes for v in self.__entries.pop(key))
+        size = sum(v.nbytes for v in value)
+        if size > self.max_bytes: return
+        self.__entries[key] = value
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, oldest = self.__entries.popitem(last=False)
+            self.nbytes -= sum(v.nbytes for v in oldest)
+
+    def __path(self, key):
+        return os.path.join(self.directory, f'{key}.npz')
+
+    def __save(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        # Written aside and then moved, so other processes never read half a file
+        temp = f'{self.__path(key)}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as f: np.savez(f, *value)
+        os.replace(temp, self.__path(key))
+        _evict_files(self.directory, self.max_disk_bytes)
+
+    def __load(self, key):
+        try:
+            with np.load(self.__path(key)) as data:
+                value = tuple(data[f'arr_{i}'] for i in range(len(data.files)))
+            os.utime(self.__path(key)) # Recently used
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return None
+        for v in value: v.flags.writeable = False
+        return value
+
+
+class LayoutCache():
+    """
+    On-disk LRU cache of chord diagram layouts (see :func:`cachai.layout.chord_layout`), keyed on
+    the content of the correlation matrix, the names of the nodes and the layout parameters.
+
+    Every layout is a compressed ``.npz`` file with the order of the nodes, their arcs, the chords
+    and their geometry, so loading it skips the ordering and the geometry (the ports of the nodes
+    are computed again, in linear time). When the files exceed ``max_bytes`` the least recently used
+    ones are removed. The files are shared by every session and process using the same directory.
+
+    Parameters
+        directory : :class:`str`, optional
+            Directory of the cached layouts (default: the ``layouts`` folder in **cachai**'s cache
+            directory, the one of :mod:`cachai.data`).
+        max_bytes : :class:`int`, optional
+            Size budget of the cached files in bytes (default: 256 MiB).
+
+    Attributes
+        hits / misses : :class:`int`
+            Number of lookups found and not found in the cache.
+    """
+    def __init__(self, directory=None, max_bytes=256*2**20):
+        self.directory = os.path.join(CACHE_DIR, 'layouts') if directory is None else directory
+        self.max_bytes = int(max_bytes)
+        self.hits      = 0
+        self.misses    = 0
+
+    def __len__(self):
+        return len(_cache_files(self.directory))
+
+    def key(self, *parts):
+        """Key of a set of parameters: strings and arrays (with their type and shape), exactly"""
+        digest = hashlib.blake2b(digest_size=20)
+        for part in parts:
+            if isinstance(part, str):
+                digest.update(b's' + part.encode())
+                continue
+            array = np.ascontiguousarray(part)
+            digest.update(repr((array.dtype.str, array.shape)).encode() + array.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Cached arrays of ``key`` (a dictionary), or None"""
+        try:
+            with np.load(self.__path(key)) as data:
+                value = {name: data[name] for name in data.files}
+            os.utime(self.__path(key)) # Recently used
+        except (OSError, ValueError, zipfile.BadZipFile):
+            value = None
+        if value is None: self.misses += 1
+        else: self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Cache a dictionary of arrays, removing the least recently used files over the budget"""
+        os.makedirs(self.directory, exist_ok=True)
+        # Written aside and then moved, so other processes never read half a file
+        temp = f'{self.__path(key)}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as f: np.savez_compressed(f, **value)
+        os.replace(temp, self.__path(key))
+        _evict_files(self.directory, self.max_bytes)
+
+    def clear(self):
+        """Remove all the cached layouts and reset the counters"""
+        for _, _, path in _cache_files(self.directory):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.hits = self.misses = 0
+
+    @property
+    def stats(self):
+        """Dictionary with the hits, misses, entries and size of the cache"""
+        files = _cache_files(self.directory)
+        return {'hits'      : self.hits,
+                'misses'    : self.misses,
+                'entries'   : len(files),
+                'bytes'     : sum(size for _, size, _ in files),
+                'max_bytes' : self.max_bytes}
+
+    def __path(self, key):
+        return os.path.join(self.directory, f'{key}.npz')
+
+
+def _cache_files(directory):
+    """Cached files of a directory as (last use, size, path), the least recently used first"""
+    if not os.path.isdir(directory): return []
+    files = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith('.npz'): continue
+        try:
+            info = entry.stat()
+        except OSError: # Removed by another process
+            continue
+        files.append((info.st_mtime, info.st_size, entry.path))
+    return sorted(files)
+
+def _evict_files(directory, max_bytes):
+    """Remove the least recently used cached files of a directory until they fit in ``max_bytes``"""
+    files = _cache_files(directory)
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= max_bytes: break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+# Caches shared by all the diagrams by default
+default_cache        = BlendCache()
+default_layout_cache = LayoutCache()
@@ -1,34 +1,56 @@
 # Basic imports
+import os
+import copy
 import numpy as np
-import pandas as pd
-import seaborn as sns
+from   concurrent.futures import ThreadPoolExecutor
 import cachai.utilities as chu
 import cachai.gadgets as chg
+import cachai._core.geometry as chgeo
+import cachai._core.layout as chlay
+import cachai._core.texture as chtex
+import cachai._core.mesh as chmesh
+import cachai._core.cache as chcache
 # Matplotlib imports
-from   matplotlib import pyplot as plt
 from   matplotlib.patches import Arc, Circle, PathPatch
+from   matplotlib.collections import PathCollection
 from   matplotlib.path import Path
 import matplotlib.colors as mtpl_colors
-from   matplotlib.text import Text
+from   matplotlib.tri import Triangulation
+
+# Parameters changing only the style of the diagram (see ChordDiagram.restyle), and their aliases
+STYLE_PARAMS  = ('colors','chord_alpha','off_alpha','positive_hatch','negative_hatch',
+                 'chord_linewidth','node_linewidth','node_labelpad','fontsize','font',
+                 'legend','positive_label','negative_label')
+STYLE_ALIASES = {'colors'          : 'c',
+                 'node_linewidth'  : 'nlw',
+                 'node_labelpad'   : 'npad',
+                 'chord_linewidth' : 'clw',
+                 'chord_alpha'     : 'calpha'}
+
+# Attributes of the diagram kept in its layout (see cachai._core.layout.ChordLayout)
+LAYOUT_ATTRIBUTES = ('corr_matrix','names','order','order_stats','crossing_stats','pruning_stats',
+                     'nodes','node_angles','ports','chord_source','chord_target','chord_rho',
+                     'chord_geometry','chord_index') + chlay.LAYOUT_PARAMS
 
 class ChordDiagram():
     def __init__(self, corr_matrix, **kwargs):
         """
-        Initialize a ChordDiagram instance.
+        Initialize a ChordDiagram instance, the renderer of a layout (a ChordLayout, given or
+        computed from the correlation matrix).
         """
-        # Correlation matrix error handling
-        self.corr_matrix = corr_matrix
-        self._validate_corr_matrix()
+        # Layout (the correlation matrix error handling is done there)
+        names    = kwargs.pop('names', None)
+        validate = kwargs.pop('validate', True)
+        params   = {key:kwargs.pop(key) for key in chlay.LAYOUT_PARAMS if key in kwargs}
+        if isinstance(corr_matrix, chlay.ChordLayout):
+            self.layout = copy.deepcopy(corr_matrix) # Computed, updates do not change the original
+        else:
+            self.layout = chlay.ChordLayout(corr_matrix, names, validate=validate, **params)
         
         # Initialize additional parameters
         self.__dict__.update(kwargs)
-        if isinstance(self.corr_matrix, pd.DataFrame):
-            if self.names is None: self.names = self.corr_matrix.columns.tolist()
-            self.corr_matrix = self.corr_matrix.to_numpy()
-        if self.names is None: self.names = [f'N{i+1}' for i in range(len(self.corr_matrix))]
-        if self.colors is None: self.colors = sns.hls_palette(len(self.corr_matrix))
-        self.nodes = dict()
-        self.order = [i for i in range(len(self.corr_matrix))]
+        if self.colors is None: self.colors = chu._hls_palette(self.layout.input_size)
+        self.update_stats = None
         self.global_indexes = []
         if self.font is None: self.font = {'size':self.fontsize}
         
@@ -36,150 +58,88 @@ class ChordDiagram():
         self.node_patches        = []
         self.node_labels         = []
         self.node_labels_params  = []
-        self.chord_patches       = [[] for i in range(len(self.corr_matrix))]
-        self.chord_blends        = [[] for i in range(len(self.corr_matrix))]
-        self.bezier_curves       = [[] for i in range(len(self.corr_matrix))]
-        self.__ports_refs        = []
-        self.__highlighted_ports = []
+        self.chord_patches       = [[] for i in range(self.layout.input_size)]
+        self.chord_blends        = [[] for i in range(self.layout.input_size)]
+        self.bezier_curves       = [[] for i in range(self.layout.input_size)]
+        self.node_collection     = None
+        self.chord_collections   = []
+        self.blend_texture       = None
+        self.blend_mesh          = None
+        self.__flat_patches      = []
+        self.__flat_blends       = []
+        self.__texture           = None
+        self.__chord_table       = None
+        self.__legend_dummies    = []
+        self.__input_colors      = [mtpl_colors.to_rgb(c) if isinstance(c,str) else c for c in self.colors]
         
         # Generate the diagram
         self.__generate_diagram()
 
     # Util methods
-    def _validate_corr_matrix(self):
-        """
-        Validate that a correlation matrix meets the required specifications:
-            - Input is a numpy.ndarray or pandas.DataFrame
-            - Matrix is 2-dimensional
-            - Matrix is not empty
-            - All values are int or float
-            - Matrix is symmetric
-        """
-        temp_corr_matrix = self.corr_matrix
-        if not isinstance(temp_corr_matrix, (np.ndarray, pd.DataFrame)):
-            raise TypeError('Your correlation matrix must be a numpy.ndarray or pandas.DataFrame')
-        # -- This block of code should not be here, but its necessary for the next validations --
-        if isinstance(temp_corr_matrix, pd.DataFrame):
-            temp_corr_matrix = self.corr_matrix.to_numpy()
-        # ---------------------------------------------------------------------------------------
-        if temp_corr_matrix.ndim != 2:
-            raise ValueError('Your correlation matrix must be a 2-dimensional array')
-        if temp_corr_matrix.shape[0] != temp_corr_matrix.shape[1]:
-            raise ValueError('Your correlation matrix must be a square matrix.')
-        if len(temp_corr_matrix) == 0:
-            raise ValueError('Your correlation matrix cannot be empty')
-        if not np.issubdtype(temp_corr_matrix.dtype, np.floating):
-            raise TypeError('Your correlation matrix must contain float values')
-        if not np.allclose(temp_corr_matrix, temp_corr_matrix.T):
-            raise ValueError('Your correlation matrix must be symmetric')
-        
-    def _optimize_nodes(self):
-        """Optimize node order using Prim's algorithm."""
-        n_nodes = self.corr_matrix.shape[0]
-        # We convert the correlations to distances
-        # The strongest the correlation, the shorter the distance
-        distance_matrix = 1 - np.abs(self.corr_matrix)
-        # In order to ignore the diagonal, we fill it with infinity values
-        np.fill_diagonal(distance_matrix, np.inf)
-        
-        # Prim's algorithm
-        visited = set()
-        order  = []
-
-        start_node = np.argmin(np.sum(distance_matrix, axis=0))
-        visited.add(start_node)
-        order.append(start_node)
-
-        while len(visited) < n_nodes:
-            # Closest non-visited node to any visited node
-            min_dist = np.inf
-            next_node = -1
-            for node in visited:
-                for neighbor in range(n_nodes):
-                    if (neighbor not in visited) and (distance_matrix[node,neighbor] < min_dist):
-                        min_dist = distance_matrix[node, neighbor]
-                        next_node = neighbor
-            if next_node == -1:
-                break  # Just in case somehow we have disconnected nodes
-            visited.add(next_node)
-            order.append(next_node)
-
-        # Apply new order
-        self.order = order
-        self.__order_nodes()
-    
     def _radius_rule(self, dist):
-        """Rule to set the radius of a single chord"""
-        if dist <= self.min_dist:
-            return self.max_rho_radius
-        else:
-            return self.max_rho_radius * (1 - (dist - self.min_dist) / (np.pi - self.min_dist))
+        """Rule to set the radius of a single chord (or an array of chords)"""
+        return self.layout.radius_rule(dist)
     
     def _scale_rho(self, rho):
         """Scale rho (link thickness)"""
-        if self.scale == 'linear':
-            rho_lin = np.abs(rho) * self.max_rho
-            return np.clip(rho_lin, 0, 1) # Clip to avoid numerical issues
-        elif self.scale == 'log':
-            rho_log = (1 - np.log10(10 - 9*np.abs(rho))) * self.max_rho
-            return np.clip(rho_log, 0, 1) # Clip to avoid numerical issues
-        else:
-            raise ValueError(f'Unknown scale type {self.scale}')
+        return self.layout.scale_rho(rho)
     
     # Main generation methods
     def __generate_diagram(self):
         """Generate the complete chord diagram"""
+        if self.blend not in (True, False, 'image', 'texture', 'mesh'):
+            raise ValueError(f'Unknown blend mode {self.blend}. '
+                             f'Available modes are: True ("image"), "texture", "mesh", False')
+        # A given layout is drawn as it is
+        if self.layout.node_angles is None: self.layout.compute(self.layout_cache)
+        self.colors = [self.__input_colors[i] for i in self.layout.node_index.tolist()]
+        self.__report_invalid_chords(self.layout.invalid_chords)
         
-        for i,color in enumerate(self.colors):
-            if isinstance(color,str): self.colors[i] = mtpl_colors.to_rgb(color)
-            
-        if self.filter == True: self.__filter_nodes()
+        self.__generate_nodes()
+        self.__generate_chords()
+
+        # Add patches (or collections) to axes
+        if self.collection: self.__generate_collections()
+        for node_patch in self.node_patches: self.ax.add_patch(node_patch)
+        for node_label in self.node_labels_params:
+            label = chg.PolarText(
+                node_label['r'],
+                np.rad2deg(node_label['theta']),
+                text=node_label['label'],
+                center=self.position,
+                pad=self.node_labelpad,
+                rotation=node_label['rot'],
+                ha='center', va='center',
+                clip_on=True,
+                rasterized=self.rasterized,
+            )
+            label.set_font(self.font)
+            self.ax.add_artist(label)
+            self.node_labels.append(label)
+        flat_bezier_curves = [c for clist in self.bezier_curves for c in clist]
+        clips = []
+        for k in range(len(flat_bezier_curves)):
+            if self.collection:
+                clips.append(self.__chord_path(k))
+            else:
+                clips.append(self.__flat_patches[k])
+                self.ax.add_patch(clips[-1])
+        if self.blend and self.blend != 'mesh':
+            blends = self.__compute_blends(clips,flat_bezier_curves)
+            images = [self.__add_chord_blend(clip,bezier_curve,blend_arrays)
+                      for clip,bezier_curve,blend_arrays in zip(clips,flat_bezier_curves,blends)]
+            if self.blend != 'texture': self.__set_blend_images(images)
+        if self.blend == 'texture': self.__generate_texture()
+        if self.blend == 'mesh': self.__generate_mesh()
         
-        if len(self.corr_matrix) == 0:
-            raise ValueError(f'No nodes remaining after threshold filtering: '
-                f'all correlations were below the threshold = {self.threshold}.')
-        else:
-            if self.optimize == True: self._optimize_nodes()
-            self.__generate_nodes()
-            self.__generate_chords()
-
-            # Add patches to axes
-            for node_patch, node_label in zip(self.node_patches, self.node_labels_params):
-                self.ax.add_patch(node_patch)
-                label = chg.PolarText(
-                    node_label['r'],
-                    np.rad2deg(node_label['theta']),
-                    text=node_label['label'],
-                    center=self.position,
-                    pad=self.node_labelpad,
-                    rotation=node_label['rot'],
-                    ha='center', va='center',
-                    clip_on=True,
-                    rasterized=self.rasterized,
-                )
-                label.set_font(self.font)
-                self.ax.add_artist(label)
-                self.node_labels.append(label)
-            flat_chord_patches = [p for plist in self.chord_patches for p in plist]
-            flat_bezier_curves = [c for clist in self.bezier_curves for c in clist]
-            for k,(chord_patch,bezier_curve) in enumerate(zip(flat_chord_patches,flat_bezier_curves)):
-                self.ax.add_patch(chord_patch)
-                if self.blend:
-                    self.__add_chord_blend(chord_patch,bezier_curve,self.global_indexes[k])
-            
-            self.__adjust_ax()
-            self.__generate_legend()
-            self.__generate_port_refs()
+        self.__adjust_ax()
+        self.__generate_legend()
+        self.__generate_port_refs()
                 
     # Components generation methods
     def __generate_nodes(self):
         """Generate nodes"""
-        # Initial variables
-        # Minus 1 from each diagonal of A to A
-        relevance      = np.sum(np.abs(self.corr_matrix),axis=1) - 1
-        relevance_norm = relevance / np.sum(relevance)
-        start_angles   = np.cumsum([0] + list(2*np.pi*relevance_norm[:-1]))
-        gap_angle      = (2*np.pi/len(self.corr_matrix))*self.node_gap
+        self.__label_params()
 
         # Base patch
         self.ax.add_patch(Circle(self.position,self.radius,
@@ -191,155 +151,157 @@ class ChordDiagram():
 
         lw = 2*self.node_linewidth
 
-        for node in range(len(self.corr_matrix)):
-            node_data = dict()
-            theta_i   = start_angles[node]
-            theta_f   = theta_i + 2*np.pi*relevance_norm[node]
-            # -- Gap correction -----
-            theta_i   = theta_i + np.min([gap_angle,theta_f])
-            # -----------------------
-            theta_m   = (theta_i + theta_f)/2
-            theta_arc = chu.angdist(theta_i,theta_f)
-            node_data['theta_i']   = theta_i
-            node_data['theta_f']   = theta_f
-            node_data['theta_m']   = theta_m
-            node_data['theta_arc'] = theta_arc
-
-            rhos       = dict() # Correlations
-            ports      = dict() # Ports of the node
-            states     = dict() # Ports states (1 or -1)
-            corr       = np.insert(self.corr_matrix[node],node,1)
-            real_corr  = corr.copy()
-            # Control of the allowed ports using the correlation factor
-            # 1 = Allowed
-            # -1 = Forbidden
-            node_ports_state = [1 for p in range(len(corr))]
-            for p,r in enumerate(corr):
-                if np.abs(r) < self.threshold:
-                    node_ports_state[p] = -1
-                    real_corr[p]        = 0
-            if not self.show_diag:
-                node_ports_state[node]   = -1
-                real_corr[node]          = 0
-                node_ports_state[node+1] = -1
-                real_corr[node+1]        = 0
-            if np.sum(real_corr) == 0: corr_norm = real_corr
-            else: corr_norm = np.abs(real_corr)/np.sum(np.abs(real_corr))
-
-            for j,(rho,port_size,port_state) in enumerate(zip(corr,corr_norm,node_ports_state)):
-                if   j == node     : port_id = node
-                elif j == (node+1) : port_id = f'{node}*'
-                else:
-                    if   j < node: port_id = j
-                    elif j > node: port_id = j-1
-                port_i = theta_i + theta_arc*np.sum(corr_norm[:j])
-                port_f = port_i + theta_arc*port_size
-                if port_state < 0:
-                    port_i = 0
-                    port_f = 0
-                rhos[port_id]   = rho
-                ports[port_id]  = {'i':port_i,'f':port_f}
-                states[port_id] = port_state
-
-            node_data['rhos']        = rhos
-            node_data['ports']       = ports
-            node_data['ports_state'] = states
-            self.nodes[node]         = node_data
-
         # Node
-        for n in self.nodes:
-            node = self.nodes[n]
+        for n in range(self.corr_matrix.shape[0]):
+            theta_i = self.node_angles['theta_i'][n]
+            theta_f = self.node_angles['theta_f'][n]
 
             # Patch
-            self.node_patches.append(
+            if not self.collection: self.node_patches.append(
                 Arc(self.position,
                 width=2*self.radius, 
                 height=2*self.radius,
-                theta1=np.rad2deg(node['theta_i']), 
-                theta2=np.rad2deg(node['theta_f']),
+                theta1=np.rad2deg(theta_i), 
+                theta2=np.rad2deg(theta_f),
                 lw=lw,zorder=1, 
                 rasterized=self.rasterized,
                 color=self.colors[n])
             )
 
-            # Label
-            params = dict()
-            params['label'] = self.names[n]
-            params['r']     = self.radius
-            params['theta'] = node['theta_m']
-            params['x']     = params['r'] * np.cos(params['theta']) + self.position[0]
-            params['y']     = params['r'] * np.sin(params['theta']) + self.position[1]
-            params['rot']   = np.rad2deg(node['theta_m'] - np.sign(params['y']-self.position[1])*np.pi/2)%360
-            self.node_labels_params.append(params)
+    def __label_params(self):
+        """Parameters of the node labels, from their anchors in the layout"""
+        anchors = self.layout.label_anchors
+        self.node_labels_params = [{'label' : self.names[n],
+                                    'r'     : anchors['r'][n],
+                                    'theta' : anchors['theta'][n],
+                                    'x'     : anchors['x'][n],
+                                    'y'     : anchors['y'][n],
+                                    'rot'   : anchors['rot'][n]} for n in range(len(self.names))]
         
     def __generate_chords(self):
         """Generate chords"""
-        for n in self.nodes:
-            node = self.nodes[n]
-            chord_color = self.colors[n]
-            chord_edge  = chu.mod_color(self.colors[n],light=0.5)
-            if self.blend:
-                chord_color = 'none'
-                chord_edge = '#3D3D3D'
-
-            # Links
-            if self.show_diag:
-                points,codes,curve = self.__compute_bezier_curves(
-                                         (node['ports'][n]['i'],node['ports'][n]['f']),
-                                         (node['ports'][f'{n}*']['i'],node['ports'][f'{n}*']['f']),
-                                         self._scale_rho(1)
-                                     )
-
-                self.chord_patches[n].append(
-                    PathPatch(Path(points, codes),
-                              facecolor=chord_color,
-                              edgecolor=chord_edge,
-                              alpha=self.chord_alpha,
-                              hatch=self.positive_hatch,
-                              lw=self.chord_linewidth,
-                              rasterized=self.rasterized,
-                              zorder=4)
-                )
-                curve['c1'] = self.colors[n]
-                curve['c2'] = self.colors[n]
-                self.bezier_curves[n].append(curve)
-                self.global_indexes.append(n)
-
-            for m in self.nodes:
-                if m > n and node['ports_state'][m] > 0:
-                    try:
-                        target   = self.nodes[m]
-                        this_rho = node['rhos'][m]
-                        vis_rho  = self._scale_rho(this_rho)
-                        hatch    = self.positive_hatch
-                        if this_rho < 0: hatch = self.negative_hatch
-
-                        points,codes,curve = self.__compute_bezier_curves(
-                                         (node['ports'][m]['i'],node['ports'][m]['f']),
-                                         (target['ports'][n]['i'],target['ports'][n]['f']),
-                                         vis_rho
-                                     )
-
-                        self.chord_patches[n].append(
-                            PathPatch(Path(points, codes),
-                                      facecolor=chord_color,
-                                      edgecolor=chord_edge,
-                                      alpha=self.chord_alpha,
-                                      hatch=hatch,
-                                      lw=self.chord_linewidth,
-                                      rasterized=self.rasterized,
-                                      zorder=4)
-                        )
-                        curve['c1'] = self.colors[n]
-                        curve['c2'] = self.colors[m]
-                        self.bezier_curves[n].append(curve)
-                        self.global_indexes.append(n)
-                        
-                    except Exception as e:
-                        print(chu.strcol(rf'ChordError: Problem creating chord from {self.names[n]} to {self.names[m]}.',
-                                          c='red'))
-                        print(chu.strcol(f'            details: {e}',
-                                          c='red'))
+        self.__chord_alphas = np.full(len(self.chord_source), float(self.chord_alpha))
+        self.__highlighted  = np.zeros(len(self.chord_source), dtype=bool)
+        self.__index_chords()
+        if self.collection: return
+
+        self.__flat_patches = [self.__chord_patch(k) for k in range(len(self.chord_source))]
+        self.chord_patches  = self.__by_node(self.__flat_patches)
+
+    def __report_invalid_chords(self,pairs):
+        """Report the chords left out of the layout because of their geometry"""
+        for n,m in pairs.tolist():
+            print(chu.strcol(rf'ChordError: Problem creating chord from {self.names[n]} to {self.names[m]}.',
+                              c='red'))
+            print(chu.strcol(f'            details: non-finite chord geometry',
+                              c='red'))
+
+    def __index_chords(self):
+        """First chord of every node, and mid curve and node of every chord"""
+        self.__node_chords  = np.searchsorted(self.chord_source, np.arange(self.corr_matrix.shape[0]))
+        self.bezier_curves  = [[] for _ in self.bezier_curves]
+        self.global_indexes = []
+        for k,(n,m) in enumerate(zip(self.chord_source.tolist(),self.chord_target.tolist())):
+            P0, P1, P2 = self.chord_geometry['mid'][self.chord_index[k]]
+            self.bezier_curves[n].append({'P0':P0,'P1':P1,'P2':P2,
+                                          'c1':self.colors[n],'c2':self.colors[m]})
+            self.global_indexes.append(n)
+
+    def __chord_patch(self,k):
+        """Patch of the k-th chord"""
+        chord_color, chord_edge = self.__chord_colors(self.chord_source[k])
+        return PathPatch(self.__chord_path(k),
+                         facecolor=chord_color,
+                         edgecolor=chord_edge,
+                         alpha=self.__chord_alphas[k],
+                         hatch=self.__chord_hatch(self.chord_rho[k]),
+                         lw=self.chord_linewidth,
+                         rasterized=self.rasterized,
+                         zorder=4)
+
+    def __by_node(self,items):
+        """Group the items of every chord (e.g. patches) by the node of the chord"""
+        grouped = [[] for _ in self.chord_patches]
+        for n,item in zip(self.chord_source.tolist(),items): grouped[n].append(item)
+        return grouped
+
+    def __generate_collections(self):
+        """Generate the node arcs and the chords as collections (one per hatch) instead of patches"""
+        lw = 2*self.node_linewidth
+        self.node_collection = PathCollection(self.__node_arcs(),
+                                              facecolors='none',
+                                              edgecolors=self.colors,
+                                              linewidths=lw,
+                                              zorder=1,
+                                              rasterized=self.rasterized)
+        self.ax.add_collection(self.node_collection)
+        self.__generate_chord_collections()
+
+    def __node_arcs(self):
+        """Paths of the node arcs"""
+        arcs = []
+        for theta_i,theta_f in zip(self.node_angles['theta_i'],self.node_angles['theta_f']):
+            arc = Path.arc(np.rad2deg(theta_i),np.rad2deg(theta_f))
+            arcs.append(Path(arc.vertices*self.radius + self.position, arc.codes))
+        return arcs
+
+    def __generate_chord_collections(self):
+        """Generate the chord collections (one per hatch), reusing the existing ones"""
+        # Base colors of the chords, the alphas are applied on top
+        self.__chord_faces = np.zeros((len(self.chord_source),4))
+        self.__chord_edges = np.zeros((len(self.chord_source),4))
+        for k,n in enumerate(self.chord_source.tolist()):
+            chord_color, chord_edge = self.__chord_colors(n)
+            self.__chord_faces[k] = mtpl_colors.to_rgba(chord_color)
+            self.__chord_edges[k] = mtpl_colors.to_rgba(chord_edge)
+
+        previous = {collection.get_hatch():collection for collection in self.chord_collections}
+        self.chord_collections = []
+        self.__collection_members = []
+        hatches = [self.__chord_hatch(rho) for rho in self.chord_rho.tolist()]
+        for hatch in dict.fromkeys(hatches):
+            members = np.flatnonzero([h == hatch for h in hatches])
+            paths   = [self.__chord_path(k) for k in members]
+            collection = previous.pop(hatch,None)
+            if collection is None:
+                collection = PathCollection(paths,
+                                            hatch=hatch,
+                                            linewidths=self.chord_linewidth,
+                                            zorder=4,
+                                            rasterized=self.rasterized)
+                self.ax.add_collection(collection)
+            else:
+                collection.set_paths(paths)
+            self.chord_collections.append(collection)
+            self.__collection_members.append(members)
+        for collection in previous.values(): collection.remove()
+        self.__update_collections()
+
+    def __update_collections(self):
+        """Apply the alphas of the chords to their collections"""
+        for collection,members in zip(self.chord_collections,self.__collection_members):
+            faces = self.__chord_faces[members].copy()
+            edges = self.__chord_edges[members].copy()
+            faces[:,3] *= self.__chord_alphas[members]
+            edges[:,3] *= self.__chord_alphas[members]
+            collection.set_facecolor(faces)
+            collection.set_edgecolor(edges)
+
+    def __chord_path(self,k):
+        """Path of the k-th chord"""
+        geometry = self.chord_geometry
+        i        = self.chord_index[k]
+        start,end = geometry['offsets'][i], geometry['offsets'][i+1]
+        return Path(geometry['vertices'][start:end], geometry['codes'][start:end])
+
+    def __chord_colors(self,n):
+        """Face and edge colors of the chords of the n-th node"""
+        if self.blend: return 'none', '#3D3D3D'
+        return self.colors[n], chu.mod_color(self.colors[n],light=0.5)
+
+    def __chord_hatch(self,rho):
+        """Hatch of a chord depending on its correlation sign"""
+        return self.negative_hatch if rho < 0 else self.positive_hatch
     
     def __generate_legend(self):
         """Add dummie labels to show in the legend"""
@@ -352,122 +314,92 @@ class ChordDiagram():
                                     c='lightgray',ec='k',hatch=self.positive_hatch,
                                     label=self.positive_label,zorder=0,rasterized=True)
             #dummy.set_visible(False)
+            self.__legend_dummies.append(dummy)
         if self.negative_label is not None:
             dummy = self.ax.scatter(*self.position,marker='s',s=200,
                                     c='lightgray',ec='k',hatch=self.negative_hatch,
                                     label=self.negative_label,zorder=0,rasterized=True)
             #dummy.set_visible(False)
+            self.__legend_dummies.append(dummy)
     
     def __generate_port_refs(self):
-        for n in self.nodes:
-            self.__ports_refs.append(self.__get_node_ports_references(n))
+        """
+        Chords of every node in the order of its ports (anti-clockwise): the chords from the
+        previous nodes, the self-referencing chord and the chords to the next nodes. Also the
+        lookups of the nodes by name and of the chords by pair of nodes.
+        """
+        source, target = self.chord_source, self.chord_target
+        n_nodes  = self.corr_matrix.shape[0]
+        chords   = np.arange(len(source))
+        # Every chord is in the ports of its source, and of its target unless self-referencing
+        incoming = source != target
+        node     = np.concatenate([target[incoming], source])
+        other    = np.concatenate([source[incoming] - n_nodes, target]) # Previous nodes first
+        flat     = np.concatenate([chords[incoming], chords])
+        order    = np.lexsort((other, node))
+        counts   = np.bincount(node, minlength=n_nodes)
+        self.__port_chords  = np.split(flat[order], np.cumsum(counts)[:-1])
+        self.__node_lookup  = {name:n for n,name in enumerate(self.names)}
+        self.__chord_lookup = dict(zip(zip(source.tolist(), target.tolist()), chords.tolist()))
+        self.__chord_table  = None
 
     # Helper methods
-    def __filter_nodes(self):
-        """Remove nodes with no correlation (0 chords)"""
-        mask = np.all((np.abs(self.corr_matrix) < self.threshold)\
-                      | (np.eye(self.corr_matrix.shape[0], dtype=bool)), axis=1)
-        indexes = np.where(~mask)[0]
-        
-        self.corr_matrix = self.corr_matrix[indexes][:, indexes]
-        self.names       = [self.names[i] for i in indexes]
-        self.colors      = [self.colors[i] for i in indexes]
-        
-    def __order_nodes(self):
-        """Order nodes (matrix), names and colors"""
-        self.corr_matrix = self.corr_matrix[np.ix_(self.order, self.order)]
-        self.names       = [self.names[i] for i in self.order]
-        self.colors      = [self.colors[i] for i in self.order]
-    
-    def __compute_bezier_curves(self,alpha,beta,rho):
-        """Compute bezier curves to modelate a chord"""
-        # Polar
-        alpha_i, alpha_f = alpha
-        alpha_m = np.mean([alpha_f,alpha_i])
-        alphas = chu._angspace(alpha_i,alpha_f)
-        if len(alphas) == 0: alphas = np.array([alpha_i,alpha_f]) # Case: angdist too short
-
-        beta_i, beta_f = beta
-        beta_m = np.mean([beta_f,beta_i])
-        betas = chu._angspace(beta_i,beta_f)
-        if len(betas) == 0: betas = np.array([beta_i,beta_f]) # Case: angdist too short
-
-        dist = chu.angdist(alpha_m, beta_m)
-        r_rho = self._radius_rule(dist) * self.radius
-        dist_inex = np.min([chu.angdist(alpha_i, beta_f), chu.angdist(alpha_f, beta_i)])
-
-        # Convex case
-        if chu.angdist(alpha_i, beta_f) < chu.angdist(alpha_f, beta_i):
-            theta_rho = beta_f + dist_inex / 2
-            r_AB = r_rho
-            r_BA = r_rho + rho * self.radius
-        # Concave case
-        elif chu.angdist(alpha_i, beta_f) >= chu.angdist(alpha_f, beta_i):
-            theta_rho = alpha_f + dist_inex / 2
-            r_AB = r_rho + rho * self.radius
-            r_BA = r_rho
-
-        # Cartesian
-        points_A = np.column_stack([np.cos(alphas) * self.radius, 
-                                   np.sin(alphas) * self.radius])
-        points_B = np.column_stack([np.cos(betas) * self.radius, 
-                                   np.sin(betas) * self.radius])
-
-        # A to B
-        point_AB = [np.array([r_AB * np.cos(theta_rho), 
-                             r_AB * np.sin(theta_rho)])]
-        control_AB = [2 * point_AB[0] - (points_A[-1] + points_B[0]) / 2]
-
-        # B to A
-        point_BA = [np.array([r_BA * np.cos(theta_rho), 
-                             r_BA * np.sin(theta_rho)])]
-        control_BA = [2 * point_BA[0] - (points_A[0] + points_B[-1]) / 2]
-
-        # Bezier curve in the middle
-        mid_bezier = dict()
-        r_mid = (r_AB + r_BA) / 2
-        point_mid = [np.array([r_mid * np.cos(theta_rho), 
-                              r_mid * np.sin(theta_rho)])]
-        control_mid = [2 * point_mid[0] - (points_A[-1] + points_B[0]) / 2]
-        mid_bezier['P0'] = points_A[-1] + self.position
-        mid_bezier['P1'] = control_mid[0] + self.position
-        mid_bezier['P2'] = points_B[0] + self.position
-
-        # Points
-        points = np.vstack((points_A, control_AB, points_B, control_BA, points_A[0])) \
-                 + self.position
-
-        # Codes
-        codes = [Path.MOVETO] + \
-                [Path.LINETO] * (len(points_A) - 1) + \
-                [Path.CURVE3] * 2 + \
-                [Path.LINETO] * (len(points_B) - 1) + \
-                [Path.CURVE3] * 2
-
-        return points,codes,mid_bezier
-    
-    def __add_chord_blend(self,patch,curve,n):
-        """Add color mapped patches using the initial and final colors"""
+    def __compute_blends(self,clips,curves):
+        """
+        Blend arrays of every chord (see __blend_arrays), computed by ``workers`` threads. NumPy
+        releases the GIL in the heavy parts, and the results keep the order of the chords.
+        """
+        workers = os.cpu_count() if self.workers == -1 else self.workers
+        tasks   = [(clip,curve) for clip,curve in zip(clips,curves)]
+        if self.blend == 'texture': self.__texture_layers() # Created before the threads
+        if workers is None or workers <= 1 or len(tasks) <= 1:
+            return [self.__blend_arrays(*task) for task in tasks]
+        with ThreadPoolExecutor(max_workers=min(workers,len(tasks))) as pool:
+            return list(pool.map(lambda task: self.__blend_arrays(*task), tasks))
+
+    def __blend_arrays(self,patch,curve):
+        """Blend map of a chord (or its texture layer), from the blend cache if possible"""
+        path = chu._get_path(patch)
         # Pach vertices
-        vertices = patch.get_path().vertices
-        xmin, ymin = np.min(vertices, axis=0)
-        xmax, ymax = np.max(vertices, axis=0)
+        xmin, ymin = np.min(path.vertices, axis=0)
+        xmax, ymax = np.max(path.vertices, axis=0)
 
         # Bézier curve
         P0 = curve['P0']
         P1 = curve['P1']
         P2 = curve['P2']
-        bezier = chu.get_bezier_curve([P0,P1,P2],n=self.bezier_n)
-        bezier_equidistant = chu.equidistant(bezier)
-
-        # Color map
+        def mid_curve():
+            bezier = chu.get_bezier_curve([P0,P1,P2],n=self.bezier_n)
+            return chu.equidistant(bezier)
+
+        if self.blend == 'texture':
+            texture = self.__texture_layers()
+            def layer():
+                index, values = texture.layer_values(path,mid_curve(),dtype=self.dtype)
+                return index.astype(np.int32), chu.compact_map(values,self.blend_dtype)
+            return self.__cached_blend(
+                ('texture',path.vertices,P0,P1,P2,self.bezier_n,texture.extent,texture.resolution,
+                 str(self.blend_dtype),self.dtype),
+                layer)
+        return self.__cached_blend(
+            ('image',path.vertices,P0,P1,P2,self.bezier_n,self.blend_resolution,str(self.blend_dtype),
+             self.dtype),
+            lambda: (chu.compact_map(chu.map_from_curve(mid_curve(),xlim=(xmin,xmax),ylim=(ymin,ymax),
+                                                        resolution=self.blend_resolution,
+                                                        method='grid',mask=path,dtype=self.dtype),
+                                     self.blend_dtype),))
+
+    def __add_chord_blend(self,patch,curve,blend_arrays):
+        """Add color mapped patches using the initial and final colors (or a texture layer)"""
+        # Color map (shared by the chords with the same colors)
         c1          = curve['c1'] # Color 1
         c2          = curve['c2'] # Color 2
-        chord_cmap  = sns.blend_palette([c1,c1,c2,c2],as_cmap=True)
-        cmap_matrix = chu.map_from_curve(bezier_equidistant,xlim=(xmin,xmax),ylim=(ymin,ymax),
-                                         resolution=self.blend_resolution)
-        self.chord_blends[n].append(
-            chu.colormapped_patch(
+        if self.blend == 'texture':
+            self.__texture_layers().add_layer(*blend_arrays,chu.blend_lut(c1,c2))
+            return None
+        chord_cmap  = chu.blend_colormap(c1,c2)
+        cmap_matrix, = blend_arrays
+        return chu.colormapped_patch(
                 patch,
                 cmap_matrix,
                 ax=self.ax,
@@ -475,7 +407,60 @@ class ChordDiagram():
                 zorder=2,
                 alpha=self.chord_alpha,
                 rasterized=self.rasterized)
-        )
+
+    def __set_blend_images(self,images):
+        """Set the blend images of the chords (in chord order)"""
+        self.__flat_blends = list(images)
+        self.chord_blends  = self.__by_node(self.__flat_blends)
+
+    def __cached_blend(self,key,compute):
+        """Blend arrays from the blend cache (if any), computing them if missing"""
+        cache = chcache.default_cache if self.blend_cache is True else self.blend_cache
+        if cache is None or cache is False: return compute()
+        return cache.fetch(cache.key(*key),compute)
+
+    def __texture_layers(self):
+        """Shared texture of the chord blends (blend='texture'), created on first use"""
+        if self.__texture is None:
+            extent = (self.position[0] - self.radius, self.position[0] + self.radius,
+                      self.position[1] - self.radius, self.position[1] + self.radius)
+            self.__texture = chtex.BlendTexture(extent, 2*self.blend_resolution)
+        return self.__texture
+
+    def __generate_texture(self):
+        """Draw all the chord blends as a single image"""
+        self.blend_texture = chtex.BlendTextureImage(self.ax,
+                                                     self.__texture_layers(),
+                                                     self.__chord_alphas,
+                                                     zorder=2,
+                                                     rasterized=self.rasterized)
+        self.ax.add_image(self.blend_texture)
+        if self.release_blends: self.blend_texture.release()
+
+    def __generate_mesh(self):
+        """Draw all the chord blends as a single Gouraud-shaded triangle mesh"""
+        self.blend_mesh = chmesh.BlendMesh(*self.__mesh_data(),
+                                           self.__chord_alphas,
+                                           zorder=2,
+                                           rasterized=self.rasterized)
+        self.ax.add_collection(self.blend_mesh, autolim=False)
+
+    def __mesh_data(self):
+        """Triangulation, colors of its points and chord of every triangle of the chord blends"""
+        mesh = chgeo.chord_mesh(self.chord_geometry, self.chord_index, n=self.bezier_n)
+        self.__mesh_points = mesh['point_chord'], mesh['t'] # Kept to change the colors
+        triangulation = Triangulation(mesh['points'][:,0], mesh['points'][:,1], mesh['triangles'])
+        return triangulation, self.__mesh_colors(), mesh['triangle_chord']
+
+    def __mesh_colors(self):
+        """Colors of the points of the blend mesh"""
+        point_chord, t = self.__mesh_points
+        # Same blend as sns.blend_palette([c1,c1,c2,c2]): c1 up to 1/3, c2 from 2/3
+        colors = np.asarray(self.colors, dtype=float)[:, :3]
+        c1     = colors[self.chord_source[point_chord]]
+        c2     = colors[self.chord_target[point_chord]]
+        mix    = np.clip(3*t - 1, 0, 1)[:, None]
+        return (1 - mix)*c1 + mix*c2
     
     def __adjust_ax(self):
         """Adjust scale, limits, and visibility of the axis"""
@@ -488,49 +473,80 @@ class ChordDiagram():
         if adjust_x and adjust_y: self.ax.set_aspect('equal')
         if self.show_axis == False: self.ax.axis('off')
     
-    def __get_node_ports(self,n):
-        """Return the occupied ports of the n-th node"""
-        this_items = list(self.nodes[n]['ports_state'].items())
-        this_items.pop(n+1)
-        return [p for p, s in this_items if s > 0 and p > n]
-
-    def __get_node_ports_references(self,n):
+    def __set_chord_alphas(self,chords,alpha):
+        """Set the alpha (or an alpha per chord) of some chords (flat indices) and their blends"""
+        chords = np.atleast_1d(chords)
+        alphas = np.broadcast_to(alpha, chords.shape).tolist()
+        self.__chord_alphas[chords] = alphas
+        if self.collection:
+            self.__update_collections()
+        else:
+            for k,a in zip(chords.tolist(),alphas): self.__flat_patches[k].set_alpha(a)
+        if self.blend == 'texture':
+            self.blend_texture.set_chord_alphas(self.__chord_alphas)
+        elif self.blend == 'mesh':
+            self.blend_mesh.set_chord_alphas(self.__chord_alphas)
+        elif self.blend:
+            for k,a in zip(chords.tolist(),alphas): self.__flat_blends[k].set_alpha(a)
+
+    def __highlight(self,chords,alpha=None):
         """
-        Return the reference of the chords of the n-th node as (n,c), where:
-
-        - n: index of the n-th node in the resulting diagram
-        - c: index of the c-th chord in the n-th node
-
-        Always anti-clockwise. When show_diag=True, the self-referencing chord is (n,0).
+        Highlight some chords (flat indices) in one go: the chords that were not highlighted fade
+        to ``off_alpha``, and only the chords whose alpha changes are touched. An empty selection
+        changes nothing.
         """
-        node       = self.nodes[n]
-        this_ports = self.__get_node_ports(n)
-        refs       = []
-        for port in node['ports_state'].keys():
-            if '*' not in str(port):
-                if node['ports_state'][port] > 0 and port > n:
-                    refs.append((n,this_ports.index(port)))
-                elif node['ports_state'][port] > 0 and port < n:
-                    target_ports = self.__get_node_ports(port)
-                    refs.append((port,target_ports.index(n)))
-        if self.show_diag:
-            diag_ref_position = None
-            refs_modified = []
-            for i, (x, y) in enumerate(refs):
-                modified = (x, y + 1)
-                refs_modified.append(modified)
-                if diag_ref_position is None and x == n: diag_ref_position = i   
-            if diag_ref_position is None: diag_ref_position = len(refs_modified)
-            refs_modified.insert(diag_ref_position, (n, 0))
-            refs = refs_modified
-        return refs
-
-    def __update_highlights(self):
-        for n in self.nodes:
-            for c in range(len(self.chord_patches[n])):
-                if (n,c) not in self.__highlighted_ports:
-                    self.chord_patches[n][c].set_alpha(self.off_alpha)
-                    if self.blend == True: self.chord_blends[n][c].set_alpha(self.off_alpha)
+        if len(chords) == 0: return
+        if alpha is None: alpha = self.chord_alpha
+        if alpha <= self.off_alpha: alpha = 0.8
+        alphas = self.__chord_alphas.copy()
+        alphas[~self.__highlighted] = self.off_alpha
+        alphas[chords] = alpha
+        self.__highlighted[chords] = True
+        changed = np.flatnonzero(alphas != self.__chord_alphas)
+        if len(changed): self.__set_chord_alphas(changed, alphas[changed])
+
+    def __check_nodes(self,nodes):
+        """Nodes (indices) as an array, checking that they are in the diagram"""
+        nodes = np.atleast_1d(np.asarray(nodes, dtype=np.intp))
+        if np.any(nodes >= len(self.nodes)):
+            raise IndexError('Node is out of range. '
+                f'This Chord Diagram has only {len(self.nodes)} nodes.')
+        if np.any(nodes < 0):
+            raise ValueError('The input node must be positive or zero.')
+        return nodes
+
+    def __node_selection(self,nodes):
+        """Flat indices of all the chords of some nodes"""
+        if nodes is None: return np.empty(0, dtype=np.intp)
+        nodes = self.__check_nodes(nodes)
+        return np.flatnonzero(np.isin(self.chord_source,nodes) | np.isin(self.chord_target,nodes))
+
+    def __chord_selection(self,chords):
+        """Flat indices of chords given as (node, chord) references"""
+        if chords is None: return np.empty(0, dtype=np.intp)
+        selected = []
+        for node,chord in np.asarray(chords, dtype=np.intp).reshape(-1,2).tolist():
+            self.__check_nodes(node)
+            if chord < 0: raise ValueError('The input node and chord must be positive or zero.')
+            if chord >= len(self.__port_chords[node]):
+                raise IndexError(f'Chord {chord} is out of range. '
+                        f'Node {node} has only {len(self.__port_chords[node])} chords.')
+            selected.append(self.__port_chords[node][chord])
+        return np.array(selected, dtype=np.intp)
+
+    def __pair_selection(self,pairs):
+        """Flat indices of the chords between pairs of nodes (indices or names)"""
+        if pairs is None: return np.empty(0, dtype=np.intp)
+        return np.array([self.get_chord(a,b) for a,b in pairs], dtype=np.intp)
+
+    def __node_index(self,node):
+        """Index of a node given by its index or its name"""
+        if isinstance(node,str):
+            if node not in self.__node_lookup:
+                raise ValueError(f'Unknown node {node}. '
+                                 f'Available nodes are: {", ".join(map(str,self.names))}')
+            return self.__node_lookup[node]
+        return int(self.__check_nodes(node)[0])
 
     # Customization methods
     def highlight_node(self,node,chords=None,alpha=None):
@@ -558,9 +574,8 @@ class ChordDiagram():
         if node < 0 :
             raise ValueError('The input node must be positive or zero.')
 
-        if chords is None: chords = [c for c in range(len(self.__ports_refs[node]))]
-        for chord in chords:
-            self.highlight_chord(node,chord,alpha)
+        if chords is None: self.__highlight(self.__port_chords[node],alpha)
+        else: self.highlight(chords=[(node,chord) for chord in chords],alpha=alpha)
 
     def highlight_chord(self,node,chord,alpha=None):
         """:meta private:
@@ -580,19 +595,101 @@ class ChordDiagram():
         if node < 0 or chord < 0:
             raise ValueError('The input node and chord must be positive or zero.')
 
-        if alpha is None: alpha = self.chord_alpha
-        if alpha <= self.off_alpha: alpha = 0.8
+        self.highlight(chords=[(node,chord)],alpha=alpha)
 
-        self.__update_highlights()
+    def highlight(self,nodes=None,chords=None,pairs=None,index=None,alpha=None):
+        """:meta private:
+        Highlights many nodes and chords at once, with a single update of the chord alphas. Nothing
+        changes if no chord is selected.
 
-        try:
-            n,c = self.__ports_refs[node][chord]
-            self.chord_patches[n][c].set_alpha(alpha)
-            if self.blend == True: self.chord_blends[n][c].set_alpha(alpha)
-            if (n,c) not in self.__highlighted_ports: self.__highlighted_ports.append((n,c))
-        except IndexError:
-            raise IndexError(f'Chord {chord} is out of range. '
-                    f'Node {node} has only {len(self.__ports_refs[node])} chords.')
+        Parameters
+            nodes : :class:`int` or :class:`list`, optional
+                Indices of the nodes to highlight with all their chords.
+            chords : :class:`list`, optional
+                Chords to highlight as ``(node, chord)`` pairs, indexed as in
+                :meth:`highlight_chord`.
+            pairs : :class:`list`, optional
+                Chords to highlight given by the two nodes they link, ``(a, b)``, as indices or
+                names.
+            index : :class:`array-like`, optional
+                Chords to highlight given by their index in :attr:`chord_table` (e.g.
+                ``cd.chord_table.index[cd.chord_table['rho'].abs() > 0.8]``).
+            alpha : :class:`float`, optional
+                Transparency level for highlighting.
+        """
+        if index is None: index = []
+        index = np.asarray(index, dtype=np.intp)
+        if np.any((index < 0) | (index >= len(self.chord_source))):
+            raise IndexError('Chord is out of range. '
+                f'This Chord Diagram has only {len(self.chord_source)} chords.')
+        selected = np.concatenate([self.__node_selection(nodes),
+                                   self.__chord_selection(chords),
+                                   self.__pair_selection(pairs),
+                                   index])
+        self.__highlight(selected,alpha)
+
+    def clear_highlights(self):
+        """:meta private:
+        Removes all the highlights, so every chord gets back the ``chord_alpha`` of the diagram.
+        """
+        self.__highlighted[:] = False
+        changed = np.flatnonzero(self.__chord_alphas != self.chord_alpha)
+        if len(changed): self.__set_chord_alphas(changed, self.chord_alpha)
+
+    @property
+    def chord_table(self):
+        """:meta private:
+        Table (:class:`pandas.DataFrame`) of the chords of the diagram, indexed by chord, with their
+        nodes (``source`` and ``target`` indices, ``source_name`` and ``target_name``), correlation
+        (``rho``), angular ``width``, port arcs (``alpha_i``, ``alpha_f`` at the source and
+        ``beta_i``, ``beta_f`` at the target) and position in ``chord_patches[source]``
+        (``patch``). It is built on first use, and again after :meth:`update`.
+        """
+        if self.__chord_table is None:
+            import pandas as pd # Only needed here, and slow to import
+            names = np.asarray(self.names, dtype=object)
+            ends  = self.layout.chord_ends
+            table = pd.DataFrame({'source'      : self.chord_source,
+                                  'target'      : self.chord_target,
+                                  'source_name' : names[self.chord_source],
+                                  'target_name' : names[self.chord_target],
+                                  'rho'         : self.chord_rho,
+                                  'width'       : ends[:, 1] - ends[:, 0],
+                                  'alpha_i'     : ends[:, 0],
+                                  'alpha_f'     : ends[:, 1],
+                                  'beta_i'      : ends[:, 2],
+                                  'beta_f'      : ends[:, 3],
+                                  'patch'       : np.arange(len(self.chord_source))
+                                                  - self.__node_chords[self.chord_source]})
+            table.index.name   = 'chord'
+            self.__chord_table = table
+        return self.__chord_table
+
+    def get_chord(self,a,b):
+        """:meta private:
+        Index (in :attr:`chord_table`) of the chord between two nodes, given by their indices or
+        names in any order.
+        """
+        a, b = self.__node_index(a), self.__node_index(b)
+        chord = self.__chord_lookup.get((min(a,b),max(a,b)))
+        if chord is None:
+            raise ValueError(f'There is no chord between the nodes {self.names[a]} and {self.names[b]}')
+        return chord
+
+    def top_chords(self,node,k=None):
+        """:meta private:
+        Chords of a node (index or name) sorted by their absolute correlation, as rows of
+        :attr:`chord_table`.
+
+        Parameters
+            node : :class:`int` or :class:`str`
+                Index or name of the node.
+            k : :class:`int`, optional
+                Number of chords to return (default: all).
+        """
+        chords = self.__port_chords[self.__node_index(node)]
+        chords = chords[np.argsort(-np.abs(self.chord_rho[chords]), kind='stable')]
+        return self.chord_table.loc[chords[:k]]
 
     def set_chord_alpha(self,alpha):
         """:meta private:
@@ -602,22 +699,322 @@ class ChordDiagram():
             alpha : :class:`float`
                 Transparency value applied to all chords.
         """
-        for n in self.nodes:
-            for cp in self.chord_patches[n]: cp.set_alpha(alpha)
-            if self.blend == True:
-                for cb in self.chord_blends[n]: cb.set_alpha(alpha)
+        self.__set_chord_alphas(np.arange(len(self.chord_source)), alpha)
+
+    def update(self,corr_matrix,keep_order=True):
+        """:meta private:
+        Updates the diagram with a new correlation matrix, changing only what differs from the
+        current one.
+
+        The nodes of the diagram stay the same (``filter`` is not applied again). Only the nodes
+        whose arcs moved and the chords whose ports or correlation changed are computed again, and
+        their artists are changed in place. Chords crossing the ``threshold`` are added (drawn over
+        the existing ones) or removed, and highlighted chords stay highlighted. A summary of the
+        changes is stored in ``update_stats``.
+
+        The arc of every node is proportional to its share of the total correlation, so changing a
+        single correlation usually moves all the nodes slightly. The update still skips the
+        validation, ordering and creation of the artists, and an unchanged matrix costs nothing.
+
+        Parameters
+            corr_matrix : :class:`numpy.ndarray`, :class:`pandas.DataFrame` or sparse matrix
+                New correlation matrix (or edge list), with the same variables (in the same order)
+                as the matrix used to create the diagram.
+            keep_order : :class:`bool`, optional
+                Keep the current order of the nodes, so the layout stays stable (default: True).
+                Otherwise the nodes are ordered again using ``optimize`` and ``refine``.
+        """
+        old_nodes  = self.layout.node_index
+        old_angles = self.node_angles
+        old_keys   = self.__chord_keys(self.chord_source,self.chord_target)
+        old = {'source'  : self.layout.node_index[self.chord_source],
+               'ends'    : self.layout.chord_ends,
+               'alphas'  : self.__chord_alphas,
+               'patches' : self.__flat_patches,
+               'blends'  : self.__flat_blends,
+               'layers'  : self.__texture.layers if self.__texture is not None else []}
+        highlighted = old_keys[self.__highlighted]
+
+        # Nodes
+        self.layout.set_matrix(corr_matrix)
+        if not keep_order:
+            if self.optimize: self.layout.optimize_nodes()
+            if self.refine: self.layout.refine_nodes()
+        moved = self.__update_nodes(old_nodes,old_angles)
+
+        # Chords: the same pair of nodes with the same ports and rho keeps its geometry
+        source, target, ends = self.layout.find_chords()
+        keys  = self.__chord_keys(source,target)
+        match = self.__match_keys(keys,old_keys) # Previous position of every chord (or -1)
+        same  = np.zeros(len(source), dtype=bool)
+        found = np.flatnonzero(match >= 0)
+        same[found] = (self.layout.node_index[source[found]] == old['source'][match[found]]) &\
+                      np.all(ends[found] == old['ends'][match[found]], axis=1)
+        changed = np.flatnonzero(~same)
+        geometry, finite = self.layout.chord_paths(source[changed], target[changed], ends[changed])
+        self.layout.invalid_chords = np.column_stack([source[changed[~finite]], target[changed[~finite]]])
+        self.__report_invalid_chords(self.layout.invalid_chords)
+        keep = same.copy()
+        keep[changed[finite]] = True
+        position = np.empty(len(source), dtype=np.intp)
+        position[same]    = self.chord_index[match[same]]
+        position[changed] = len(self.chord_geometry['offsets']) - 1 + np.arange(len(changed))
+        self.chord_geometry = chgeo.take_paths(chgeo.concat_paths(self.chord_geometry, geometry),
+                                               position[keep])
+        source, target, ends, keys, match, same = (a[keep] for a in (source,target,ends,keys,match,same))
+
+        self.chord_source   = source
+        self.chord_target   = target
+        self.chord_rho      = ends[:, 4]
+        self.chord_index    = np.arange(len(source))
+        self.layout.chord_ends = ends
+        self.__chord_alphas = np.full(len(source), float(self.off_alpha if len(highlighted) else self.chord_alpha))
+        self.__chord_alphas[match >= 0] = old['alphas'][match[match >= 0]]
+        self.__index_chords()
+        self.__generate_port_refs()
+        self.__highlighted = np.isin(keys, highlighted)
+        removed = np.setdiff1d(np.arange(len(old_keys)), match)
+        aspect  = self.ax.get_aspect() # New blend images reset it
+        self.__update_chords(match,same,removed,old)
+        self.ax.set_aspect(aspect)
+
+        self.update_stats = {'moved_nodes'     : int(np.count_nonzero(moved)),
+                             'kept_chords'     : int(np.count_nonzero(same)),
+                             'changed_chords'  : int(np.count_nonzero(~same & (match >= 0))),
+                             'added_chords'    : int(np.count_nonzero(match < 0)),
+                             'removed_chords'  : len(removed)}
+
+    def __update_nodes(self,old_nodes,old_angles):
+        """Move the node arcs and labels to the layout of the current matrix, and which ones moved"""
+        previous = np.empty(self.layout.input_size, dtype=np.intp)
+        previous[old_nodes] = np.arange(len(old_nodes))
+        previous = previous[self.layout.node_index] # Previous position of every node
+        self.colors = [self.__input_colors[i] for i in self.layout.node_index.tolist()]
+        self.layout.layout_nodes()
+        self.__label_params()
+        moved = (old_angles['theta_i'][previous] != self.node_angles['theta_i']) |\
+                (old_angles['theta_f'][previous] != self.node_angles['theta_f'])
+        self.node_labels = [self.node_labels[i] for i in previous]
+        if self.collection:
+            self.node_collection.set_paths(self.__node_arcs())
+            self.node_collection.set_edgecolor(self.colors)
+        else:
+            self.node_patches = [self.node_patches[i] for i in previous]
+        for n in np.flatnonzero(moved).tolist():
+            if not self.collection:
+                arc = self.node_patches[n]
+                arc.theta1 = np.rad2deg(self.node_angles['theta_i'][n])
+                arc.theta2 = np.rad2deg(self.node_angles['theta_f'][n])
+                arc.stale  = True
+            params = self.node_labels_params[n]
+            self.node_labels[n].set_angle(np.rad2deg(params['theta']))
+            self.node_labels[n].set_rotation(params['rot'])
+        return moved
+
+    def __update_chords(self,match,same,removed,old):
+        """
+        Update the artists of the chords: unchanged chords (``same``) keep them, changed chords
+        (``match`` >= 0) change them in place, new chords get new ones, and the artists of the
+        ``removed`` chords are removed.
+        """
+        if self.collection:
+            self.__generate_chord_collections()
+        else:
+            patches = []
+            for k,j in enumerate(match.tolist()):
+                if j < 0:
+                    patches.append(self.__chord_patch(k))
+                    self.ax.add_patch(patches[-1])
+                    continue
+                patch = old['patches'][j]
+                if not same[k]:
+                    chord_color, chord_edge = self.__chord_colors(self.chord_source[k])
+                    patch.set_path(self.__chord_path(k))
+                    patch.set_facecolor(chord_color)
+                    patch.set_edgecolor(chord_edge)
+                    patch.set_hatch(self.__chord_hatch(self.chord_rho[k]))
+                patches.append(patch)
+            self.__flat_patches = patches
+            self.chord_patches  = self.__by_node(patches)
+            for j in removed.tolist(): old['patches'][j].remove()
+
+        if self.blend and self.blend != 'mesh':
+            redo = np.flatnonzero(~same)
+            if self.blend == 'texture' and len(old['layers']) != len(old['alphas']):
+                redo = np.arange(len(same)) # Released texture: the layers are gone
+            flat_bezier_curves = [c for clist in self.bezier_curves for c in clist]
+            clips  = [self.__chord_path(k) if self.collection else self.__flat_patches[k]
+                      for k in redo.tolist()]
+            curves = [flat_bezier_curves[k] for k in redo.tolist()]
+            blends = self.__compute_blends(clips,curves)
+            if self.blend == 'texture':
+                self.__texture.layers = []
+                for curve,blend_arrays in zip(curves,blends):
+                    self.__add_chord_blend(None,curve,blend_arrays)
+                fresh  = dict(zip(redo.tolist(),self.__texture.layers))
+                layers = [fresh[k] if k in fresh else old['layers'][j] for k,j in enumerate(match.tolist())]
+                self.blend_texture.set_layers(layers,self.__chord_alphas)
+            else:
+                images = [old['blends'][j] if j >= 0 else None for j in match.tolist()]
+                for k,clip,curve,blend_arrays in zip(redo.tolist(),clips,curves,blends):
+                    if images[k] is None:
+                        images[k] = self.__add_chord_blend(clip,curve,blend_arrays)
+                    else:
+                        chu._set_colormapped_patch(images[k],clip,blend_arrays[0],
+                                                   chu.blend_colormap(curve['c1'],curve['c2']))
+                self.__set_blend_images(images)
+                for j in removed.tolist(): old['blends'][j].remove()
+        if self.blend == 'mesh':
+            self.blend_mesh.set_mesh(*self.__mesh_data(),self.__chord_alphas)
+        self.__set_chord_alphas(np.arange(len(self.chord_source)),self.__chord_alphas.copy())
+        if self.blend == 'texture' and self.release_blends: self.blend_texture.release()
+
+    def restyle(self,**style_kwargs):
+        """:meta private:
+        Changes the style of the diagram, reusing its layout: only the properties of the artists
+        change. New colors recolor the chord blends without computing them again (a released
+        texture is composed again from the blend cache, or computed again without one).
+
+        Parameters
+            ``**style_kwargs``
+                New values of the style parameters of :func:`cachai.chplot.chord`: ``colors / c``
+                (in the order of the original matrix), ``chord_alpha / calpha``, ``off_alpha``,
+                ``positive_hatch``, ``negative_hatch``, ``chord_linewidth / clw``,
+                ``node_linewidth / nlw``, ``node_labelpad / npad``, ``fontsize``, ``font``,
+                ``legend``, ``positive_label`` and ``negative_label``. Other parameters change the
+                layout, and need a new diagram.
+        """
+        for key,alias in STYLE_ALIASES.items():
+            if alias in style_kwargs: style_kwargs[key] = style_kwargs.pop(alias)
+        chu.validate_kwargs(style_kwargs.keys(),STYLE_PARAMS,STYLE_ALIASES)
+        style = dict(style_kwargs)
+        released = self.blend == 'texture' and len(self.__texture.layers) != len(self.chord_source)
+        if released and {'colors','chord_alpha','off_alpha'} & style.keys():
+            self.__restore_texture()
+
+        if 'colors' in style:
+            colors = [mtpl_colors.to_rgb(c) if isinstance(c,str) else c for c in style.pop('colors')]
+            if len(colors) != self.layout.input_size:
+                raise ValueError(f'The diagram needs {self.layout.input_size} colors, one per variable '
+                                 'of the original matrix')
+            self.__input_colors = colors
+            self.colors = [colors[i] for i in self.layout.node_index.tolist()]
+            self.__recolor()
+
+        if 'chord_alpha' in style or 'off_alpha' in style:
+            alphas = self.__chord_alphas.copy()
+            for key in ('chord_alpha','off_alpha'):
+                if key in style:
+                    alphas[self.__chord_alphas == getattr(self,key)] = style[key]
+            self.__dict__.update((key,style.pop(key)) for key in ('chord_alpha','off_alpha') if key in style)
+            self.__set_chord_alphas(np.arange(len(self.chord_source)),alphas)
+
+        legend = {key:style.pop(key) for key in ('legend','positive_label','negative_label')
+                  if key in style}
+        hatches = {key:style.pop(key) for key in ('positive_hatch','negative_hatch') if key in style}
+        if hatches:
+            self.__dict__.update(hatches)
+            if self.collection:
+                for collection,members in zip(self.chord_collections,self.__collection_members):
+                    collection.set_hatch(self.__chord_hatch(self.chord_rho[members[0]]))
+            else:
+                for patch,rho in zip(self.__flat_patches,self.chord_rho.tolist()):
+                    patch.set_hatch(self.__chord_hatch(rho))
+        if legend or hatches:
+            if legend.get('legend') is False: # Without the default labels
+                legend = {'positive_label':None,'negative_label':None,**legend}
+            self.__dict__.update(legend)
+            for dummy in self.__legend_dummies: dummy.remove()
+            self.__legend_dummies = []
+            self.__generate_legend()
+
+        if 'chord_linewidth' in style:
+            self.chord_linewidth = style.pop('chord_linewidth')
+            for patch in self.__flat_patches: patch.set_linewidth(self.chord_linewidth)
+            for collection in self.chord_collections: collection.set_linewidth(self.chord_linewidth)
+        if 'node_linewidth' in style:
+            self.node_linewidth = style.pop('node_linewidth')
+            for patch in self.node_patches: patch.set_linewidth(2*self.node_linewidth)
+            if self.collection: self.node_collection.set_linewidth(2*self.node_linewidth)
+        if 'node_labelpad' in style:
+            self.node_labelpad = style.pop('node_labelpad')
+            for label in self.node_labels: label.set_pad(self.node_labelpad)
+        if 'font' in style or 'fontsize' in style:
+            self.__dict__.update(style)
+            if 'font' in style and self.font is None: self.font = {'size':self.fontsize}
+            elif 'fontsize' in style and isinstance(self.font,dict): self.font = {**self.font,'size':self.fontsize}
+            for label in self.node_labels:
+                label.set_font(self.font)
+                if 'fontsize' in style: label.set_fontsize(self.fontsize)
+        if self.blend == 'texture' and self.release_blends: self.blend_texture.release()
+
+    def __recolor(self):
+        """Apply the colors of the nodes to the node arcs, the chords and their blends"""
+        for patch,color in zip(self.node_patches,self.colors): patch.set_color(color)
+        if self.collection:
+            self.node_collection.set_edgecolor(self.colors)
+            self.__generate_chord_collections()
+        else:
+            for patch,n in zip(self.__flat_patches,self.chord_source.tolist()):
+                chord_color, chord_edge = self.__chord_colors(n)
+                patch.set_facecolor(chord_color)
+                patch.set_edgecolor(chord_edge)
+        self.__index_chords() # Colors of the mid curves
+        flat_bezier_curves = [c for clist in self.bezier_curves for c in clist]
+        if self.blend == 'texture':
+            layers = [(index,codes,chu.blend_lut(curve['c1'],curve['c2']))
+                      for (index,codes,_),curve in zip(self.__texture.layers,flat_bezier_curves)]
+            self.blend_texture.set_layers(layers,self.__chord_alphas)
+        elif self.blend == 'mesh':
+            self.blend_mesh.set_colors(self.__mesh_colors())
+        elif self.blend:
+            for image,curve in zip(self.__flat_blends,flat_bezier_curves):
+                colormap, _, _ = chu._map_colormap(image.get_array(),
+                                                   chu.blend_colormap(curve['c1'],curve['c2']))
+                image.set_cmap(colormap)
+
+    def __restore_texture(self):
+        """Layers of a released texture, back from the blend cache (or computed again)"""
+        flat_bezier_curves = [c for clist in self.bezier_curves for c in clist]
+        clips  = [self.__chord_path(k) for k in range(len(self.chord_source))]
+        blends = self.__compute_blends(clips,flat_bezier_curves)
+        self.__texture.layers = []
+        for curve,blend_arrays in zip(flat_bezier_curves,blends):
+            self.__add_chord_blend(None,curve,blend_arrays)
+        self.blend_texture.set_layers(self.__texture.layers,self.__chord_alphas)
+
+    def __chord_keys(self,source,target):
+        """Key of every chord: its pair of nodes in the input matrix, whatever the order of the nodes"""
+        a, b = self.layout.node_index[source], self.layout.node_index[target]
+        return np.minimum(a,b)*self.layout.input_size + np.maximum(a,b)
+
+    @staticmethod
+    def __match_keys(keys,old_keys):
+        """Position of every key in ``old_keys``, or -1 if missing"""
+        if len(old_keys) == 0: return np.full(len(keys), -1, dtype=np.intp)
+        sort     = np.argsort(old_keys)
+        position = np.minimum(np.searchsorted(old_keys[sort], keys), len(old_keys) - 1)
+        return np.where(old_keys[sort][position] == keys, sort[position], -1)
 
     # Special methods 
     def __str__(self):
         string = ''
-        for n in self.nodes:
+        for n,node in self.nodes.items():
             string += f'node {n} "{self.names[n]}"\n' + '-'*50
-            for key in self.nodes[n]:
+            for key in node:
                 if key == 'ports':
                     string += f'\n{key:<10} :'
-                    for p in self.nodes[n][key]:
-                        string += f'\n\t\t{p:<10} : {self.nodes[n][key][p]}'
+                    for p in node[key]:
+                        string += f'\n\t\t{p:<10} : {node[key][p]}'
                 else:
-                    string += f'\n{key:<10} : {self.nodes[n][key]}'
+                    string += f'\n{key:<10} : {node[key]}'
             string += '\n\n\n'
-        return string
\ No newline at end of file
+        return string
+
+
+def _layout_attribute(name):
+    """Attribute of a diagram kept in its layout"""
+    return property(lambda self: getattr(self.layout, name),
+                    lambda self, value: setattr(self.layout, name, value))
+
+for _name in LAYOUT_ATTRIBUTES: setattr(ChordDiagram, _name, _layout_attribute(_name))
@@ -0,0 +1,467 @@
+# Basic imports
+import numpy as np
+import scipy.sparse as sp
+
+# Path codes (same values as matplotlib.path.Path), so the layout needs no matplotlib
+MOVETO    = 1
+LINETO    = 2
+CURVE3    = 3
+CODE_TYPE = np.uint8
+
+def node_layout(corr_matrix, node_gap):
+    """
+    Angles of the node arcs. Each node spans an angle proportional to its relevance (sum of the
+    absolute correlations with the other nodes), and starts after a gap set by ``node_gap``.
+    """
+    n_nodes = corr_matrix.shape[0]
+    # Minus 1 from each diagonal of A to A
+    # Angles in float64 whatever the dtype of the matrix (they are accumulated over the nodes)
+    if sp.issparse(corr_matrix):
+        relevance  = np.asarray(abs(corr_matrix).sum(axis=1), dtype=float).ravel() - 1
+    else:
+        relevance  = np.sum(np.abs(corr_matrix), axis=1, dtype=float) - 1
+    relevance_norm = relevance / np.sum(relevance)
+    start_angles   = np.concatenate([[0], np.cumsum(2*np.pi*relevance_norm[:-1])])
+    gap_angle      = (2*np.pi/n_nodes)*node_gap
+
+    theta_f = start_angles + 2*np.pi*relevance_norm
+    # -- Gap correction -----
+    theta_i = start_angles + np.minimum(gap_angle, theta_f)
+    # -----------------------
+    return {'theta_i'   : theta_i,
+            'theta_f'   : theta_f,
+            'theta_m'   : (theta_i + theta_f)/2,
+            'theta_arc' : _angdist(theta_i, theta_f)}
+
+def chord_selection(corr_matrix, threshold, max_chords=None, top_k=None):
+    """
+    Pairs of distinct nodes that get a chord: those with ``|rho| >= threshold`` and, within the
+    chord budget, the strongest ones. With ``top_k``, a pair is kept if it is among the ``top_k``
+    strongest pairs of either of its nodes, so every node with chords keeps some. With
+    ``max_chords``, only the strongest ``max_chords`` of the remaining pairs are kept. Both use
+    :func:`numpy.argpartition` instead of sorting (rows of a dense matrix in O(n²)).
+
+    Returns a symmetric boolean mask (sparse for a sparse ``corr_matrix``) and a dictionary with the
+    number of ``candidates`` (pairs over the threshold), kept ``chords`` and ``dropped`` pairs, and
+    the largest (``dropped_max_rho``) and total (``dropped_weight``) ``|rho|`` of the dropped pairs.
+    """
+    check_budget(max_chords=max_chords, top_k=top_k)
+    n_nodes = corr_matrix.shape[0]
+    # Candidate pairs (a < b)
+    if sp.issparse(corr_matrix):
+        coo  = sp.coo_array(corr_matrix)
+        keep = (coo.row < coo.col) & (np.abs(coo.data) >= threshold)
+        a, b = coo.row[keep].astype(np.intp), coo.col[keep].astype(np.intp)
+        strength = np.abs(coo.data[keep])
+    else:
+        strength = np.abs(corr_matrix)
+        a, b     = np.nonzero(np.triu(strength >= threshold, k=1))
+        strength = strength[a, b]
+    kept = np.ones(len(a), dtype=bool)
+
+    if top_k is not None and len(a) > 0:
+        k = min(int(top_k), n_nodes - 1)
+        if sp.issparse(corr_matrix):
+            # Rank of every pair among the pairs of each of its nodes
+            node  = np.concatenate([a, b])
+            pair  = np.tile(np.arange(len(a)), 2)
+            order = np.lexsort((-np.tile(strength, 2), node))
+            rank  = np.arange(len(order)) - np.searchsorted(node[order], node[order])
+            kept  = np.zeros(len(a), dtype=bool)
+            kept[pair[order][rank < k]] = True
+        else:
+            masked = np.full((n_nodes, n_nodes), -np.inf, dtype=strength.dtype)
+            masked[a, b] = masked[b, a] = strength
+            top  = np.zeros((n_nodes, n_nodes), dtype=bool)
+            if k > 0:
+                top[np.arange(n_nodes)[:, None], np.argpartition(-masked, k - 1, axis=1)[:, :k]] = True
+            kept = top[a, b] | top[b, a]
+
+    if max_chords is not None and np.count_nonzero(kept) > max_chords:
+        remaining = np.flatnonzero(kept)
+        dropped   = np.argpartition(-strength[remaining], int(max_chords))[int(max_chords):]
+        kept[remaining[dropped]] = False
+
+    stats = {'candidates'      : len(a),
+             'chords'          : int(np.count_nonzero(kept)),
+             'dropped'         : int(np.count_nonzero(~kept)),
+             'dropped_max_rho' : float(np.max(strength[~kept], initial=0)),
+             'dropped_weight'  : float(np.sum(strength[~kept]))}
+    return pair_mask(a[kept], b[kept], n_nodes, sp.issparse(corr_matrix)), stats
+
+def check_budget(**budgets):
+    """Check that the chord budgets (``max_chords``, ``top_k``) are positive integers or None."""
+    for name, value in budgets.items():
+        if value is None: continue
+        if isinstance(value, bool) or not isinstance(value, (int, np.integer)) or value <= 0:
+            raise ValueError(f'{name} must be a positive integer or None, not {value!r}')
+
+def pair_mask(a, b, n_nodes, sparse=False):
+    """Symmetric boolean mask (sparse if ``sparse``) of the pairs of nodes ``(a, b)``."""
+    if sparse:
+        return sp.csr_array((np.ones(2*len(a), dtype=bool), (np.r_[a, b], np.r_[b, a])),
+                            shape=(n_nodes, n_nodes))
+    allowed = np.zeros((n_nodes, n_nodes), dtype=bool)
+    allowed[a, b] = allowed[b, a] = True
+    return allowed
+
+def mask_pairs(allowed):
+    """Pairs of nodes ``(a, b)`` with ``a < b`` of a :func:`pair_mask`."""
+    if sp.issparse(allowed):
+        coo  = sp.coo_array(allowed)
+        keep = coo.row < coo.col
+        return coo.row[keep].astype(np.intp), coo.col[keep].astype(np.intp)
+    return np.nonzero(np.triu(allowed, k=1))
+
+def extended_rhos(corr_matrix):
+    """
+    Correlations of every node with its ports, as an ``(n, n+1)`` array (of the dtype of
+    ``corr_matrix``).
+
+    Row ``node`` holds the ports in anti-clockwise order: ``0 ... node-1``, the two self-referencing
+    ports ``node`` and ``node*`` (columns ``node`` and ``node+1``), then ``node+1 ... n-1``.
+    """
+    n_nodes = len(corr_matrix)
+    rows    = np.arange(n_nodes)[:, None]
+    cols    = np.arange(n_nodes + 1)[None, :]
+    source  = np.clip(np.where(cols <= rows, cols, cols - 1), 0, n_nodes - 1)
+    rhos    = np.take_along_axis(corr_matrix, np.broadcast_to(source, (n_nodes, n_nodes + 1)), axis=1)
+    rhos[np.arange(n_nodes), np.arange(n_nodes)] = 1
+    return rhos
+
+def port_column(node, target):
+    """Column of ``target`` in the extended port arrays of ``node`` (see :func:`extended_rhos`)."""
+    return np.where(target < node, target, target + 1)
+
+def port_layout(corr_matrix, node_angles, threshold, show_diag, allowed=None):
+    """
+    Angles of the ports of every node, computed in one pass with cumulative sums over the
+    thresholded, normalized correlations.
+
+    Returns a dictionary of ``(n, n+1)`` arrays (see :func:`extended_rhos` for the column order):
+    ``rhos`` (correlations), ``ports_i`` / ``ports_f`` (initial and final angles of each port) and
+    ``ports_state`` (1 = allowed, -1 = forbidden). Forbidden ports have both angles set to 0. The
+    allowed pairs of distinct nodes are those over the ``threshold``, or those in the ``allowed``
+    mask (see :func:`chord_selection`).
+
+    A sparse ``corr_matrix`` gives sparse ``(n, n+1)`` arrays (see :func:`sparse_port_layout`).
+    """
+    if sp.issparse(corr_matrix):
+        return sparse_port_layout(corr_matrix, node_angles, threshold, show_diag, allowed)
+    n_nodes = len(corr_matrix)
+    rhos    = extended_rhos(corr_matrix)
+    # Control of the allowed ports using the correlation factor
+    # 1 = Allowed
+    # -1 = Forbidden
+    if allowed is None:
+        states = np.where(np.abs(rhos) < threshold, -1, 1).astype(np.int8)
+    else:
+        states = np.where(extended_rhos(allowed), 1, -1).astype(np.int8)
+        states[np.arange(n_nodes), np.arange(n_nodes) + 1] = 1 # Self-referencing ports, below
+    if not show_diag:
+        diag = np.arange(n_nodes)
+        states[diag, diag]     = -1
+        states[diag, diag + 1] = -1
+    real_rhos = np.where(states > 0, np.abs(rhos), 0)
+    total     = np.sum(real_rhos, axis=1, keepdims=True)
+    sizes     = np.divide(real_rhos, total, out=np.zeros_like(real_rhos), where=total > 0)
+    offsets   = np.concatenate([np.zeros((n_nodes, 1), dtype=sizes.dtype),
+                                np.cumsum(sizes, axis=1)[:, :-1]], axis=1)
+
+    # The (n, n+1) arrays keep the dtype of the matrix
+    theta_i = node_angles['theta_i'][:, None].astype(rhos.dtype)
+    arc     = node_angles['theta_arc'][:, None].astype(rhos.dtype)
+    ports_i = np.where(states > 0, theta_i + arc*offsets, 0)
+    ports_f = np.where(states > 0, ports_i + arc*sizes, 0)
+    return {'rhos'        : rhos,
+            'ports_i'     : ports_i,
+            'ports_f'     : ports_f,
+            'ports_state' : states}
+
+def sparse_port_layout(corr_matrix, node_angles, threshold, show_diag, allowed=None):
+    """
+    Same as :func:`port_layout` for a sparse ``corr_matrix``, in memory proportional to its stored
+    entries. Missing entries are zero correlations, which never get a port. The arrays are
+    :class:`scipy.sparse.csr_array`: ``rhos`` holds the stored correlations, and ``ports_i``,
+    ``ports_f`` and ``ports_state`` only the allowed ports (forbidden ports are 0).
+    """
+    n_nodes = corr_matrix.shape[0]
+    shape   = (n_nodes, n_nodes + 1)
+    coo     = sp.coo_array(corr_matrix)
+    offdiag = coo.row != coo.col
+    row, col, rho = coo.row[offdiag].astype(np.intp), coo.col[offdiag].astype(np.intp), coo.data[offdiag]
+    col  = port_column(row, col)
+    diag = np.arange(n_nodes)
+    rhos = sp.csr_array((np.concatenate([rho, np.ones(2*n_nodes)]),
+                         (np.concatenate([row, diag, diag]), np.concatenate([col, diag, diag + 1]))),
+                        shape=shape)
+    # Allowed ports, sorted by node and column
+    if allowed is None:
+        allowed = np.abs(rho) >= threshold
+    else:
+        allowed = np.asarray(allowed[row, np.where(col > row, col - 1, col)], dtype=bool)
+    row, col, rho = row[allowed], col[allowed], rho[allowed]
+    if show_diag:
+        row = np.concatenate([row, diag, diag])
+        col = np.concatenate([col, diag, diag + 1])
+        rho = np.concatenate([rho, np.ones(2*n_nodes)])
+    order = np.lexsort((col, row))
+    row, col, size = row[order], col[order], np.abs(rho[order])
+    total = np.bincount(row, weights=size, minlength=n_nodes)[row]
+    size  = np.divide(size, total, out=np.zeros_like(size), where=total > 0)
+    # Offset of every port: sizes of the previous ports of its node
+    cumsum  = np.cumsum(size)
+    first   = np.searchsorted(row, row)
+    offsets = cumsum - size - (cumsum[first] - size[first])
+
+    ports_i = node_angles['theta_i'][row] + node_angles['theta_arc'][row]*offsets
+    ports_f = ports_i + node_angles['theta_arc'][row]*size
+    return {'rhos'        : rhos,
+            'ports_i'     : sp.csr_array((ports_i, (row, col)), shape=shape),
+            'ports_f'     : sp.csr_array((ports_f, (row, col)), shape=shape),
+            'ports_state' : sp.csr_array((np.ones(len(row), dtype=np.int8), (row, col)), shape=shape)}
+
+def chord_pairs(ports_state, show_diag):
+    """
+    Source and target nodes of every chord, in generation order: by source node, with the
+    self-referencing chord first (when ``show_diag=True``) followed by the targets in ascending order.
+    Only the source's port states are used, so each pair ``source < target`` appears once.
+    """
+    n_nodes = ports_state.shape[0]
+    if sp.issparse(ports_state):
+        coo    = sp.coo_array(ports_state)
+        upper  = (coo.data > 0) & (coo.col > coo.row + 1)
+        source = coo.row[upper].astype(np.intp)
+        target = coo.col[upper].astype(np.intp) - 1
+        sort   = np.lexsort((target, source))
+        source, target = source[sort], target[sort]
+    else:
+        source, target = np.nonzero(np.triu(ports_state[:, 1:] > 0, k=1))
+    if show_diag:
+        source = np.concatenate([np.arange(n_nodes), source])
+        target = np.concatenate([np.arange(n_nodes), target])
+        sort   = np.lexsort((target, source))
+        source, target = source[sort], target[sort]
+    return source, target
+
+def chord_ends(ports, source, target):
+    """
+    Port arcs and correlation of the chords from ``source`` to ``target`` (see :func:`chord_pairs`),
+    as ``(alpha_i, alpha_f, beta_i, beta_f, rho)``. The self-referencing chords go from port ``n``
+    to port ``n*``, with ``rho = 1``.
+    """
+    diag    = source == target
+    col_src = np.where(diag, source, target + 1)
+    col_tgt = np.where(diag, source + 1, source)
+    row_tgt = np.where(diag, source, target)
+    return (ports['ports_i'][source, col_src], ports['ports_f'][source, col_src],
+            ports['ports_i'][row_tgt, col_tgt], ports['ports_f'][row_tgt, col_tgt],
+            np.where(diag, 1, ports['rhos'][source, col_src]))
+
+def radius_rule(dist, min_dist, max_rho_radius):
+    """Rule to set the radius of the chords from the angular distance between their ends"""
+    dist = np.asarray(dist)
+    return np.where(dist <= min_dist, max_rho_radius,
+                    max_rho_radius * (1 - (dist - min_dist) / (np.pi - min_dist)))
+
+def scale_rho(rho, scale, max_rho):
+    """Scale rho (link thickness)"""
+    if scale == 'linear':
+        rho_lin = np.abs(rho) * max_rho
+        return np.clip(rho_lin, 0, 1) # Clip to avoid numerical issues
+    elif scale == 'log':
+        rho_log = (1 - np.log10(10 - 9*np.abs(rho))) * max_rho
+        return np.clip(rho_log, 0, 1) # Clip to avoid numerical issues
+    else:
+        raise ValueError(f'Unknown scale type {scale}')
+
+def _packed_angspace(start, stop, n=200):
+    """
+    Batched version of :func:`cachai.utilities._angspace`: the angles of every arc concatenated in
+    one array, with the number of angles of each arc. Arcs too short get their two ends.
+    """
+    ndots  = np.maximum((np.abs(stop - start)*n/(2*np.pi)).astype(np.int64), 2)
+    arc    = np.repeat(np.arange(len(start)), ndots)
+    first  = np.cumsum(ndots) - ndots
+    k      = np.arange(np.sum(ndots)) - np.repeat(first, ndots)
+    step   = (stop - start) / (ndots - 1)
+    angles = k*step[arc] + start[arc]
+    angles[first + ndots - 1] = stop # Same as numpy.linspace, the end is exact
+    return angles, ndots
+
+def chord_paths(alpha_i, alpha_f, beta_i, beta_f, rho, radius=1, position=(0,0),
+                min_dist=np.deg2rad(15), max_rho_radius=0.7, dtype=float):
+    """
+    Compute the Bézier paths of many chords at once.
+
+    Each chord goes from the arc ``alpha_i → alpha_f`` of its source port to the arc
+    ``beta_i → beta_f`` of its target port, with a thickness ``rho`` (already scaled). The paths are
+    returned packed: the vertices and codes of chord ``k`` are ``vertices[offsets[k]:offsets[k+1]]``
+    and ``codes[offsets[k]:offsets[k+1]]``. ``mid`` holds the control points ``(P0, P1, P2)`` of the
+    Bézier curve in the middle of each chord, with shape ``(n_chords, 3, 2)``. The points are
+    computed in float64 and stored as ``dtype``.
+    """
+    alpha_i, alpha_f, beta_i, beta_f, rho = (np.asarray(a, dtype=float).ravel()
+                                             for a in (alpha_i, alpha_f, beta_i, beta_f, rho))
+    position = np.asarray(position, dtype=float)
+    n_chords = len(rho)
+
+    # Polar
+    alphas, n_alpha = _packed_angspace(alpha_i, alpha_f)
+    betas,  n_beta  = _packed_angspace(beta_i, beta_f)
+    alpha_m = (alpha_f + alpha_i)/2
+    beta_m  = (beta_f + beta_i)/2
+
+    dist        = _angdist(alpha_m, beta_m)
+    r_rho       = radius_rule(dist, min_dist, max_rho_radius) * radius
+    dist_if     = _angdist(alpha_i, beta_f)
+    dist_fi     = _angdist(alpha_f, beta_i)
+    dist_inex   = np.minimum(dist_if, dist_fi)
+    # Convex case (alpha_i closer to beta_f) and concave case
+    convex      = dist_if < dist_fi
+    theta_rho   = np.where(convex, beta_f, alpha_f) + dist_inex/2
+    r_AB        = np.where(convex, r_rho, r_rho + rho*radius)
+    r_BA        = np.where(convex, r_rho + rho*radius, r_rho)
+
+    # Cartesian
+    def polar(r, theta): return np.column_stack([r*np.cos(theta), r*np.sin(theta)])
+    points_A = polar(radius, alphas)
+    points_B = polar(radius, betas)
+    A_first  = polar(radius, alpha_i)
+    A_last   = polar(radius, alpha_f)
+    B_first  = polar(radius, beta_i)
+    B_last   = polar(radius, beta_f)
+
+    # A to B and B to A
+    control_AB = 2*polar(r_AB, theta_rho) - (A_last + B_first)/2
+    control_BA = 2*polar(r_BA, theta_rho) - (A_first + B_last)/2
+    # Bezier curve in the middle
+    control_mid = 2*polar((r_AB + r_BA)/2, theta_rho) - (A_last + B_first)/2
+    mid = (np.stack([A_last, control_mid, B_first], axis=1) + position).astype(dtype)
+
+    # Packing: A points, control AB, B points, control BA, first A point
+    counts  = n_alpha + n_beta + 3
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    start   = offsets[:-1]
+    chord_A = np.repeat(np.arange(n_chords), n_alpha)
+    chord_B = np.repeat(np.arange(n_chords), n_beta)
+    index_A = np.arange(len(alphas)) - np.repeat(np.cumsum(n_alpha) - n_alpha, n_alpha)
+    index_B = np.arange(len(betas))  - np.repeat(np.cumsum(n_beta) - n_beta, n_beta)
+
+    vertices = np.empty((offsets[-1], 2), dtype=dtype)
+    vertices[start[chord_A] + index_A]           = points_A
+    vertices[start + n_alpha]                    = control_AB
+    vertices[start[chord_B] + n_alpha[chord_B] + 1 + index_B] = points_B
+    vertices[start + n_alpha + n_beta + 1]       = control_BA
+    vertices[start + n_alpha + n_beta + 2]       = A_first
+    vertices += position
+
+    # Codes
+    codes = np.full(offsets[-1], LINETO, dtype=CODE_TYPE)
+    codes[start] = MOVETO
+    for curve in (n_alpha, n_alpha + 1, n_alpha + n_beta + 1, n_alpha + n_beta + 2):
+        codes[start + curve] = CURVE3
+
+    return {'vertices' : vertices,
+            'codes'    : codes,
+            'offsets'  : offsets,
+            'mid'      : mid}
+
+def take_paths(geometry, index):
+    """Packed paths (see :func:`chord_paths`) of the chords at the positions ``index`` of ``geometry``."""
+    index   = np.asarray(index, dtype=np.intp)
+    offsets = geometry['offsets']
+    counts  = offsets[index + 1] - offsets[index]
+    packed  = np.concatenate([[0], np.cumsum(counts)]).astype(offsets.dtype)
+    points  = np.arange(packed[-1]) + np.repeat(offsets[index] - packed[:-1], counts)
+    return {'vertices' : geometry['vertices'][points],
+            'codes'    : geometry['codes'][points],
+            'offsets'  : packed,
+            'mid'      : geometry['mid'][index]}
+
+def concat_paths(*geometries):
+    """Packed paths of several :func:`chord_paths` results, one after the other."""
+    starts = np.cumsum([0] + [g['offsets'][-1] for g in geometries[:-1]])
+    return {'vertices' : np.concatenate([g['vertices'] for g in geometries]),
+            'codes'    : np.concatenate([g['codes'] for g in geometries]),
+            'offsets'  : np.concatenate([[0]] + [g['offsets'][1:] + start
+                                                 for g, start in zip(geometries, starts)]),
+            'mid'      : np.concatenate([g['mid'] for g in geometries])}
+
+def _path_counts(geometry):
+    """Number of points of the A and B arcs of every chord in a :func:`chord_paths` result."""
+    curves  = np.flatnonzero(geometry['codes'] == CURVE3).reshape(-1, 4)
+    n_alpha = curves[:, 0] - geometry['offsets'][:-1]
+    n_beta  = curves[:, 2] - curves[:, 0] - 1
+    return n_alpha, n_beta
+
+def chord_mesh(geometry, chords=None, n=30):
+    """
+    Triangle mesh of the chords of a :func:`chord_paths` result (all of them, or the positions
+    given in ``chords``), for Gouraud shading.
+
+    Each chord is a strip between its two Bézier sides, sampled at ``n`` points, closed at both
+    ends by a fan of triangles over the arcs of its ports. Returns a dictionary with the ``points``
+    ``(m, 2)``, the ``triangles`` ``(k, 3)``, the ``chord`` of every point and of every triangle
+    (``point_chord`` and ``triangle_chord``, positions in ``chords``) and ``t``, the position of
+    every point along the chord: 0 at the source and 1 at the target, proportional to the length of
+    the mid Bézier curve.
+    """
+    n_alpha, n_beta = _path_counts(geometry)
+    chords   = np.arange(len(n_alpha)) if chords is None else np.asarray(chords, dtype=np.intp)
+    n_alpha, n_beta = n_alpha[chords], n_beta[chords]
+    start    = geometry['offsets'][:-1][chords]
+    vertices = geometry['vertices']
+    n_chords = len(chords)
+
+    # Bézier sides: A→B (A_last, control AB, B_first) and A→B again by the other side
+    # (A_first, control BA, B_last), both sampled at the same t
+    t  = np.linspace(0, 1, n)[None, :, None]
+    def bezier(P0, P1, P2):
+        return ((1-t)**2*P0[:, None] + 2*(1-t)*t*P1[:, None] + t**2*P2[:, None])
+    side_AB = bezier(vertices[start + n_alpha - 1], vertices[start + n_alpha],
+                     vertices[start + n_alpha + 1])
+    side_BA = bezier(vertices[start + n_alpha + n_beta + 2], vertices[start + n_alpha + n_beta + 1],
+                     vertices[start + n_alpha + n_beta])
+    # Position along the chord, from the length of the mid curve
+    steps = np.linalg.norm(np.diff((side_AB + side_BA)/2, axis=1), axis=2)
+    length = np.concatenate([np.zeros((n_chords, 1)), np.cumsum(steps, axis=1)], axis=1)
+    total  = length[:, -1:]
+    t_side = np.divide(length, total, out=np.broadcast_to(np.linspace(0, 1, n), length.shape).copy(),
+                       where=total > 0)
+
+    # Strip: point i of side AB is base + i, point i of side BA is base + n + i
+    base  = (2*n*np.arange(n_chords))[:, None]
+    i     = np.arange(n - 1)[None, :]
+    lower = np.stack([base + i, base + n + i, base + i + 1], axis=-1)
+    upper = np.stack([base + n + i, base + n + i + 1, base + i + 1], axis=-1)
+    strip = np.stack([lower, upper], axis=2).reshape(-1, 3)
+
+    # Fans over the arcs, with their points after the strips (A arcs, then B arcs)
+    def fan(first, counts, shift):
+        owner  = np.repeat(np.arange(n_chords), counts)
+        local  = np.arange(np.sum(counts)) - np.repeat(np.cumsum(counts) - counts, counts)
+        points = vertices[first[owner] + local]
+        fans   = np.maximum(counts - 2, 0)
+        f_own  = np.repeat(np.arange(n_chords), fans)
+        f_loc  = np.arange(np.sum(fans)) - np.repeat(np.cumsum(fans) - fans, fans) + 1
+        f_base = shift + (np.cumsum(counts) - counts)[f_own]
+        triangles = np.column_stack([f_base, f_base + f_loc, f_base + f_loc + 1])
+        return points, owner, triangles, f_own
+    n_strip = 2*n*n_chords
+    points_A, owner_A, fan_A, tri_A = fan(start, n_alpha, n_strip)
+    points_B, owner_B, fan_B, tri_B = fan(start + n_alpha + 1, n_beta, n_strip + len(points_A))
+
+    points = np.concatenate([np.concatenate([side_AB, side_BA], axis=1).reshape(-1, 2),
+                             points_A, points_B])
+    return {'points'         : points,
+            'triangles'      : np.concatenate([strip, fan_A, fan_B]).astype(np.int32),
+            'point_chord'    : np.concatenate([np.repeat(np.arange(n_chords), 2*n), owner_A, owner_B]),
+            'triangle_chord' : np.concatenate([np.repeat(np.arange(n_chords), 2*(n - 1)), tri_A, tri_B]),
+            't'              : np.concatenate([np.concatenate([t_side, t_side], axis=1).ravel(),
+                                               np.zeros(len(points_A)), np.ones(len(points_B))])}
+
+def _angdist(alpha, beta):
+    """Minimal angular distance between angles (see :func:`cachai.utilities.angdist`)."""
+    diff = np.abs(alpha - beta) % (2 * np.pi)
+    return np.minimum(diff, 2 * np.pi - diff)
@@ -0,0 +1,461 @@
+# Basic imports
+import sys
+import json
+import numpy as np
+import scipy.sparse as sp
+from   collections.abc import Mapping
+import cachai._core.ordering as cho
+import cachai._core.geometry as chgeo
+import cachai._core.cache as chcache
+
+# Parameters of the layout of a chord diagram (see ChordLayout)
+LAYOUT_PARAMS = ('radius','position','optimize','refine','filter','show_diag','threshold',
+                 'max_chords','top_k','node_gap','min_dist','scale','max_rho','max_rho_radius','dtype')
+# Floating point types of the matrix and the geometry of a layout
+DTYPES = ('float32','float64')
+# Version of the layouts stored by a LayoutCache (changes when their content or meaning changes)
+CACHE_VERSION = 'chord-layout-1'
+
+class ChordLayout():
+    """
+    Layout of a chord diagram: which nodes and chords are drawn, the order of the nodes, their arcs
+    and ports, the paths and mid curves of the chords and the anchors of the labels, as NumPy
+    arrays. It needs no matplotlib, and pickles cheaply, so layouts can be computed in worker
+    processes or services and drawn later (see :class:`cachai._core.chord.ChordDiagram`, the
+    renderer).
+
+    The parameters are those of :func:`cachai.layout.chord_layout`. The layout is computed by
+    :meth:`compute`. ``validate=False`` skips the symmetry check of the input (and of the matrices
+    given to :meth:`set_matrix`).
+
+    Attributes
+        corr_matrix : :class:`numpy.ndarray` or :class:`scipy.sparse.csr_array`
+            Correlation matrix of the nodes of the diagram (filtered and ordered), in ``dtype``.
+        names : :class:`list`
+            Names of the nodes of the diagram.
+        node_index : :class:`numpy.ndarray`
+            Position of every node of the diagram in the input matrix.
+        order_stats / crossing_stats / pruning_stats : :class:`dict`
+            Summaries of the ordering, the crossing refinement and the chord selection.
+        node_angles : :class:`dict`
+            Arcs of the nodes: ``theta_i``, ``theta_f``, ``theta_m`` and ``theta_arc`` arrays.
+        ports : :class:`dict`
+            Ports of the nodes: ``rhos``, ``ports_i``, ``ports_f`` and ``ports_state`` arrays.
+        label_anchors : :class:`dict`
+            Anchors of the labels: ``r``, ``theta``, ``x``, ``y`` and ``rot`` (degrees) arrays.
+        chord_source / chord_target / chord_rho : :class:`numpy.ndarray`
+            Nodes and correlation of every chord.
+        chord_ends : :class:`numpy.ndarray`
+            Port arcs and correlation of every chord: ``alpha_i``, ``alpha_f``, ``beta_i``,
+            ``beta_f`` and ``rho`` columns.
+        chord_geometry : :class:`dict`
+            Packed paths of the chords (``vertices``, matplotlib ``codes`` and ``offsets``) and
+            their mid curves (``mid``, the control points of a quadratic Bézier curve). The points
+            are stored in ``dtype``.
+        chord_index : :class:`numpy.ndarray`
+            Position of every chord in ``chord_geometry``.
+        invalid_chords : :class:`numpy.ndarray`
+            Pairs of nodes whose chords were dropped because of a non-finite geometry.
+    """
+    def __init__(self, corr_matrix, names=None, radius=1, position=(0,0), optimize=True,
+                 refine=False, filter=True, show_diag=False, threshold=0.1, max_chords=None,
+                 top_k=None, node_gap=0.1, min_dist=np.deg2rad(15), scale='linear', max_rho=0.4,
+                 max_rho_radius=0.7, dtype='float64', validate=True):
+        if np.dtype(dtype).name not in DTYPES:
+            raise ValueError(f'Unknown dtype {dtype}. Available dtypes are: {", ".join(DTYPES)}')
+        chgeo.check_budget(max_chords=max_chords, top_k=top_k)
+        self.dtype    = np.dtype(dtype).name
+        self.validate = validate
+        self.corr_matrix, labels = load_matrix(corr_matrix, names, validate, self.dtype)
+        if names is None: names = labels
+        if names is None: names = [f'N{i+1}' for i in range(self.corr_matrix.shape[0])]
+        self.names          = names
+        self.radius         = radius
+        self.position       = position
+        self.optimize       = optimize
+        self.refine         = refine
+        self.filter         = filter
+        self.show_diag      = show_diag
+        self.threshold      = threshold
+        self.max_chords     = max_chords
+        self.top_k          = top_k
+        self.node_gap       = node_gap
+        self.min_dist       = min_dist
+        self.scale          = scale
+        self.max_rho        = max_rho
+        self.max_rho_radius = max_rho_radius
+
+        self.input_size     = self.corr_matrix.shape[0]
+        self.input_names    = list(self.names) # Labels of the edge lists given to set_matrix
+        self.node_index     = np.arange(self.input_size)
+        self.order          = [i for i in range(self.input_size)]
+        self.order_stats    = None
+        self.crossing_stats = None
+        self.pruning_stats  = None
+        self.allowed        = None
+        self.nodes          = dict()
+        self.node_angles    = None
+        self.ports          = None
+        self.label_anchors  = None
+        self.invalid_chords = np.empty((0,2), dtype=np.intp)
+
+    @property
+    def params(self):
+        """Parameters of the layout, as keyword arguments of :class:`ChordLayout`"""
+        return {key:getattr(self,key) for key in LAYOUT_PARAMS}
+
+    def compute(self, cache=None):
+        """
+        Compute the whole layout: chords, nodes (filtered and ordered) and geometry. With a
+        ``cache`` (a :class:`cachai._core.cache.LayoutCache`, or ``True`` for the default one), a
+        layout computed before for the same matrix, names and parameters is loaded instead.
+        Layouts ordered by a callable are not cached.
+        """
+        if cache is True: cache = chcache.default_layout_cache
+        key = None
+        if cache is not None and cache is not False and not callable(self.optimize):
+            key   = cache.key(*self.__cache_parts())
+            state = cache.get(key)
+            if state is not None:
+                self.__load(state)
+                return self
+
+        self.select_chords()
+        if self.filter == True: self.filter_nodes()
+        if self.corr_matrix.shape[0] == 0: raise self.__no_nodes_error()
+        if self.optimize: self.optimize_nodes()
+        if self.refine: self.refine_nodes()
+        self.layout_nodes()
+        self.layout_chords()
+        if key is not None: cache.put(key, self.__state())
+        return self
+
+    def set_matrix(self, corr_matrix):
+        """
+        Use a new correlation matrix (same variables as the input one) for the current nodes, and
+        select its chords. The rest of the layout is not computed again. A matrix without any chord
+        is rejected, leaving the layout unchanged.
+        """
+        corr_matrix, _ = load_matrix(corr_matrix, self.input_names, self.validate, self.dtype)
+        if corr_matrix.shape[0] != self.input_size:
+            raise ValueError('The new correlation matrix must have the same size as the original one '
+                             f'({self.input_size} variables)')
+        corr_matrix    = corr_matrix[np.ix_(self.node_index,self.node_index)]
+        allowed, stats = chgeo.chord_selection(corr_matrix, self.threshold, self.max_chords, self.top_k)
+        if stats['chords'] == 0: raise self.__no_nodes_error()
+        self.corr_matrix, self.allowed, self.pruning_stats = corr_matrix, allowed, stats
+
+    def select_chords(self):
+        """Pairs of nodes with a chord (threshold and chord budget), and what was dropped"""
+        self.allowed, self.pruning_stats = chgeo.chord_selection(self.corr_matrix, self.threshold,
+                                                                 self.max_chords, self.top_k)
+
+    def filter_nodes(self):
+        """Remove nodes with no correlation (0 chords)"""
+        indexes = np.flatnonzero(np.asarray(self.allowed.sum(axis=1)).ravel())
+        if len(indexes) == self.corr_matrix.shape[0]: return # Nothing to copy
+
+        self.corr_matrix = self.corr_matrix[np.ix_(indexes, indexes)]
+        self.allowed     = self.allowed[np.ix_(indexes, indexes)]
+        self.names       = [self.names[i] for i in indexes]
+        self.node_index  = self.node_index[indexes]
+
+    def order_nodes(self, order):
+        """Order nodes (matrix and names)"""
+        self.corr_matrix = self.corr_matrix[np.ix_(order, order)]
+        self.allowed     = self.allowed[np.ix_(order, order)]
+        self.names       = [self.names[i] for i in order]
+        self.node_index  = self.node_index[np.asarray(order, dtype=np.intp)]
+
+    def optimize_nodes(self):
+        """Optimize node order using the selected strategy (Prim's algorithm by default)."""
+        strategy = 'greedy' if self.optimize is True else self.optimize
+        self.order, self.order_stats = cho.order_nodes(self.corr_matrix, strategy)
+        # Apply new order
+        self.order_nodes(self.order)
+
+    def refine_nodes(self):
+        """Refine the current node order to reduce chord crossings."""
+        time_budget = 1.0 if self.refine is True else float(self.refine)
+        refined, self.crossing_stats = cho.refine_crossings(self.allowed, time_budget=time_budget)
+        # Apply refined order (relative to the current one)
+        self.order = [self.order[i] for i in refined]
+        self.order_nodes(refined)
+
+    def layout_nodes(self):
+        """Angles of the nodes and their ports, and anchors of their labels"""
+        self.node_angles = chgeo.node_layout(self.corr_matrix, self.node_gap)
+        self.layout_ports()
+
+    def layout_ports(self):
+        """Ports of the nodes (in their current arcs), and anchors of their labels"""
+        self.ports       = chgeo.port_layout(self.corr_matrix, self.node_angles,
+                                             self.threshold, self.show_diag, self.allowed)
+        self.nodes       = _NodeMapping(self.node_angles, self.ports)
+        theta = self.node_angles['theta_m']
+        r     = np.full(len(theta), float(self.radius))
+        x     = r * np.cos(theta) + self.position[0]
+        y     = r * np.sin(theta) + self.position[1]
+        self.label_anchors = {'r'     : r,
+                              'theta' : theta,
+                              'x'     : x,
+                              'y'     : y,
+                              'rot'   : np.rad2deg(theta - np.sign(y - self.position[1])*np.pi/2)%360}
+
+    def find_chords(self):
+        """Pairs of nodes of the chords, and their ends (see chgeo.chord_ends) in the current ports"""
+        source, target = chgeo.chord_pairs(self.ports['ports_state'], self.show_diag)
+        return source, target, np.column_stack(chgeo.chord_ends(self.ports, source, target))
+
+    def chord_paths(self, source, target, ends):
+        """
+        Paths of the chords from ``source`` to ``target`` (port arcs and rho in ``ends``, see
+        :meth:`find_chords`), and which of them have a finite geometry.
+        """
+        geometry = chgeo.chord_paths(*ends[:, :4].T,
+                                     self.scale_rho(ends[:, 4]),
+                                     radius=self.radius,
+                                     position=self.position,
+                                     min_dist=self.min_dist,
+                                     max_rho_radius=self.max_rho_radius,
+                                     dtype=self.dtype)
+        finite = np.logical_and.reduceat(np.all(np.isfinite(geometry['vertices']), axis=1),
+                                         geometry['offsets'][:-1]) if len(source) else source == target
+        return geometry, finite
+
+    def layout_chords(self):
+        """Chords of the current ports and their geometry, dropping the invalid ones"""
+        source, target, ends = self.find_chords()
+        geometry, finite     = self.chord_paths(source, target, ends)
+
+        self.chord_source   = source[finite]
+        self.chord_target   = target[finite]
+        self.chord_rho      = ends[finite, 4]
+        self.chord_ends     = ends[finite]
+        self.chord_geometry = geometry
+        self.chord_index    = np.flatnonzero(finite) # Chord -> position in chord_geometry
+        self.invalid_chords = np.column_stack([source[~finite], target[~finite]])
+
+    def __cache_parts(self):
+        """Parts of the key of the layout in a LayoutCache: input matrix, names and parameters"""
+        matrix = self.corr_matrix
+        arrays = (matrix.indptr, matrix.indices, matrix.data) if sp.issparse(matrix) else (matrix,)
+        return (CACHE_VERSION, 'sparse' if sp.issparse(matrix) else 'dense', repr(list(self.names)),
+                repr(sorted(self.params.items())), *arrays)
+
+    def __state(self):
+        """Arrays stored in a LayoutCache"""
+        pairs = chgeo.mask_pairs(self.allowed)
+        stats = {'order_stats'    : self.order_stats,
+                 'crossing_stats' : self.crossing_stats,
+                 'pruning_stats'  : self.pruning_stats}
+        return {'node_index'     : self.node_index,
+                'order'          : np.asarray(self.order, dtype=np.intp),
+                'stats'          : np.array(json.dumps(stats, default=float)),
+                'allowed'        : np.column_stack(pairs),
+                **self.node_angles,
+                'chord_source'   : self.chord_source,
+                'chord_target'   : self.chord_target,
+                'chord_ends'     : self.chord_ends,
+                'chord_index'    : self.chord_index,
+                'invalid_chords' : self.invalid_chords,
+                **self.chord_geometry}
+
+    def __load(self, state):
+        """Layout from the arrays of a LayoutCache (see __state), for the input matrix"""
+        self.node_index  = state['node_index']
+        self.order       = state['order'].tolist()
+        stats            = json.loads(str(state['stats']))
+        self.order_stats, self.crossing_stats, self.pruning_stats = (
+            stats['order_stats'], stats['crossing_stats'], stats['pruning_stats'])
+        self.corr_matrix = self.corr_matrix[np.ix_(self.node_index, self.node_index)]
+        self.names       = [self.names[i] for i in self.node_index]
+        self.allowed     = chgeo.pair_mask(*state['allowed'].T, len(self.node_index),
+                                           sp.issparse(self.corr_matrix))
+        self.node_angles = {key: state[key] for key in ('theta_i','theta_f','theta_m','theta_arc')}
+        self.layout_ports()
+        self.chord_source   = state['chord_source']
+        self.chord_target   = state['chord_target']
+        self.chord_ends     = state['chord_ends']
+        self.chord_rho      = self.chord_ends[:, 4]
+        self.chord_geometry = {key: state[key] for key in ('vertices','codes','offsets','mid')}
+        self.chord_index    = state['chord_index']
+        self.invalid_chords = state['invalid_chords']
+
+    def __no_nodes_error(self):
+        """Error of a matrix without any correlation over the threshold"""
+        return ValueError(f'No nodes remaining after threshold filtering: '
+                          f'all correlations were below the threshold = {self.threshold}.')
+
+    def radius_rule(self, dist):
+        """Rule to set the radius of a single chord (or an array of chords)"""
+        return chgeo.radius_rule(dist, self.min_dist, self.max_rho_radius)
+
+    def scale_rho(self, rho):
+        """Scale rho (link thickness)"""
+        return chgeo.scale_rho(rho, self.scale, self.max_rho)
+
+
+def validate_matrix(corr_matrix, symmetry=True):
+    """
+    Validate that a correlation matrix meets the required specifications:
+        - Input is a numpy.ndarray, pandas.DataFrame, scipy.sparse matrix or edge list
+        - Matrix is 2-dimensional
+        - Matrix is not empty
+        - All values are int or float
+        - Matrix is symmetric (unless ``symmetry=False``)
+    """
+    temp_corr_matrix = corr_matrix
+    if is_edge_list(temp_corr_matrix):
+        if len(temp_corr_matrix) == 0:
+            raise ValueError('Your edge list cannot be empty')
+        if not np.issubdtype(temp_corr_matrix['rho'].dtype, np.floating):
+            raise TypeError('The rho column of your edge list must contain float values')
+        return
+    if not isinstance(temp_corr_matrix, np.ndarray) and not is_dataframe(temp_corr_matrix) and\
+       not sp.issparse(temp_corr_matrix):
+        raise TypeError('Your correlation matrix must be a numpy.ndarray, pandas.DataFrame, '
+                        'scipy.sparse matrix or edge list')
+    # -- This block of code should not be here, but its necessary for the next validations --
+    if is_dataframe(temp_corr_matrix):
+        temp_corr_matrix = temp_corr_matrix.to_numpy()
+    # ---------------------------------------------------------------------------------------
+    if temp_corr_matrix.ndim != 2:
+        raise ValueError('Your correlation matrix must be a 2-dimensional array')
+    if temp_corr_matrix.shape[0] != temp_corr_matrix.shape[1]:
+        raise ValueError('Your correlation matrix must be a square matrix.')
+    if temp_corr_matrix.shape[0] == 0:
+        raise ValueError('Your correlation matrix cannot be empty')
+    if not np.issubdtype(temp_corr_matrix.dtype, np.floating):
+        raise TypeError('Your correlation matrix must contain float values')
+    if not symmetry: return
+    if sp.issparse(temp_corr_matrix):
+        # Same tolerance as np.allclose, over the stored entries
+        difference = abs(temp_corr_matrix - temp_corr_matrix.T) - 1e-5*abs(temp_corr_matrix.T)
+        symmetric  = difference.nnz == 0 or difference.max() <= 1e-8
+    else:
+        symmetric  = is_symmetric(temp_corr_matrix)
+    if not symmetric:
+        raise ValueError('Your correlation matrix must be symmetric')
+
+def is_symmetric(matrix, rtol=1e-05, atol=1e-08, block_size=2**20):
+    """
+    Whether a square array is symmetric, with the tolerance of ``np.allclose(matrix, matrix.T)``.
+    Both triangles are compared in blocks of rows of the upper one, so the temporaries hold about
+    ``block_size`` values instead of several copies of the matrix, and an asymmetric block stops
+    the check.
+    """
+    n_rows = matrix.shape[0]
+    rows   = max(1, block_size // max(n_rows, 1))
+    for i in range(0, n_rows, rows):
+        upper = matrix[i:i+rows, i:]
+        lower = matrix[i:, i:i+rows].T
+        # |a - b| <= atol + rtol*|b| both ways, and infinities are close only to themselves
+        with np.errstate(invalid='ignore', over='ignore'):
+            difference = np.abs(upper - lower)
+            close      = difference <= atol + rtol*np.minimum(np.abs(upper), np.abs(lower))
+        if not np.all((close & (difference != np.inf)) | (upper == lower)): return False
+    return True
+
+def is_dataframe(corr_matrix):
+    """Whether the input is a pandas DataFrame (without importing pandas: there is none without it)"""
+    pd = sys.modules.get('pandas')
+    return pd is not None and isinstance(corr_matrix, pd.DataFrame)
+
+def is_edge_list(corr_matrix):
+    """Whether the input is an edge list: a DataFrame with ``source``, ``target`` and ``rho`` columns"""
+    return is_dataframe(corr_matrix) and {'source','target','rho'} <= set(corr_matrix.columns)
+
+def as_matrix(corr_matrix, labels=None):
+    """
+    Correlation matrix of any accepted input, and the labels of its nodes (None if it has none). A
+    sparse matrix or an edge list gives a sparse ``csr_array`` with ones in the diagonal, where
+    missing entries are zero correlations. The nodes of an edge list are its labels in order of
+    appearance (or ``labels``), and pairs given more than once keep the last correlation.
+    """
+    if is_edge_list(corr_matrix):
+        import pandas as pd
+        source = corr_matrix['source'].to_numpy()
+        target = corr_matrix['target'].to_numpy()
+        if labels is None: labels = pd.unique(np.concatenate([source, target])).tolist()
+        index = pd.Index(labels)
+        i, j  = index.get_indexer(source), index.get_indexer(target)
+        if np.any(i < 0) or np.any(j < 0):
+            unknown = [node for node,k in zip(np.concatenate([source,target]),np.concatenate([i,j])) if k < 0]
+            raise ValueError(f'Unknown node {unknown[0]} in the edge list. '
+                             f'Available nodes are: {", ".join(map(str,labels))}')
+        pairs = pd.DataFrame({'a'   : np.minimum(i,j),
+                              'b'   : np.maximum(i,j),
+                              'rho' : corr_matrix['rho'].to_numpy()})
+        pairs = pairs[pairs['a'] != pairs['b']].drop_duplicates(['a','b'], keep='last')
+        a, b  = pairs['a'].to_numpy(), pairs['b'].to_numpy()
+        corr_matrix = sp.coo_array((np.concatenate([pairs['rho'].to_numpy()]*2), (np.r_[a,b], np.r_[b,a])),
+                                   shape=(len(labels), len(labels)))
+        return as_matrix(corr_matrix)[0], labels
+    if is_dataframe(corr_matrix):
+        return corr_matrix.to_numpy(), corr_matrix.columns.tolist()
+    if sp.issparse(corr_matrix):
+        coo  = sp.coo_array(corr_matrix)
+        keep = coo.row != coo.col
+        diag = np.arange(coo.shape[0])
+        return sp.csr_array((np.concatenate([coo.data[keep], np.ones(len(diag))]),
+                             (np.concatenate([coo.row[keep], diag]), np.concatenate([coo.col[keep], diag]))),
+                            shape=coo.shape), None
+    return corr_matrix, None
+
+def load_matrix(corr_matrix, labels=None, validate=True, dtype=None):
+    """
+    Validated correlation matrix of any accepted input, and the labels of its nodes (see
+    :func:`validate_matrix` and :func:`as_matrix`). A DataFrame is converted once, without a copy
+    when its values are a single float block, and ``validate=False`` skips the symmetry check.
+    With a ``dtype``, the matrix is cast to it (copied only if its dtype is another one).
+    """
+    if is_edge_list(corr_matrix):
+        validate_matrix(corr_matrix)
+        corr_matrix, labels = as_matrix(corr_matrix, labels)
+    else:
+        labels = None
+        if is_dataframe(corr_matrix):
+            labels, corr_matrix = corr_matrix.columns.tolist(), corr_matrix.to_numpy()
+        validate_matrix(corr_matrix, symmetry=validate)
+        corr_matrix = as_matrix(corr_matrix)[0]
+    if dtype is not None: corr_matrix = corr_matrix.astype(dtype, copy=False)
+    return corr_matrix, labels
+
+
+class _NodeMapping(Mapping):
+    """
+    Read-only ``{node: node_data}`` view of the layout arrays, kept for compatibility. The data of
+    each node is built on access, with the same keys and port ids (``'{node}*'`` for the second
+    self-referencing port) as the dictionaries used by previous versions.
+    """
+    def __init__(self, node_angles, ports):
+        self._node_angles = node_angles
+        self._ports       = ports
+
+    def __len__(self):
+        return len(self._node_angles['theta_i'])
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def __getitem__(self, node):
+        if not isinstance(node, (int, np.integer)) or not 0 <= node < len(self): raise KeyError(node)
+        node_data = {key: self._node_angles[key][node] for key in self._node_angles}
+        # Rows of the node (dense, also for a sparse layout, where missing ports are forbidden)
+        row = {key: self._ports[key][[node]].toarray()[0] if sp.issparse(self._ports[key])
+               else self._ports[key][node] for key in self._ports}
+        row['ports_state'] = np.where(row['ports_state'] == 0, -1, row['ports_state'])
+        rhos, ports, states = dict(), dict(), dict()
+        for j in range(len(self) + 1):
+            if   j == node     : port_id = node
+            elif j == (node+1) : port_id = f'{node}*'
+            elif j < node      : port_id = j
+            else               : port_id = j-1
+            rhos[port_id]   = row['rhos'][j]
+            ports[port_id]  = {'i':row['ports_i'][j],'f':row['ports_f'][j]}
+            states[port_id] = int(row['ports_state'][j])
+        node_data['rhos']        = rhos
+        node_data['ports']       = ports
+        node_data['ports_state'] = states
+        return node_data
@@ -0,0 +1,108 @@
+# Basic imports
+import numpy as np
+# Matplotlib imports
+from   matplotlib import artist
+from   matplotlib.backends.backend_agg import RendererAgg
+from   matplotlib.collections import TriMesh
+from   matplotlib.transforms import Affine2D, TransformedPath
+
+class BlendMesh(TriMesh):
+    """
+    Gouraud-shaded triangle mesh of the chord blends (see :func:`cachai._core.geometry.chord_mesh`),
+    with one alpha per chord.
+
+    Vector backends get all the chords as a single set of shaded triangles. Agg grows every
+    Gouraud triangle half a pixel to hide gaps, so translucent triangles sharing an edge would
+    show seams: on raster renderers each chord is drawn opaque on its own layer, which is then
+    composited with the alpha of the chord. The layers only cover the pixels of their chord, so
+    the cost does not grow with the size of the canvas times the number of chords.
+    """
+    def __init__(self, triangulation, colors, triangle_chord, alphas, **kwargs):
+        super().__init__(triangulation, **kwargs)
+        self.set_mesh(triangulation, colors, triangle_chord, alphas)
+
+    def set_mesh(self, triangulation, colors, triangle_chord, alphas):
+        """Replace the triangles of the mesh (e.g. after the chords of the diagram change)"""
+        self._triangulation = triangulation
+        self._paths         = None
+        # Triangles grouped by chord, in drawing order
+        self._order   = np.argsort(triangle_chord, kind='stable')
+        chords        = np.asarray(triangle_chord)[self._order]
+        self._chords  = chords
+        self._bounds  = np.searchsorted(chords, np.arange(np.max(chords, initial=-1) + 2))
+        self.set_colors(colors)
+        self.set_chord_alphas(alphas)
+
+    def set_colors(self, colors):
+        """Set the RGB colors of the points of the mesh"""
+        self._colors = np.column_stack([np.asarray(colors, dtype=float)[:, :3],
+                                        np.ones(len(colors))])
+        self.stale   = True
+
+    def set_chord_alphas(self, alphas):
+        """Set the alpha of every chord of the mesh"""
+        self._chord_alphas = np.array(alphas, dtype=float)
+        self.stale = True
+
+    def get_chord_alphas(self):
+        """Alpha of every chord of the mesh"""
+        return self._chord_alphas.copy()
+
+    @artist.allow_rasterization
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        renderer.open_group(self.__class__.__name__, gid=self.get_gid())
+        transform = self.get_transform().frozen()
+        tri       = self._triangulation
+        triangles = tri.triangles[self._order]
+        verts     = np.stack((tri.x[triangles], tri.y[triangles]), axis=-1)
+        colors    = self._colors[triangles]
+
+        gc = renderer.new_gc()
+        self._set_gc_clip(gc)
+        gc.set_linewidth(0)
+        # Rasterized artists on vector backends are drawn by the Agg renderer of a MixedModeRenderer
+        agg = renderer if isinstance(renderer, RendererAgg) else getattr(renderer, '_renderer', None)
+        if isinstance(agg, RendererAgg):
+            points = transform.transform(verts.reshape(-1, 2)).reshape(verts.shape)
+            for chord, alpha in enumerate(self._chord_alphas.tolist()):
+                start, stop = self._bounds[chord], self._bounds[chord + 1]
+                if alpha <= 0 or start == stop: continue
+                self._draw_layer(agg, gc, points[start:stop], colors[start:stop], alpha)
+        else:
+            colors[..., 3] = self._chord_alphas[self._chords][:, None]
+            visible = colors[:, 0, 3] > 0
+            renderer.draw_gouraud_triangles(gc, verts[visible], colors[visible], transform)
+        gc.restore()
+        renderer.close_group(self.__class__.__name__)
+        self.stale = False
+
+    def _draw_layer(self, renderer, gc, points, colors, alpha):
+        """
+        Draw opaque Gouraud triangles (in display coordinates) on an Agg layer covering only their
+        pixels (plus one for the growth of the triangles), clipped as ``gc``, and composite it with
+        ``alpha``.
+        """
+        low, high = points.min(axis=(0, 1)) - 1, points.max(axis=(0, 1)) + 1
+        clip      = gc.get_clip_rectangle()
+        if clip is not None:
+            low, high = np.maximum(low, clip.min - 1), np.minimum(high, clip.max + 1)
+        x0, y0 = np.maximum(np.floor(low), 0).astype(int)
+        x1, y1 = np.minimum(np.ceil(high), (int(renderer.width), int(renderer.height))).astype(int)
+        if x1 <= x0 or y1 <= y0: return
+        # Same clipping as on the canvas, in the coordinates of the layer
+        to_layer = Affine2D().translate(-x0, -y0)
+        layer    = RendererAgg(x1 - x0, y1 - y0, renderer.dpi)
+        layer_gc = layer.new_gc()
+        layer_gc.set_linewidth(0)
+        if clip is not None: layer_gc.set_clip_rectangle(clip.translated(-x0, -y0))
+        path, transform = gc.get_clip_path()
+        if path is not None: layer_gc.set_clip_path(TransformedPath(path, transform + to_layer))
+        layer.draw_gouraud_triangles(layer_gc, points, colors, to_layer)
+        layer_gc.restore()
+        image = np.asarray(layer.buffer_rgba())
+        image[..., 3] = image[..., 3] * alpha
+        image_gc = renderer.new_gc()
+        renderer.draw_image(image_gc, x0, y0, image[::-1])
+        image_gc.restore()
@@ -0,0 +1,147 @@
+# Basic imports
+import numpy as np
+import cachai.utilities as chu
+# Matplotlib imports
+from   matplotlib.image import AxesImage
+
+class BlendTexture():
+    """
+    Shared RGBA texture for the color blends of many chords.
+
+    The texture is a regular grid of ``resolution × resolution`` pixels covering ``extent``
+    (``(xmin, xmax, ymin, ymax)``). Each chord adds a layer: the pixels of the grid inside its path
+    and their colors. The layers are composited in order (``over`` operator) with an alpha per
+    layer, so the result is the same as drawing one clipped image per chord, but only one image
+    is drawn.
+    """
+    def __init__(self, extent, resolution):
+        self.extent     = tuple(float(e) for e in extent)
+        self.resolution = int(resolution)
+        xmin, xmax, ymin, ymax = self.extent
+        # Pixel centers
+        self.x = xmin + (np.arange(self.resolution) + 0.5) * (xmax - xmin) / self.resolution
+        self.y = ymin + (np.arange(self.resolution) + 0.5) * (ymax - ymin) / self.resolution
+        self.layers = []
+
+    def __len__(self):
+        return len(self.layers)
+
+    def layer_values(self, path, curve, method='grid', max_memory=2**24, dtype='float64'):
+        """
+        Pixels of the grid inside ``path`` (flat indexes) and their values (in ``dtype``), from
+        the nearest point of ``curve`` (see :func:`cachai.utilities.map_from_curve`).
+        """
+        xmin, ymin = np.min(path.vertices, axis=0)
+        xmax, ymax = np.max(path.vertices, axis=0)
+        ix = np.flatnonzero((self.x >= xmin) & (self.x <= xmax))
+        iy = np.flatnonzero((self.y >= ymin) & (self.y <= ymax))
+        if len(ix) == 0 or len(iy) == 0: return np.empty(0, dtype=np.intp), np.empty(0, dtype=dtype)
+        inside = chu._grid_mask(path, self.x[ix], self.y[iy], max_memory, grow=False)
+        values = chu.map_from_curve(curve,
+                                    xlim=(self.x[ix[0]], self.x[ix[-1]]),
+                                    ylim=(self.y[iy[0]], self.y[iy[-1]]),
+                                    resolution=(len(ix), len(iy)),
+                                    method=method,
+                                    mask=inside,
+                                    max_memory=max_memory,
+                                    dtype=dtype)
+        rows, cols = np.nonzero(inside)
+        return (iy[rows] * self.resolution + ix[cols]).astype(np.intp), values[rows, cols]
+
+    def add_layer(self, index, values, lut):
+        """
+        Add the blend of a chord: the pixels ``index`` (see :meth:`layer_values`) take the colors
+        of their ``values`` (from -1 to 1, or the levels of a compact map, see
+        :func:`cachai.utilities.compact_map`) from the lookup table ``lut`` (``N × 3`` RGB colors,
+        see :func:`cachai.utilities.blend_lut`), or from a colormap.
+
+        Layers are stored compactly: the pixels as ``int32`` and the colors as indexes in the lookup
+        table, which layers with the same colors share.
+        """
+        if not isinstance(lut, np.ndarray): lut = lut(np.arange(lut.N))[:, :3].astype(np.float32)
+        values = np.asarray(values)
+        if values.dtype.kind == 'u':
+            position = (values.astype(float) - 1) / (np.iinfo(values.dtype).max - 1)
+        else:
+            position = (values.astype(float) + 1) / 2
+        # Same lookup as matplotlib.colors.Colormap.__call__
+        codes = np.clip((position * len(lut)).astype(int), 0, len(lut) - 1)
+        codes = codes.astype(np.uint8 if len(lut) <= 256 else np.uint16)
+        self.layers.append((np.asarray(index, dtype=np.int32), codes, lut))
+
+    def composite(self, alphas):
+        """RGBA image (``resolution × resolution × 4``, ``uint8``) of the layers with the given alphas."""
+        premultiplied = np.zeros((self.resolution**2, 4), dtype=np.float32)
+        for (index, codes, lut), alpha in zip(self.layers, np.broadcast_to(alphas, len(self.layers))):
+            if alpha <= 0 or len(index) == 0: continue
+            layer = premultiplied[index]
+            layer *= 1 - alpha
+            layer[:, :3] += alpha * lut[codes]
+            layer[:, 3]  += alpha
+            premultiplied[index] = layer
+        # Back to straight (not premultiplied) alpha
+        opacity = premultiplied[:, 3:]
+        np.divide(premultiplied[:, :3], opacity, out=premultiplied[:, :3], where=opacity > 0)
+        rgba = np.rint(np.clip(premultiplied, 0, 1) * 255).astype(np.uint8)
+        return rgba.reshape(self.resolution, self.resolution, 4)
+
+    def nbytes(self):
+        """Memory used by the layers"""
+        luts = {id(lut): lut.nbytes for _, _, lut in self.layers} # Shared tables count once
+        return sum(index.nbytes + codes.nbytes for index, codes, _ in self.layers) + sum(luts.values())
+
+
+class BlendTextureImage(AxesImage):
+    """
+    Image of a :class:`BlendTexture`. The texture is composited again only when the alphas of the
+    chords change and the image is drawn (or its array requested), so many alpha changes in a row
+    (e.g. highlighting all the chords of a node) cost a single composition.
+    """
+    def __init__(self, ax, texture, alphas, **kwargs):
+        super().__init__(ax, extent=texture.extent, origin='lower', **kwargs)
+        self.texture = texture
+        self.set_chord_alphas(alphas)
+
+    def set_chord_alphas(self, alphas):
+        """Set the alpha of every layer (chord) of the texture"""
+        if getattr(self, '_released', False):
+            raise RuntimeError('The chord blends of this texture were released, '
+                               'their alphas cannot change anymore')
+        self._chord_alphas = np.array(alphas, dtype=float)
+        self._outdated     = True
+        self.stale         = True
+
+    def get_chord_alphas(self):
+        """Alpha of every layer (chord) of the texture"""
+        return self._chord_alphas.copy()
+
+    def set_layers(self, layers, alphas):
+        """
+        Replace the layers of the texture (e.g. after the chords of the diagram change) and their
+        alphas. A released texture can change its alphas again after this.
+        """
+        self.texture.layers = list(layers)
+        self._released      = False
+        self.set_chord_alphas(alphas)
+
+    def release(self):
+        """
+        Compose the texture with the current alphas and free its layers. The image stays the same,
+        but the alphas of the chords cannot change anymore.
+        """
+        self.__refresh()
+        self.texture.layers = []
+        self._released = True
+
+    def __refresh(self):
+        if self._outdated:
+            self._outdated = False
+            self.set_data(self.texture.composite(self._chord_alphas))
+
+    def get_array(self):
+        self.__refresh()
+        return super().get_array()
+
+    def draw(self, renderer):
+        self.__refresh()
+        return super().draw(renderer)
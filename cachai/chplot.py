@@ -1,18 +1,22 @@
 # Basic imports
 import numpy as np
-from   matplotlib import pyplot as plt
 # Cachai imports
 from   cachai._core.chord import ChordDiagram
+from   cachai._core.cache import BlendCache, LayoutCache
 from   cachai.gadgets import PolarText
 from   cachai.utilities import validate_kwargs
 
 def chord(
         corr_matrix,names=None,colors=None,*,ax=None,radius=1,position=(0,0),optimize=True,
-        filter=True,bezier_n=30,show_diag=False,threshold=0.1,node_linewidth=10,node_gap=0.1,
-        node_labelpad=0.2,blend=True,blend_resolution=200,chord_linewidth=1,chord_alpha=0.7,
+        refine=False,filter=True,bezier_n=30,show_diag=False,threshold=0.1,max_chords=None,top_k=None,
+        node_linewidth=10,node_gap=0.1,node_labelpad=0.2,blend=True,blend_resolution=200,blend_dtype='uint8',
+        release_blends=False,blend_cache=False,layout_cache=None,chord_linewidth=1,chord_alpha=0.7,
         off_alpha=0.1,positive_hatch=None,negative_hatch='---',fontsize=15,font=None,
-        min_dist=np.deg2rad(15),scale='linear',max_rho=0.4,max_rho_radius=0.7,show_axis=False,
-        legend=False,positive_label=None,negative_label=None,rasterized=False,**kwargs,
+        min_dist=np.deg2rad(15),scale='linear',max_rho=0.4,max_rho_radius=0.7,dtype='float64',
+        show_axis=False,
+        legend=False,positive_label=None,negative_label=None,rasterized=False,collection=False,
+        workers=None,validate=True,
+        **kwargs,
     ):
     """
     A Chord Diagram from a correlation matrix, with customizable threshold, style, and colors.
@@ -24,9 +28,19 @@ def chord(
 
         
     Parameters
-        corr_matrix : :class:`numpy.ndarray` or :class:`pandas.DataFrame`
+        corr_matrix : :class:`numpy.ndarray`, :class:`pandas.DataFrame` or :mod:`scipy.sparse` matrix
             Correlation matrix for the chord diagram. This matrix has to be 2-dimensional, not
-            empty, symmetric, and filled just with ``int`` or ``float`` values.
+            empty, symmetric, and filled just with ``int`` or ``float`` values. It can also be an
+            edge list: a :class:`pandas.DataFrame` with ``source``, ``target`` and ``rho``
+            columns, whose nodes are named after its labels. In sparse matrices and edge lists
+            missing pairs are zero correlations (also for the size of the nodes) and the diagonal
+            is 1, and the layout takes memory proportional to the stored pairs, so they suit very
+            large sets of variables with few chords (the ``"clustering"`` strategy still needs the
+            dense matrix). A layout computed beforehand, without matplotlib, by
+            :func:`cachai.layout.chord_layout` is drawn as it is: the layout parameters
+            (``radius``, ``position``, ``optimize``, ``refine``, ``filter``, ``show_diag``,
+            ``threshold``, ``max_chords``, ``top_k``, ``node_gap``, ``min_dist``, ``scale``,
+            ``max_rho``, ``max_rho_radius`` and ``dtype``) and the names are those of the layout.
         names / n : :class:`list`, optional
             Names for each node (default: 'Ni' for the i-th node)
         colors / c : :class:`list`, optional
@@ -43,8 +57,17 @@ def chord(
             Radius of the diagram (default: 1.0)
         position / p : :class:`tuple`
             Position of the center of the diagram (default: (0,0))
-        optimize : :class:`bool`
-            Whether to optimize node order (default: True)
+        optimize : :class:`bool`, :class:`str` or callable
+            Whether to optimize node order, and how. ``True`` uses the greedy strategy (Prim's
+            algorithm). Other strategies are ``"clustering"`` (hierarchical clustering with optimal
+            leaf ordering) and ``"spectral"`` (Fiedler vector). A callable receives the correlation
+            matrix and must return a permutation of the node indices. The runtime and quality score
+            of the ordering are stored in ``order_stats`` (default: True)
+        refine : :class:`bool` or :class:`float`
+            Whether to refine the node order reducing chord crossings, with a local search of
+            adjacent swaps after the initial ordering. A number sets the time budget in seconds
+            (``True`` means 1 second). The number of crossings before and after the refinement is
+            stored in ``crossing_stats`` (default: False)
         filter : :class:`bool`
             Whether to remove nodes with no correlation (default: True)
         bezier_n : :class:`int`
@@ -53,16 +76,56 @@ def chord(
             Show self-connections (default: False)
         threshold / th : :class:`float`
             Minimum correlation threshold to display (default: 0.1)
+        max_chords : :class:`int`
+            Maximum number of chords (between distinct nodes): only the strongest ones over the
+            ``threshold`` are kept, so the time to draw the diagram stays bounded whatever the
+            density of the matrix. It must be a positive integer (default: None, no limit)
+        top_k : :class:`int`
+            Keep only the ``top_k`` strongest chords of every node (a chord is kept if it is among
+            the strongest of either of its nodes), so no node loses all its chords. It is applied
+            before ``max_chords``. A summary of the chords dropped by ``max_chords`` and ``top_k`` is stored
+            in ``pruning_stats``. It must be a positive integer (default: None, no limit)
         node_linewidth / nlw : :class:`float`
             Line width for nodes (default: 10)
         node_gap / ngap : :class:`float`
             Gap between nodes (0-1) (default: 0.1)
         node_labelpad / npad : :class:`float`
             Label position adjustment (default: 0.2)
-        blend : :class:`bool`
-            Whether to blend chord colors (default: True)
+        blend : :class:`bool` or :class:`str`
+            Whether to blend chord colors, and how. ``True`` (or ``"image"``) draws one clipped
+            image per chord. ``"texture"`` composites all the blends into a single image stored in
+            ``blend_texture``, much faster to draw and lighter in vector outputs for dense
+            diagrams. ``"mesh"`` draws the blends as a single Gouraud-shaded triangle mesh stored in
+            ``blend_mesh``, without images: the fastest to build and resolution independent, best
+            for PDF outputs (in SVG every triangle is written as its own gradients, prefer
+            ``"texture"``) (default: True)
         blend_resolution : :class:`int`
-            Color blend resolution (default: 200)
+            Color blend resolution, per chord or, with ``blend="texture"``, per radius of the
+            diagram (default: 200)
+        blend_dtype : :class:`str`
+            Data type of the stored blend maps (see :func:`cachai.utilities.compact_map`).
+            ``"uint8"`` keeps 255 levels, 8 times less memory than ``"float64"`` without visible
+            difference. Others are ``"uint16"``, ``"float16"``, ``"float32"`` and ``"float64"``
+            (default: "uint8")
+        release_blends : :class:`bool`
+            With ``blend="texture"``, free the per-chord blend layers once the texture is composed.
+            The alphas of the chords cannot change anymore (no highlights) (default: False)
+        blend_cache : :class:`bool` or :class:`BlendCache`
+            Cache of the blend maps, keyed on the chord geometry, ``bezier_n`` and
+            ``blend_resolution``, so diagrams with the same layout (e.g. re-rendered with other
+            colors, or on several axes) skip their computation. ``True`` uses a cache shared by all
+            the diagrams, which keeps up to 64 MiB of maps in memory for the rest of the session. A
+            ``chplot.BlendCache(max_bytes, directory)`` sets another memory budget and can persist
+            the maps on disk (256 MiB by default, least recently used files are removed first)
+            (default: False, no cache)
+        layout_cache : :class:`bool` or :class:`LayoutCache`
+            On-disk cache of the layout (order of the nodes, arcs and chord geometry), keyed on
+            the content of the matrix, the names and the layout parameters, so diagrams drawn again
+            from the same data (e.g. in every run of a report) skip the ordering and the geometry.
+            ``True`` uses the ``layouts`` folder of **cachai**'s cache directory (256 MiB, least
+            recently used layouts are removed first). A ``chplot.LayoutCache(directory, max_bytes)``
+            sets another folder and size. Layouts ordered by a callable are not cached
+            (default: None, no cache)
         chord_linewidth / clw : :class:`float`
             Line width for chords (default: 1)
         chord_alpha / calpha : :class:`float`
@@ -85,6 +148,11 @@ def chord(
             Maximum chord's thickness (default: 0.4) 
         max_rho_radius : :class:`float`
             Maximum normalized radius of the chords relative to center (default: 0.7)
+        dtype : :class:`str`
+            Floating point type of the correlation matrix, the distances of the ordering, the
+            ports, the chord paths and the computation of the blend maps: ``"float64"`` or
+            ``"float32"``. ``"float32"`` halves the memory of large matrices, and the diagram looks
+            the same (its angles are far below a pixel) (default: "float64")
         show_axis : :class:`bool`
             Whether to show the axis (default: False)
         legend : :class:`bool`
@@ -95,6 +163,18 @@ def chord(
             Adds negative label in the legend (default: None)
         rasterized : :class:`bool`
             Whether to force rasterized (bitmap) drawing for vector graphics output (default: False)
+        collection : :class:`bool`
+            Whether to draw all the chords (one collection per hatch) and all the node arcs as
+            single collections instead of one patch each. Much faster for diagrams with many
+            chords, ``chord_patches`` and ``node_patches`` stay empty (default: False)
+        workers : :class:`int`
+            Number of threads computing the chord blends (``-1`` for one per CPU). The images are
+            still added in the same order, so the result does not depend on it (default: None,
+            no threads)
+        validate : :class:`bool`
+            Whether to check that the correlation matrix is symmetric. The check is done in blocks,
+            with little memory, but reads the whole matrix: ``False`` skips it for inputs already
+            validated, e.g. very large matrices (default: True)
     
     Examples
     ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -146,27 +226,52 @@ def chord(
         :noindex:
     .. automethod:: ChordDiagram.highlight_chord
         :noindex:
+    .. automethod:: ChordDiagram.highlight
+        :noindex:
+    .. automethod:: ChordDiagram.clear_highlights
+        :noindex:
+    .. autoproperty:: ChordDiagram.chord_table
+        :noindex:
+    .. automethod:: ChordDiagram.get_chord
+        :noindex:
+    .. automethod:: ChordDiagram.top_chords
+        :noindex:
     .. automethod:: ChordDiagram.set_chord_alpha
         :noindex:
+    .. automethod:: ChordDiagram.update
+        :noindex:
+    .. automethod:: ChordDiagram.restyle
+        :noindex:
     """
+    if ax is None:
+        from matplotlib import pyplot as plt # Only needed here, and slow to import
+        ax = plt.gca()
+
     # Process parameters
     params = {
         'corr_matrix'      : corr_matrix,
         'names'            : names,
         'colors'           : colors,
-        'ax'               : ax if ax is not None else plt.gca(),
+        'ax'               : ax,
         'radius'           : radius,
         'position'         : position,
         'optimize'         : optimize,
+        'refine'           : refine,
         'filter'           : filter,
         'bezier_n'         : bezier_n,
         'show_diag'        : show_diag,
         'threshold'        : threshold,
+        'max_chords'       : max_chords,
+        'top_k'            : top_k,
         'node_linewidth'   : node_linewidth,
         'node_gap'         : node_gap,
         'node_labelpad'    : node_labelpad,
         'blend'            : blend,
         'blend_resolution' : blend_resolution,
+        'blend_dtype'      : blend_dtype,
+        'release_blends'   : release_blends,
+        'blend_cache'      : blend_cache,
+        'layout_cache'     : layout_cache,
         'chord_linewidth'  : chord_linewidth,
         'chord_alpha'      : chord_alpha,
         'off_alpha'        : off_alpha,
@@ -178,11 +283,15 @@ def chord(
         'scale'            : scale,
         'max_rho'          : max_rho,
         'max_rho_radius'   : max_rho_radius,
+        'dtype'            : dtype,
         'show_axis'        : show_axis,
         'legend'           : legend,
         'positive_label'   : positive_label,
         'negative_label'   : negative_label,
         'rasterized'       : rasterized,
+        'collection'       : collection,
+        'workers'          : workers,
+        'validate'         : validate,
     }
     
     # Alternative kwargs aliases
@@ -263,6 +372,7 @@ def polartext(radius,angle,text,center=(0,0),pad=0.0,**kwargs):
     Other Methods
         Inherited from :class:`matplotlib.text.Text`.
     """
+    from matplotlib import pyplot as plt
     ax     = plt.gca()
     artist = PolarText(radius,angle,text,center,pad,**kwargs)
     ax.add_artist(artist)
@@ -1,6 +1,5 @@
 import os
 import time
-import pandas as pd
 import hashlib
 import warnings
 import json
@@ -188,6 +187,7 @@ def load_dataset(name="",redownload=False):
     url = DATASETS_REPO + catalog[name]['filename']
     cached_file = _download_with_cache(url, redownload)
     
+    import pandas as pd # Only needed here, and slow to import
     return pd.read_csv(cached_file)
 
 def clear_cache(max_age_days=0):
@@ -244,6 +244,7 @@ def clear_cache(max_age_days=0):
         total = len(os.listdir(CACHE_DIR))
         for filename in os.listdir(CACHE_DIR):
             filepath = os.path.join(CACHE_DIR, filename)
+            if not os.path.isfile(filepath): continue # e.g. the layout cache (see LayoutCache)
             if os.stat(filepath).st_mtime < now - max_age_days * 86400:
                 file_size = os.path.getsize(filepath)
                 try:
@@ -0,0 +1,81 @@
+# Basic imports
+import numpy as np
+# Cachai imports
+from   cachai._core.layout import ChordLayout
+from   cachai._core.cache import LayoutCache
+
+def chord_layout(
+        corr_matrix,names=None,*,radius=1,position=(0,0),optimize=True,refine=False,filter=True,
+        show_diag=False,threshold=0.1,max_chords=None,top_k=None,node_gap=0.1,
+        min_dist=np.deg2rad(15),scale='linear',max_rho=0.4,max_rho_radius=0.7,dtype='float64',
+        cache=None,validate=True,
+    ):
+    """
+    The layout of a Chord Diagram, computed without matplotlib.
+
+    It holds all the geometry of :func:`cachai.chplot.chord` (the nodes kept and their order, the
+    arcs and ports of the nodes, the paths and mid curves of the chords and the anchors of the
+    labels) as NumPy arrays. Layouts pickle cheaply, so they can be computed in worker processes,
+    or in services that only need the geometry, and drawn later passing them to
+    :func:`cachai.chplot.chord` instead of the correlation matrix.
+
+    Parameters
+        corr_matrix : :class:`numpy.ndarray`, :class:`pandas.DataFrame` or :mod:`scipy.sparse` matrix
+            Correlation matrix (or edge list), as in :func:`cachai.chplot.chord`.
+        names : :class:`list`, optional
+            Names for each node (default: 'Ni' for the i-th node)
+
+    Returns
+        :class:`ChordLayout`:viewsource:`cachai._core.layout.ChordLayout`
+            The computed layout. Its main attributes are ``names`` and ``node_index`` (position of
+            every node in the input matrix), ``node_angles`` (``theta_i``, ``theta_f``,
+            ``theta_m`` and ``theta_arc`` of the node arcs, in radians), ``ports``,
+            ``label_anchors`` (``r``, ``theta``, ``x``, ``y`` and ``rot`` of the labels),
+            ``chord_source``, ``chord_target``, ``chord_rho``, ``chord_ends`` (port arcs of the
+            chords) and ``chord_geometry`` (packed ``vertices``, ``codes`` and ``offsets`` of the
+            chord paths and the control points ``mid`` of their mid curves, with the chord ``k``
+            at ``chord_index[k]``), plus ``order_stats``, ``crossing_stats`` and
+            ``pruning_stats``.
+
+    Other Parameters
+        radius / position / optimize / refine / filter / show_diag / threshold / max_chords / top_k
+            Same as in :func:`cachai.chplot.chord`.
+        node_gap / min_dist / scale / max_rho / max_rho_radius / dtype
+            Same as in :func:`cachai.chplot.chord`.
+        cache : :class:`bool` or :class:`LayoutCache`
+            On-disk layout cache, as ``layout_cache`` in :func:`cachai.chplot.chord`. Loading a
+            cached layout skips the ordering and the geometry (default: None, no cache)
+        validate : :class:`bool`
+            Same as in :func:`cachai.chplot.chord` (default: True)
+
+    Examples
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    .. code-block:: python
+        :class: mock-block
+
+        from   concurrent.futures import ProcessPoolExecutor
+        import cachai.chplot as chp
+        from   cachai.layout import chord_layout
+
+        with ProcessPoolExecutor() as pool:
+            layouts = list(pool.map(chord_layout, corr_matrices))
+
+        chp.chord(layouts[0], legend=True)
+
+    Reports drawn again from the same data can keep their layouts on disk:
+
+    .. code-block:: python
+        :class: mock-block
+
+        from   cachai.layout import chord_layout, LayoutCache
+
+        cache  = LayoutCache(max_bytes=2**30)      # In cachai's cache directory
+        layout = chord_layout(corr_matrix, optimize='clustering', cache=cache)
+        cache.clear()                              # Removes the cached layouts
+    """
+    layout = ChordLayout(corr_matrix,names,radius=radius,position=position,optimize=optimize,
+                         refine=refine,filter=filter,show_diag=show_diag,threshold=threshold,
+                         max_chords=max_chords,top_k=top_k,node_gap=node_gap,min_dist=min_dist,
+                         scale=scale,max_rho=max_rho,max_rho_radius=max_rho_radius,dtype=dtype,
+                         validate=validate)
+    return layout.compute(cache)
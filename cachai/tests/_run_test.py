@@ -1,5 +1,4 @@
 import sys
-import matplotlib.pyplot as plt
 from   pathlib import Path
 from   importlib.util import find_spec
 
@@ -178,5 +177,6 @@ def run_tests(*test_args,show_details=False):
     else:
         pytest_args.append(str(test_dir))
 
+    import matplotlib.pyplot as plt
     plt.close('all')
     return pytest.main(pytest_args)
\ No newline at end of file
@@ -1,8 +1,19 @@
+import os
 import pytest
+import io
 import time
+import pickle
 import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 import matplotlib.pyplot as plt
-from   cachai.chplot import chord
+from   cachai.chplot import chord, BlendCache
+from   cachai.layout import chord_layout, LayoutCache
+import cachai._core.ordering as cho
+import cachai._core.geometry as chgeo
+import cachai._core.layout as chlay
+from   matplotlib.path import Path
+from   matplotlib.transforms import Affine2D
 
 @pytest.fixture
 def sample_corr_matrix():
@@ -167,3 +178,701 @@ class TestChordDiagram:
 	def test_highlighting_chords(self,sample_corr_matrix,node,c):
 		temp_cd = chord(corr_matrix=sample_corr_matrix,th=0)
 		temp_cd.highlight_chord(node,c)
+
+	@pytest.mark.parametrize('collection', [False,True], ids=['patches','collection'])
+	def test_highlight(self,collection):
+		np.random.seed(5)
+		data = np.random.randn(200, 8)
+		data[:,1::2] += data[:,::2]
+		matrix = np.corrcoef(data.T)
+		params = dict(threshold=0.1,blend=False,collection=collection,names=[f'v{i}' for i in range(8)])
+		fig, axes = plt.subplots(1,2)
+		batch_cd = chord(corr_matrix=matrix,ax=axes[0],**params)
+		loop_cd  = chord(corr_matrix=matrix,ax=axes[1],**params)
+		def alphas(cd):
+			if collection: return np.concatenate([c.get_facecolor()[:,3] for c in cd.chord_collections])
+			return np.array([p.get_alpha() for patches in cd.chord_patches for p in patches])
+		# Same result as highlighting the chords one by one
+		batch_cd.highlight(nodes=[1],chords=[(3,0)],alpha=0.9)
+		loop_cd.highlight_node(1,alpha=0.9)
+		loop_cd.highlight_chord(3,0,alpha=0.9)
+		assert np.allclose(alphas(batch_cd), alphas(loop_cd))
+		# Pairs by name or index, in any order
+		a, b = batch_cd.chord_source[-1], batch_cd.chord_target[-1]
+		batch_cd.highlight(pairs=[(batch_cd.names[b],batch_cd.names[a])])
+		loop_cd.highlight(pairs=[(int(a),int(b))])
+		assert np.allclose(alphas(batch_cd), alphas(loop_cd))
+		assert np.count_nonzero(alphas(batch_cd) > batch_cd.off_alpha) < len(batch_cd.chord_source)
+		batch_cd.clear_highlights()
+		assert np.allclose(alphas(batch_cd), batch_cd.chord_alpha)
+		# Empty selections change nothing
+		batch_cd.highlight()
+		batch_cd.highlight(chords=[])
+		batch_cd.highlight_node(1,chords=[])
+		batch_cd.highlight(index=[])
+		assert np.allclose(alphas(batch_cd), batch_cd.chord_alpha)
+		with pytest.raises(ValueError):
+			batch_cd.highlight(pairs=[('v0','unknown')])
+		with pytest.raises(IndexError):
+			batch_cd.highlight(nodes=[8])
+		with pytest.raises(IndexError):
+			batch_cd.highlight(chords=[(0,100)])
+		plt.close(fig)
+
+	def test_chord_table(self):
+		np.random.seed(5)
+		data = np.random.randn(200, 8)
+		data[:,1::2] += data[:,::2]
+		matrix = np.corrcoef(data.T)
+		temp_cd = chord(corr_matrix=matrix,threshold=0.1,blend=False,names=[f'v{i}' for i in range(8)])
+		table = temp_cd.chord_table
+		assert len(table) == len(temp_cd.chord_source)
+		assert np.all(table['source'] <= table['target'])
+		for k,row in table.iterrows():
+			assert temp_cd.get_chord(row['target_name'],row['source_name']) == k
+			assert temp_cd.chord_patches[row['source']][row['patch']] is not None
+		assert np.allclose(np.abs(table['rho']), np.abs(matrix[np.ix_(temp_cd.order,temp_cd.order)][
+							table['source'],table['target']]))
+		name = temp_cd.names[np.argmax(np.bincount(np.r_[table['source'],table['target']]))]
+		top  = temp_cd.top_chords(name,k=2)
+		assert len(top) == 2 and np.all(np.diff(np.abs(top['rho'])) <= 0)
+		assert np.all((top['source_name'] == name) | (top['target_name'] == name))
+		strong = table.index[table['rho'].abs() > 0.5]
+		temp_cd.highlight(index=strong)
+		alphas = np.array([p.get_alpha() for patches in temp_cd.chord_patches for p in patches])
+		assert np.all((alphas > temp_cd.off_alpha) == np.isin(np.arange(len(table)),strong))
+		with pytest.raises(ValueError):
+			temp_cd.get_chord('v0','unknown')
+
+	@pytest.mark.parametrize('values', [None,[0.0,0.2,0.5,0.9]], ids=['continuous','ties'])
+	def test_optimization_order(self,values):
+		# Reference nested-loop Prim's algorithm (previous implementation)
+		def reference_order(distances):
+			visited = {np.argmin(np.sum(distances, axis=0))}
+			order   = list(visited)
+			while len(visited) < len(distances):
+				min_dist, next_node = np.inf, -1
+				for node in visited:
+					for neighbor in range(len(distances)):
+						if neighbor not in visited and distances[node,neighbor] < min_dist:
+							min_dist, next_node = distances[node,neighbor], neighbor
+				visited.add(next_node)
+				order.append(next_node)
+			return order
+
+		rng = np.random.default_rng(7)
+		for size in [2,5,17,33]:
+			if values is None: base = rng.random((size,size))
+			else: base = rng.choice(values,size=(size,size))
+			matrix = (base + base.T) / 2
+			np.fill_diagonal(matrix, 1.0)
+			distances = cho.distance_matrix(matrix)
+			assert cho.prim_order(distances) == reference_order(distances),\
+					'The optimized order differs from the reference order'
+
+	def test_optimization_scaling(self):
+		np.random.seed(42)
+		size = 1000
+		base = np.random.rand(size, size)
+		large_matrix = (base + base.T) / 2
+		np.fill_diagonal(large_matrix, 1.0)
+
+		start_time = time.time()
+		order = cho.prim_order(cho.distance_matrix(large_matrix))
+		assert time.time() - start_time < 2, 'Node ordering took too long'
+		assert sorted(order) == list(range(size)), 'The optimization lost some nodes'
+
+	@pytest.mark.parametrize('strategy', [True,'greedy','clustering','spectral'],
+							 ids=['True','greedy','clustering','spectral'])
+	def test_optimization_strategies(self,strategy):
+		# Block-structured matrix with shuffled variables
+		rng    = np.random.default_rng(3)
+		labels = rng.integers(0, 4, 24)
+		matrix = np.where(labels[:,None] == labels[None,:], 0.8, 0.15)
+		np.fill_diagonal(matrix, 1.0)
+
+		temp_cd = chord(corr_matrix=matrix,optimize=strategy,blend=False)
+		plt.close()
+		stats = temp_cd.order_stats
+		assert sorted(temp_cd.order) == list(range(24)),\
+				'The optimization lost some nodes'
+		assert stats['strategy'] == ('greedy' if strategy is True else strategy)
+		assert stats['time'] >= 0
+		assert stats['score'] > cho.order_quality(matrix, range(24)),\
+				'The optimized order is not better than the original one'
+		# Same score in blocks of rows, and for the sparse matrix
+		for block_size in (1, 50):
+			assert np.isclose(cho.order_quality(matrix, temp_cd.order, block_size=block_size), stats['score'])
+		assert np.isclose(cho.order_quality(sp.csr_array(matrix), temp_cd.order), stats['score'])
+
+	def test_optimization_callable(self,sample_corr_matrix):
+		temp_cd = chord(corr_matrix=sample_corr_matrix,th=0,optimize=lambda m: [2,0,1])
+		plt.close()
+		assert temp_cd.order == [2,0,1]
+		with pytest.raises(ValueError):
+			chord(corr_matrix=sample_corr_matrix,optimize=lambda m: [0,0,1])
+		with pytest.raises(ValueError):
+			chord(corr_matrix=sample_corr_matrix,optimize='unknown')
+
+	def test_crossings_count(self):
+		# Reference: every pair of chords checked one by one
+		def reference_crossings(adjacency):
+			chords = [(a,b) for a in range(len(adjacency))
+							for b in range(a+1,len(adjacency)) if adjacency[a,b]]
+			return sum(1 for k,(a,b) in enumerate(chords) for (c,d) in chords[k+1:]
+					   if a < c < b < d or c < a < d < b)
+
+		rng = np.random.default_rng(11)
+		for size in [3,6,12]:
+			base      = rng.random((size,size))
+			adjacency = cho.chord_adjacency((base + base.T) / 2, 0.5)
+			order     = rng.permutation(size)
+			assert cho.count_crossings(adjacency,order) ==\
+				   reference_crossings(adjacency[np.ix_(order,order)])
+			assert cho.count_crossings(sp.csr_array(adjacency),order) ==\
+				   reference_crossings(adjacency[np.ix_(order,order)])
+
+	def test_crossings_refinement(self):
+		np.random.seed(42)
+		size = 30
+		base = np.random.rand(size, size)
+		large_matrix = (base + base.T) / 2
+		np.fill_diagonal(large_matrix, 1.0)
+
+		temp_cd = chord(corr_matrix=large_matrix,threshold=0.7,refine=True,blend=False)
+		plt.close()
+		stats = temp_cd.crossing_stats
+		assert sorted(temp_cd.order) == list(range(len(temp_cd.names))),\
+				'The refinement lost some nodes'
+		assert stats['crossings'] < stats['initial_crossings'],\
+				'The refinement did not reduce the crossings'
+		adjacency = cho.chord_adjacency(temp_cd.corr_matrix, 0.7)
+		assert cho.count_crossings(adjacency) == stats['crossings'],\
+				'The refined diagram does not match the reported crossings'
+
+	@pytest.mark.parametrize('optimize', [True,'clustering','spectral'])
+	def test_sparse_input(self,optimize):
+		np.random.seed(8)
+		data = np.random.randn(200, 12)
+		data[:,1::2] += data[:,::2]
+		matrix = np.corrcoef(data.T)
+		params = dict(threshold=0.2,optimize=optimize,refine=True,show_diag=True,blend=False)
+		dense_cd  = chord(corr_matrix=matrix,**params)
+		sparse_cd = chord(corr_matrix=sp.csr_array(matrix),**params)
+		plt.close()
+		# With every entry stored, the layout is the same as for the dense matrix
+		assert sparse_cd.order == dense_cd.order
+		assert np.array_equal(sparse_cd.chord_source, dense_cd.chord_source)
+		assert np.array_equal(sparse_cd.chord_target, dense_cd.chord_target)
+		assert np.allclose(sparse_cd.ports['ports_i'].toarray(),
+						   np.where(dense_cd.ports['ports_state'] > 0, dense_cd.ports['ports_i'], 0))
+		assert sparse_cd.nodes[3]['ports_state'] == dense_cd.nodes[3]['ports_state']
+
+		# Edge list with the pairs above the threshold, by name
+		rows, cols = np.nonzero(np.triu(np.abs(matrix) >= 0.2, k=1))
+		names = [f'v{i}' for i in range(12)]
+		edges = pd.DataFrame({'source' : [names[i] for i in rows],
+							  'target' : [names[j] for j in cols],
+							  'rho'    : matrix[rows,cols]})
+		edge_cd = chord(corr_matrix=edges,**params)
+		plt.close()
+		assert sorted(edge_cd.names) == sorted(set(edges['source']) | set(edges['target']))
+		assert len(edge_cd.chord_source) == len(edges) + len(edge_cd.names)
+		a, b = edges.iloc[0][['source','target']]
+		assert np.isclose(edge_cd.chord_rho[edge_cd.get_chord(a,b)], edges.iloc[0]['rho'])
+		edge_cd.update(edges.assign(rho=edges['rho']*0.99))
+		assert edge_cd.update_stats['added_chords'] == 0
+		with pytest.raises(ValueError):
+			edge_cd.update(pd.DataFrame({'source':['v0'],'target':['unknown'],'rho':[0.5]}))
+		with pytest.raises(ValueError):
+			chord(corr_matrix=sp.csr_array(np.triu(matrix)))
+
+	def test_edge_list_names(self):
+		edges = pd.DataFrame({'source' : ['y','y','x'],
+							  'target' : ['x','z','z'],
+							  'rho'    : [0.9,0.5,-0.3]})
+		# The given names set the nodes, whatever the order of the edges
+		temp_cd = chord(corr_matrix=edges,names=['x','y','z'],optimize=False,blend=False)
+		plt.close()
+		assert temp_cd.names == ['x','y','z']
+		for (a,b),rho in (('xy',0.9),('yz',0.5),('xz',-0.3)):
+			assert np.isclose(temp_cd.chord_rho[temp_cd.get_chord(a,b)], rho)
+		temp_cd.update(edges.assign(rho=edges['rho']*0.5))
+		for (a,b),rho in (('xy',0.45),('yz',0.25),('xz',-0.15)):
+			assert np.isclose(temp_cd.chord_rho[temp_cd.get_chord(a,b)], rho)
+
+	@pytest.mark.parametrize('sparse', [False,True], ids=['dense','sparse'])
+	def test_chord_budget(self,sparse):
+		np.random.seed(4)
+		base = np.random.rand(40, 40) * 2 - 1
+		matrix = (base + base.T) / 2
+		np.fill_diagonal(matrix, 1.0)
+		if sparse: matrix = sp.csr_array(matrix)
+		params = dict(threshold=0.05,blend=False,collection=True)
+
+		temp_cd = chord(corr_matrix=matrix,max_chords=50,**params)
+		stats = temp_cd.pruning_stats
+		assert len(temp_cd.chord_source) == stats['chords'] == 50
+		assert stats['candidates'] == stats['chords'] + stats['dropped']
+		assert stats['dropped_max_rho'] <= np.min(np.abs(temp_cd.chord_rho))
+
+		temp_cd = chord(corr_matrix=matrix,top_k=2,filter=False,**params)
+		degree = np.bincount(np.r_[temp_cd.chord_source,temp_cd.chord_target], minlength=40)
+		assert np.all(degree >= 2)
+		for n in range(40):
+			# The strongest chords of every node are kept
+			rhos = np.abs(temp_cd.corr_matrix[[n]].toarray()[0] if sparse else temp_cd.corr_matrix[n])
+			rhos[n] = 0
+			for m in np.argsort(-rhos)[:2]:
+				temp_cd.get_chord(n,int(m))
+		temp_cd.update(matrix * 0.9)
+		assert temp_cd.pruning_stats['chords'] == len(temp_cd.chord_source)
+		plt.close()
+		# Budgets are checked up front, naming the wrong parameter
+		for budget in (dict(max_chords=-1),dict(max_chords=0),dict(top_k=0),dict(top_k=2.5),
+					   dict(max_chords=True)):
+			with pytest.raises(ValueError, match=list(budget)[0]):
+				chord(corr_matrix=matrix,**budget)
+		assert chord_layout(matrix,max_chords=np.int64(5)).pruning_stats['chords'] <= 5
+
+	def test_chord_layout(self):
+		np.random.seed(6)
+		data = np.random.randn(200, 10)
+		data[:,1::2] += data[:,::2]
+		matrix = np.corrcoef(data.T)
+		params = dict(threshold=0.2,refine=True,show_diag=True)
+		layout = pickle.loads(pickle.dumps(chord_layout(matrix,**params)))
+		assert np.array_equal(layout.names, np.array(layout.input_names)[layout.node_index])
+		anchors = layout.label_anchors
+		assert np.allclose(np.hypot(anchors['x'], anchors['y']), 1.0)
+		assert len(layout.chord_geometry['mid']) == len(layout.chord_source)
+
+		# The diagram draws the same layout, computed or given
+		images = []
+		for corr_matrix in (matrix, layout):
+			fig, ax = plt.subplots(figsize=(3,3), dpi=50)
+			temp_cd = chord(corr_matrix=corr_matrix,ax=ax,blend=False,**params)
+			fig.canvas.draw()
+			images.append(np.asarray(fig.canvas.buffer_rgba()).copy())
+			plt.close(fig)
+			assert temp_cd.order == layout.order
+			assert np.array_equal(temp_cd.chord_source, layout.chord_source)
+			assert np.array_equal(temp_cd.chord_geometry['vertices'], layout.chord_geometry['vertices'])
+		assert np.array_equal(*images)
+		# Updating the diagram keeps the given layout
+		temp_cd.update(matrix * 0.9)
+		assert not np.allclose(temp_cd.chord_rho, layout.chord_rho)
+
+	def test_layout_cache(self,tmp_path):
+		np.random.seed(6)
+		data = np.random.randn(200, 10)
+		data[:,1::2] += data[:,::2]
+		matrix = np.corrcoef(data.T)
+		params = dict(threshold=0.2,refine=True,show_diag=True,optimize='clustering')
+		cache  = LayoutCache(tmp_path)
+		for corr_matrix in (sp.csr_array(matrix), matrix):
+			computed = chord_layout(corr_matrix,cache=cache,**params)
+			loaded   = chord_layout(corr_matrix,cache=cache,**params)
+			assert loaded.order == computed.order and loaded.names == computed.names
+			assert loaded.order_stats == computed.order_stats
+			assert np.array_equal(loaded.chord_ends, computed.chord_ends)
+			for key in computed.chord_geometry:
+				assert np.array_equal(loaded.chord_geometry[key], computed.chord_geometry[key])
+		assert cache.stats['hits'] == 2 and cache.stats['entries'] == 2
+
+		# Diagrams use it too, and other parameters are other layouts
+		fig, ax = plt.subplots(figsize=(3,3), dpi=50)
+		temp_cd = chord(corr_matrix=matrix,ax=ax,blend=False,layout_cache=cache,**params)
+		plt.close(fig)
+		assert cache.stats['hits'] == 3
+		assert np.array_equal(temp_cd.chord_geometry['vertices'], computed.chord_geometry['vertices'])
+		chord_layout(matrix,cache=cache,**{**params,'threshold':0.3})
+		assert cache.stats['entries'] == 3
+
+		# Least recently used layouts go first
+		cache.max_bytes = cache.stats['bytes'] - 1
+		chord_layout(matrix,cache=cache,**params)
+		chord_layout(matrix,cache=cache,**{**params,'node_gap':0.2})
+		assert cache.stats['bytes'] <= cache.max_bytes
+		assert chord_layout(matrix,cache=cache,**params).order == computed.order
+		assert cache.stats['hits'] == 5
+		cache.clear()
+		assert len(cache) == 0 and list(tmp_path.glob('*.npz')) == []
+
+	def test_input_pipeline(self):
+		np.random.seed(9)
+		data   = np.random.randn(100, 30)
+		matrix = np.corrcoef(data.T)
+		# Blockwise symmetry check, same tolerance as np.allclose
+		for block_size in (1, 64, 2**20):
+			assert chlay.is_symmetric(matrix, block_size=block_size)
+			for delta in (1e-9, 1e-3):
+				asymmetric = matrix.copy()
+				asymmetric[3, 20] += delta
+				assert chlay.is_symmetric(asymmetric, block_size=block_size) == np.allclose(asymmetric, asymmetric.T)
+		infinite = matrix.copy()
+		infinite[0, 1], infinite[1, 0] = np.inf, -np.inf
+		assert not chlay.is_symmetric(infinite, block_size=64)
+		# DataFrames are used without a copy, and validate=False skips the symmetry check
+		frame  = pd.DataFrame(matrix, columns=[f'V{i}' for i in range(30)])
+		layout = chlay.ChordLayout(frame, optimize=False, threshold=0.0)
+		assert np.shares_memory(layout.corr_matrix, frame.to_numpy())
+		assert layout.names == frame.columns.tolist()
+		layout.compute()
+		assert np.shares_memory(layout.corr_matrix, frame.to_numpy()) # All the nodes are kept
+		asymmetric = matrix.copy()
+		asymmetric[3, 20] += 1e-3
+		with pytest.raises(ValueError):
+			chord_layout(asymmetric)
+		with pytest.raises(TypeError):
+			chord_layout(asymmetric.astype(int), validate=False)
+		layout = chord_layout(asymmetric, validate=False, threshold=0.2)
+		assert layout.validate is False
+		with pytest.raises(ValueError):
+			chord_layout(matrix, threshold=0.2).set_matrix(asymmetric)
+		layout.set_matrix(asymmetric)
+
+	@pytest.mark.parametrize('show_diag', [False,True], ids=['show_diag=False','show_diag=True'])
+	def test_port_layout(self,show_diag):
+		np.random.seed(42)
+		size = 12
+		base = np.random.rand(size, size) * 2 - 1
+		matrix = (base + base.T) / 2
+		np.fill_diagonal(matrix, 1.0)
+
+		temp_cd = chord(corr_matrix=matrix,threshold=0.2,show_diag=show_diag,
+						filter=False,optimize=False,blend=False)
+		plt.close()
+		ports   = temp_cd.ports
+		allowed = ports['ports_state'] > 0
+		assert ports['ports_i'].shape == (size, size+1)
+		assert np.all(np.abs(ports['rhos'][allowed]) >= 0.2)
+		for n in range(size):
+			theta_i = temp_cd.node_angles['theta_i'][n]
+			arc     = temp_cd.node_angles['theta_arc'][n]
+			# Allowed ports are contiguous and fill the node arc
+			port_i, port_f = ports['ports_i'][n][allowed[n]], ports['ports_f'][n][allowed[n]]
+			assert np.allclose(port_i[1:], port_f[:-1])
+			assert np.isclose(port_i[0], theta_i) and np.isclose(port_f[-1], theta_i + arc)
+			# Compatibility view of the nodes
+			node = temp_cd.nodes[n]
+			assert f'{n}*' in node['ports']
+			assert node['ports'][n]['i'] == ports['ports_i'][n,n]
+			assert (node['ports_state'][n] > 0) == show_diag
+
+	def test_chord_paths(self,sample_corr_matrix):
+		temp_cd  = chord(corr_matrix=sample_corr_matrix,th=0,show_diag=True,blend=False)
+		plt.close()
+		geometry = temp_cd.chord_geometry
+		offsets  = geometry['offsets']
+		assert len(offsets) == len(temp_cd.chord_source) + 1
+		assert np.all(geometry['codes'][offsets[:-1]] == Path.MOVETO)
+		# Closed paths: the last vertex of each chord is the first one
+		assert np.allclose(geometry['vertices'][offsets[1:]-1], geometry['vertices'][offsets[:-1]])
+		flat_patches = [p for plist in temp_cd.chord_patches for p in plist]
+		for k,patch in enumerate(flat_patches):
+			path = patch.get_path()
+			assert np.allclose(path.vertices, geometry['vertices'][offsets[k]:offsets[k+1]])
+			assert np.allclose(geometry['mid'][k,0], path.vertices[np.argmax(path.codes == Path.CURVE3)-1])
+
+	def test_chord_paths_scaling(self):
+		rng     = np.random.default_rng(0)
+		n       = 20000
+		alpha_i = rng.random(n) * 2*np.pi
+		beta_i  = rng.random(n) * 2*np.pi
+		start_time = time.time()
+		geometry = chgeo.chord_paths(alpha_i, alpha_i + 0.02, beta_i, beta_i + 0.02, rng.random(n) * 0.4)
+		assert time.time() - start_time < 1, 'Chord geometry took too long'
+		assert len(geometry['offsets']) == n + 1
+		assert geometry['mid'].shape == (n, 3, 2)
+
+	@pytest.mark.parametrize('blend', [False,True], ids=['blend=False','blend=True'])
+	def test_collection_mode(self,figure_with_axes,sample_corr_matrix,blend):
+		fig, ax = figure_with_axes
+		temp_cd = chord(corr_matrix=sample_corr_matrix,th=0,collection=True,blend=blend,ax=ax)
+		n_chords = len(temp_cd.chord_source)
+		assert sum(len(chords) for chords in temp_cd.chord_patches) == 0
+		assert len(temp_cd.node_patches) == 0
+		assert len(temp_cd.node_collection.get_paths()) == 3
+		# One collection per hatch (positive and negative correlations)
+		assert len(temp_cd.chord_collections) == 2
+		assert sum(len(c.get_paths()) for c in temp_cd.chord_collections) == n_chords
+
+		temp_cd.highlight_node(0)
+		edge_alphas = np.concatenate([c.get_edgecolor()[:,3] for c in temp_cd.chord_collections])
+		assert np.sum(np.isclose(edge_alphas, temp_cd.chord_alpha)) == 2,\
+				'Highlighted chords do not keep their alpha'
+		assert np.sum(np.isclose(edge_alphas, temp_cd.off_alpha)) == n_chords - 2
+		temp_cd.set_chord_alpha(0.3)
+		for collection in temp_cd.chord_collections:
+			assert np.allclose(collection.get_edgecolor()[:,3], 0.3)
+		fig.canvas.draw()
+
+	def test_texture_blend(self,figure_with_axes,sample_corr_matrix):
+		fig, ax = figure_with_axes
+		temp_cd = chord(corr_matrix=sample_corr_matrix,th=0,blend='texture',blend_resolution=50,ax=ax)
+		n_chords = len(temp_cd.chord_source)
+		assert len(ax.images) == 1
+		assert sum(len(blends) for blends in temp_cd.chord_blends) == 0
+		texture = temp_cd.blend_texture.get_array() / 255
+		assert texture.shape == (100, 100, 4)
+		# Overlapping chords are composited, like one image per chord
+		assert np.max(texture[...,3]) <= 1 - (1 - temp_cd.chord_alpha)**n_chords + 1/255
+		assert np.min(texture[...,3][texture[...,3] > 0]) >= temp_cd.chord_alpha - 1/255
+
+		temp_cd.highlight_node(0)
+		alphas = temp_cd.blend_texture.get_chord_alphas()
+		assert np.sum(np.isclose(alphas, temp_cd.chord_alpha)) == 2
+		assert np.sum(np.isclose(alphas, temp_cd.off_alpha)) == n_chords - 2
+		temp_cd.set_chord_alpha(0)
+		assert np.all(temp_cd.blend_texture.get_array()[...,3] == 0)
+		fig.canvas.draw()
+		with pytest.raises(ValueError):
+			chord(corr_matrix=sample_corr_matrix,blend='unknown',ax=ax)
+
+	def test_chord_mesh(self,figure_with_axes,sample_corr_matrix):
+		fig, ax = figure_with_axes
+		temp_cd = chord(corr_matrix=sample_corr_matrix,th=0,blend=False,ax=ax)
+		mesh    = chgeo.chord_mesh(temp_cd.chord_geometry,temp_cd.chord_index,n=20)
+		assert mesh['triangles'].max() < len(mesh['points'])
+		assert np.all((mesh['t'] >= 0) & (mesh['t'] <= 1))
+		# The triangles cover each chord
+		corners = mesh['points'][mesh['triangles']]
+		edges   = corners[:,1:] - corners[:,:1]
+		areas   = np.abs(edges[:,0,0]*edges[:,1,1] - edges[:,0,1]*edges[:,1,0])/2
+		for k,patch in enumerate(temp_cd.chord_patches[0] + temp_cd.chord_patches[1]):
+			# Flattened in a larger scale, so the curves are followed closely
+			x, y = patch.get_path().to_polygons(Affine2D().scale(1000),closed_only=False)[0].T / 1000
+			area = np.abs(np.dot(x,np.roll(y,1)) - np.dot(y,np.roll(x,1)))/2
+			assert np.isclose(np.sum(areas[mesh['triangle_chord'] == k]), area, rtol=0.02)
+
+	def test_mesh_blend(self,figure_with_axes,sample_corr_matrix):
+		fig, ax = figure_with_axes
+		temp_cd = chord(corr_matrix=sample_corr_matrix,th=0,blend='mesh',ax=ax)
+		n_chords = len(temp_cd.chord_source)
+		assert len(ax.images) == 0
+		assert sum(len(blends) for blends in temp_cd.chord_blends) == 0
+		temp_cd.highlight_node(0)
+		alphas = temp_cd.blend_mesh.get_chord_alphas()
+		assert np.sum(np.isclose(alphas, temp_cd.chord_alpha)) == 2
+		assert np.sum(np.isclose(alphas, temp_cd.off_alpha)) == n_chords - 2
+		fig.canvas.draw()
+		fig.savefig(io.BytesIO(), format='pdf')
+
+	def test_mesh_layers(self,sample_corr_matrix):
+		# Every chord is composited from a layer of its own size, clipped as the axes
+		fig, ax = plt.subplots(figsize=(3,3), dpi=80)
+		temp_cd = chord(corr_matrix=sample_corr_matrix,th=0,blend='mesh',ax=ax)
+		ax.set_xlim(-0.3,1.3)
+		ax.set_ylim(-0.5,0.8)
+		canvases = []
+		for visible in (True,False):
+			temp_cd.blend_mesh.set_visible(visible)
+			fig.canvas.draw()
+			canvases.append(np.asarray(fig.canvas.buffer_rgba()).astype(int))
+		changed = np.any(canvases[0] != canvases[1], axis=2)
+		x0, y0, x1, y1 = ax.bbox.extents
+		height = canvases[0].shape[0]
+		rows, cols = np.nonzero(changed)
+		assert len(rows) > 0
+		assert cols.min() >= np.floor(x0) and cols.max() <= np.ceil(x1)
+		assert rows.min() >= np.floor(height - y1) and rows.max() <= np.ceil(height - y0)
+		plt.close(fig)
+
+	def test_mesh_layers_rasterized(self,sample_corr_matrix,monkeypatch):
+		# Rasterized meshes on vector backends are drawn in layers by the underlying Agg renderer
+		fig, ax  = plt.subplots(figsize=(3,3), dpi=80)
+		temp_cd  = chord(corr_matrix=sample_corr_matrix,th=0,blend='mesh',ax=ax)
+		mesh     = temp_cd.blend_mesh
+		layers   = []
+		draw_layer = type(mesh)._draw_layer
+		monkeypatch.setattr(type(mesh), '_draw_layer',
+							lambda self, *args: layers.append(draw_layer(self, *args)))
+		mesh.set_rasterized(True)
+		for fmt in ('pdf','svg'):
+			layers.clear()
+			fig.savefig(io.BytesIO(), format=fmt)
+			assert len(layers) == np.count_nonzero(mesh._chord_alphas > 0)
+		plt.close(fig)
+
+	@pytest.mark.parametrize('blend', [True,'texture'])
+	def test_blend_cache(self,figure_with_axes,sample_corr_matrix,blend,tmp_path):
+		fig, ax = figure_with_axes
+		cache   = BlendCache(directory=tmp_path)
+		first   = chord(corr_matrix=sample_corr_matrix,th=0,blend=blend,blend_cache=cache,ax=ax)
+		n_chords = len(first.chord_source)
+		assert cache.stats['misses'] == n_chords and cache.stats['hits'] == 0
+		# Same layout with other colors: every blend map comes from the cache
+		second = chord(corr_matrix=sample_corr_matrix,th=0,blend=blend,blend_cache=cache,ax=ax,
+					   colors=['k','r','b'])
+		assert cache.stats['hits'] == n_chords
+		if blend is True:
+			for a,b in zip(first.chord_blends[0],second.chord_blends[0]):
+				assert np.array_equal(a.get_array().filled(np.nan),b.get_array().filled(np.nan),equal_nan=True)
+		# Persisted on disk
+		assert len(list(tmp_path.glob('*.npz'))) == n_chords
+		reloaded = BlendCache(directory=tmp_path)
+		chord(corr_matrix=sample_corr_matrix,th=0,blend=blend,blend_cache=reloaded,ax=ax)
+		assert reloaded.stats['hits'] == n_chords and reloaded.stats['misses'] == 0
+		cache.clear(disk=True)
+		assert len(cache) == 0 and len(list(tmp_path.glob('*.npz'))) == 0
+
+	def test_blend_cache_budget(self):
+		cache = BlendCache(max_bytes=2000)
+		for i in range(4): cache.put(cache.key('test',i),(np.zeros(100),))
+		# Only the two most recent entries fit (800 bytes each)
+		assert len(cache) == 2 and cache.nbytes <= 2000
+		assert cache.get(cache.key('test',0)) is None
+		assert cache.get(cache.key('test',3)) is not None
+		assert cache.key(np.array([0.1+1e-12,-0.0])) == cache.key(np.array([0.1,0.0]))
+		assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+
+	def test_blend_cache_disk_budget(self,tmp_path):
+		cache = BlendCache(directory=tmp_path,max_disk_bytes=20000)
+		for i in range(4):
+			cache.put(cache.key('test',i),(np.full(1000,i),))
+			os.utime(tmp_path / f'{cache.key("test",i)}.npz',(i,i)) # Distinct times of use
+		# The least recently used files are removed first
+		files = sorted(tmp_path.glob('*.npz'))
+		assert len(files) == 2 and sum(f.stat().st_size for f in files) <= 20000
+		reloaded = BlendCache(directory=tmp_path)
+		assert reloaded.get(reloaded.key('test',0)) is None
+		assert reloaded.get(reloaded.key('test',3))[0][0] == 3
+		cache.clear(disk=True)
+		assert not list(tmp_path.glob('*.npz'))
+
+	@pytest.mark.parametrize('blend', [True,'texture'])
+	def test_blend_workers(self,figure_with_axes,blend):
+		fig, ax = figure_with_axes
+		np.random.seed(42)
+		base = np.random.rand(10, 10)
+		large_matrix = (base + base.T) / 2
+		np.fill_diagonal(large_matrix, 1.0)
+		images  = []
+		for workers in [None,3]:
+			ax.clear()
+			chord(corr_matrix=large_matrix,threshold=0.6,blend=blend,blend_resolution=40,
+				  blend_cache=BlendCache(),workers=workers,ax=ax)
+			images.append([image.get_array().filled(np.nan) for image in ax.images])
+		assert len(images[0]) == len(images[1]) > 0
+		for a,b in zip(*images):
+			assert np.array_equal(a,b,equal_nan=True)
+
+	def test_blend_release(self,figure_with_axes,sample_corr_matrix):
+		fig, ax = figure_with_axes
+		temp_cd = chord(corr_matrix=sample_corr_matrix,th=0,blend='texture',release_blends=True,
+						blend_cache=False,ax=ax)
+		texture = temp_cd.blend_texture.get_array()
+		assert texture.dtype == np.uint8 and np.any(texture[...,3] > 0)
+		assert len(temp_cd.blend_texture.texture) == 0
+		with pytest.raises(RuntimeError):
+			temp_cd.highlight_node(0)
+		fig.canvas.draw()
+
+	@pytest.mark.parametrize('blend,collection', [(False,False),(True,False),('texture',True),('mesh',False)])
+	def test_update(self,blend,collection):
+		np.random.seed(3)
+		data = np.random.randn(200, 10)
+		data[:,1::2] += data[:,::2]
+		old_matrix = np.corrcoef(data.T)
+		new_matrix = old_matrix.copy()
+		new_matrix[0,1] = new_matrix[1,0] = -0.9	# Changed chord
+		new_matrix[2,5] = new_matrix[5,2] = 0.6		# New chord
+		params = dict(threshold=0.3,blend=blend,collection=collection,blend_resolution=30,blend_cache=False)
+		fig, axes = plt.subplots(1,2)
+		temp_cd = chord(corr_matrix=old_matrix,ax=axes[0],**params)
+		patches = list(axes[0].patches)
+		temp_cd.highlight_node(0)
+		temp_cd.update(old_matrix)
+		assert temp_cd.update_stats['moved_nodes'] == 0
+		assert temp_cd.update_stats['kept_chords'] == len(temp_cd.chord_source)
+		temp_cd.update(new_matrix)
+		assert temp_cd.update_stats['added_chords'] == 1
+		assert all(patch in patches for patch in axes[0].patches[:len(patches)])
+		ref_cd = chord(corr_matrix=new_matrix,ax=axes[1],**params)
+		ref_cd.highlight_node(0)
+		assert temp_cd.names == ref_cd.names
+		assert np.array_equal(temp_cd.chord_source,ref_cd.chord_source)
+		assert np.array_equal(temp_cd.chord_target,ref_cd.chord_target)
+		assert np.allclose(temp_cd.chord_geometry['vertices'],ref_cd.chord_geometry['vertices'])
+		assert len(axes[0].images) == len(axes[1].images)
+		assert len(axes[0].patches) == len(axes[1].patches)
+		assert axes[0].get_aspect() == axes[1].get_aspect()
+		fig.canvas.draw()
+		# A matrix without chords is rejected, and the diagram is left as it was
+		vertices = temp_cd.chord_geometry['vertices'].copy()
+		with pytest.raises(ValueError, match='No nodes remaining'):
+			temp_cd.update(np.eye(10))
+		assert np.array_equal(temp_cd.corr_matrix, ref_cd.corr_matrix)
+		assert np.array_equal(temp_cd.chord_geometry['vertices'], vertices)
+		assert np.all(np.isfinite(temp_cd.node_angles['theta_i']))
+		temp_cd.update(old_matrix)
+		fig.canvas.draw()
+		plt.close(fig)
+
+	def test_update_order(self,figure_with_axes):
+		fig, ax = figure_with_axes
+		np.random.seed(4)
+		old_matrix = np.corrcoef(np.random.randn(100, 8).T)
+		new_matrix = np.corrcoef(np.random.randn(100, 8).T)
+		temp_cd = chord(corr_matrix=old_matrix,names=list('ABCDEFGH'),threshold=0.1,filter=False,ax=ax)
+		names   = list(temp_cd.names)
+		temp_cd.update(new_matrix)
+		assert temp_cd.names == names
+		temp_cd.update(new_matrix,keep_order=False)
+		fig2, ax2 = plt.subplots()
+		ref_cd = chord(corr_matrix=new_matrix,names=list('ABCDEFGH'),threshold=0.1,filter=False,ax=ax2)
+		assert temp_cd.names == ref_cd.names
+		assert [label.get_text() for label in temp_cd.node_labels] == ref_cd.names
+		with pytest.raises(ValueError):
+			temp_cd.update(new_matrix[:4,:4])
+		plt.close(fig2)
+
+	@pytest.mark.parametrize('blend,collection', [(False,False),(True,False),('texture',True),('mesh',False)])
+	def test_restyle(self,sample_corr_matrix,blend,collection):
+		style  = dict(c=['k','tab:orange','tab:green'],chord_alpha=0.4,negative_hatch='xx',clw=2,
+					  fontsize=9,legend=True)
+		params = dict(th=0,blend=blend,collection=collection,blend_resolution=30)
+		canvases = []
+		for restyle in [True,False]:
+			fig, ax = plt.subplots(figsize=(3,3))
+			if restyle:
+				temp_cd = chord(corr_matrix=sample_corr_matrix,ax=ax,**params)
+				artists = list(ax.images) + list(ax.collections)
+				temp_cd.restyle(**style)
+				assert all(artist.axes is ax for artist in artists)
+			else:
+				chord(corr_matrix=sample_corr_matrix,ax=ax,**params,**style)
+			fig.canvas.draw()
+			canvases.append(np.asarray(fig.canvas.buffer_rgba()).copy())
+			plt.close(fig)
+		assert np.array_equal(*canvases)
+		with pytest.raises(KeyError):
+			temp_cd.restyle(threshold=0.5)
+		with pytest.raises(ValueError):
+			temp_cd.restyle(colors=['k'])
+
+	@pytest.mark.parametrize('blend', [False,True,'texture','mesh'])
+	def test_float32_mode(self,blend):
+		np.random.seed(3)
+		data = np.random.randn(300, 40)
+		data[:,1::2] += data[:,::2]
+		matrix   = np.corrcoef(data.T)
+		canvases = []
+		for dtype in ('float64','float32'):
+			fig, ax = plt.subplots(figsize=(3,3), dpi=80)
+			temp_cd = chord(corr_matrix=matrix,ax=ax,threshold=0.2,blend=blend,blend_resolution=60,
+							blend_cache=False,dtype=dtype)
+			fig.canvas.draw()
+			canvases.append(np.asarray(fig.canvas.buffer_rgba()).astype(int))
+			plt.close(fig)
+			assert temp_cd.corr_matrix.dtype == dtype
+			assert temp_cd.ports['rhos'].dtype == dtype
+			assert temp_cd.chord_geometry['vertices'].dtype == dtype
+			if dtype == 'float64': reference = temp_cd
+		# Same diagram: same nodes and chords, and pixels off by at most one level
+		assert temp_cd.order == reference.order
+		assert np.array_equal(temp_cd.chord_source, reference.chord_source)
+		assert np.max(np.abs(canvases[0] - canvases[1])) <= 1
+		with pytest.raises(ValueError):
+			chord_layout(matrix,dtype='int8')
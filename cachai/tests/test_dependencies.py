@@ -1,4 +1,7 @@
+import os
+import sys
 import pytest
+import subprocess
 import importlib
 from   packaging import requirements
 
@@ -20,4 +23,20 @@ def test_dependency(dep):
             assert req.specifier.contains(mod.__version__), \
                 f'Your {req.name} version is {mod.__version__}, the requirement is {req.specifier}'
     except ImportError:
-        pytest.fail(f'{req.name} is not installed')
\ No newline at end of file
+        pytest.fail(f'{req.name} is not installed')
+
+# Heavy modules that must not be loaded by some imports of cachai
+LAZY_IMPORTS = [
+    ('cachai',        ['matplotlib','pandas','scipy','seaborn']),
+    ('cachai.layout', ['matplotlib','pandas','seaborn']),
+    ('cachai.chplot', ['matplotlib.pyplot','pandas','seaborn']),
+]
+
+@pytest.mark.parametrize('module,heavy', LAZY_IMPORTS)
+def test_lazy_imports(module,heavy):
+    code   = (f'import sys, {module}; '
+              f'print(",".join(m for m in {heavy!r} if m in sys.modules))')
+    result = subprocess.run([sys.executable,'-c',code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+    loaded = result.stdout.strip()
+    assert not loaded, f'import {module} loads {loaded}'
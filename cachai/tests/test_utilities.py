@@ -3,6 +3,7 @@ import pytest
 import numpy as np
 import matplotlib.pyplot as plt
 from   matplotlib.patches import Circle
+from   matplotlib.path import Path
 import cachai.utilities as chu
 
 @pytest.fixture
@@ -95,6 +96,116 @@ def test_map_from_curve(sample_curve):
     assert np.min(map_mat) >= -1
     assert np.max(map_mat) <= 1
 
+@pytest.mark.parametrize('method', ['grid','kdtree'])
+def test_map_from_curve_methods(method):
+    curve     = chu.equidistant(chu.get_bezier_curve([(0, 0), (1, 2), (3, 1)], n=30))
+    reference = chu.map_from_curve(curve, xlim=(0, 3), ylim=(0, 2), resolution=80, method='cdist')
+    map_mat   = chu.map_from_curve(curve, xlim=(0, 3), ylim=(0, 2), resolution=80, method=method)
+    assert map_mat.shape == reference.shape
+    assert np.mean(map_mat != reference) < 0.01
+    with pytest.raises(ValueError):
+        chu.map_from_curve(curve, method='unknown')
+
+@pytest.mark.parametrize('method', ['cdist','grid','kdtree'])
+def test_map_from_curve_float32(method):
+    curve     = chu.equidistant(chu.get_bezier_curve([(0, 0), (1, 2), (3, 1)], n=30))
+    reference = chu.map_from_curve(curve, xlim=(0, 3), ylim=(0, 2), resolution=80, method=method)
+    map_mat   = chu.map_from_curve(curve, xlim=(0, 3), ylim=(0, 2), resolution=80, method=method,
+                                   dtype='float32')
+    assert map_mat.dtype == np.float32
+    assert np.mean(map_mat != reference.astype(np.float32)) < 0.01
+    with pytest.raises(ValueError):
+        chu.map_from_curve(curve, dtype='int8')
+
+@pytest.mark.parametrize('method', ['cdist','grid','kdtree'])
+def test_map_from_curve_chunks_and_mask(method):
+    curve     = chu.equidistant(chu.get_bezier_curve([(0, 0), (1, 2), (3, 1)], n=30))
+    reference = chu.map_from_curve(curve, xlim=(0, 3), ylim=(0, 2), resolution=60, method=method,
+                                   max_memory=None)
+    # Chunked computation gives the same map
+    chunked = chu.map_from_curve(curve, xlim=(0, 3), ylim=(0, 2), resolution=60, method=method,
+                                 max_memory=4096)
+    assert np.array_equal(chunked, reference)
+    # Only the points inside the mask (grown by one point) are computed
+    mask    = Path.circle((1.5, 1), 0.5)
+    masked  = chu.map_from_curve(curve, xlim=(0, 3), ylim=(0, 2), resolution=60, method=method,
+                                 mask=mask, max_memory=4096)
+    x, y    = np.meshgrid(np.linspace(0, 3, 60), np.linspace(0, 2, 60))
+    inside  = mask.contains_points(np.column_stack((x.ravel(), y.ravel()))).reshape(60, 60)
+    known   = ~np.isnan(masked)
+    assert np.all(known[inside])
+    assert 0 < np.mean(known) < 0.5
+    assert np.array_equal(masked[known], reference[known])
+    # Boolean masks are used as they are
+    masked = chu.map_from_curve(curve, xlim=(0, 3), ylim=(0, 2), resolution=60, method=method,
+                                mask=inside)
+    assert np.array_equal(~np.isnan(masked), inside)
+    with pytest.raises(ValueError):
+        chu.map_from_curve(curve, resolution=60, mask=inside[:10])
+
+def test_map_from_curve_curved_mask():
+    # Quadratic Bézier arch y = x(2-x), closed by the x-axis
+    arch    = Path([(0, 0), (1, 2), (2, 0), (0, 0)], [Path.MOVETO, Path.CURVE3, Path.CURVE3, Path.CLOSEPOLY])
+    curve   = np.column_stack((np.linspace(0, 2, 50), np.zeros(50)))
+    masked  = chu.map_from_curve(curve, xlim=(0, 2), ylim=(0.05, 1.2), resolution=100, mask=arch)
+    x, y    = np.meshgrid(np.linspace(0, 2, 100), np.linspace(0.05, 1.2, 100))
+    # Curves are followed at the grid resolution (not flattened into a few segments)
+    inside  = y < x*(2 - x) - 0.05
+    outside = y > x*(2 - x) + 0.05
+    assert not np.any(np.isnan(masked[inside]))
+    assert np.all(np.isnan(masked[outside]))
+
+def test_map_from_curve_patch_mask():
+    # Patches are placed by their patch transform (a unit circle scaled and offset here)
+    curve   = np.column_stack((np.linspace(0, 3, 50), np.zeros(50)))
+    masked  = chu.map_from_curve(curve, xlim=(0, 3), ylim=(0, 2), resolution=100, mask=Circle((2, 1.2), 0.6))
+    x, y    = np.meshgrid(np.linspace(0, 3, 100), np.linspace(0, 2, 100))
+    radius  = np.hypot(x - 2, y - 1.2)
+    assert not np.any(np.isnan(masked[radius < 0.55]))
+    assert np.all(np.isnan(masked[radius > 0.65]))
+
+@pytest.mark.parametrize('dtype', ['uint8','uint16','float16'])
+def test_compact_map(dtype):
+    curve    = chu.equidistant(chu.get_bezier_curve([(0, 0), (1, 2), (3, 1)], n=30))
+    map_mat  = chu.map_from_curve(curve, xlim=(0, 3), ylim=(0, 2), resolution=40, mask=Path.circle((1.5, 1), 0.8))
+    compact  = chu.compact_map(map_mat, dtype)
+    assert compact.dtype == np.dtype(dtype)
+    assert compact.nbytes <= map_mat.nbytes / 4
+    if compact.dtype.kind == 'u':
+        levels = np.iinfo(compact.dtype).max
+        assert np.array_equal(compact == 0, np.isnan(map_mat))
+        restored = np.where(compact == 0, np.nan, (compact - 1) / (levels - 1) * 2 - 1)
+    else:
+        restored = compact.astype(float)
+    assert np.allclose(restored, map_mat, atol=0.01, equal_nan=True)
+    # Compact maps are drawn with the same colors, without value outside the mask
+    fig, ax = plt.subplots()
+    patch   = Circle((1.5, 1), 0.8)
+    img     = chu.colormapped_patch(patch, compact, ax=ax, alpha=1)
+    colors  = img.to_rgba(img.get_array())
+    assert np.all(colors[np.isnan(map_mat), 3] == 0)
+    plt.close(fig)
+    with pytest.raises(ValueError):
+        chu.compact_map(map_mat, 'int8')
+
+def test_blend_colormap():
+    import seaborn as sns
+    cmap = chu.blend_colormap('red', (0, 0, 1))
+    # Memoized by color, whatever the color format
+    assert chu.blend_colormap((1, 0, 0), 'blue') is cmap
+    expected = sns.blend_palette(['red', 'red', 'blue', 'blue'], as_cmap=True)
+    values   = np.linspace(0, 1, 50)
+    assert np.allclose(cmap(values), expected(values))
+    lut = chu.blend_lut('red', 'blue')
+    assert chu.blend_lut('red', 'blue') is lut
+    assert lut.shape == (cmap.N, 3) and not lut.flags.writeable
+    assert np.allclose(lut, cmap(np.arange(cmap.N))[:, :3])
+
+@pytest.mark.parametrize('n_colors', [1, 5, 12, 40])
+def test_hls_palette(n_colors):
+    import seaborn as sns
+    assert np.allclose(chu._hls_palette(n_colors), sns.hls_palette(n_colors, h=0.01, l=0.6, s=0.65))
+
 def test_colormapped_patch(sample_curve):
     fig, ax = plt.subplots()
     patch   = Circle((0.5, 0.5), 0.4)
@@ -2,11 +2,13 @@
 import os
 import numpy as np
 import colorsys
-# Matplotlib imports
-from   matplotlib import pyplot as plt
-# Scipy imports
-from   scipy.spatial.distance import cdist
-from   scipy.interpolate import interp1d
+from   functools import lru_cache
+# Matplotlib imports (pyplot and scipy.spatial are imported where needed, they are slow to import)
+import matplotlib as mpl
+import matplotlib.colors as mcolors
+from   matplotlib.artist import Artist
+from   matplotlib.path import Path
+from   matplotlib.transforms import Affine2D
 
 def chsave(name="figure",dir_path="images",pdf=True,img_dpi=300,pdf_dpi=200):
     """
@@ -40,6 +42,7 @@ def chsave(name="figure",dir_path="images",pdf=True,img_dpi=300,pdf_dpi=200):
 
         chu.chsave("my_plot")
     """
+    from matplotlib import pyplot as plt
     if not os.path.exists(dir_path): os.makedirs(dir_path)
     plt.savefig(os.path.join(dir_path,f'{name}.png'),
                 bbox_inches='tight',pad_inches=0.3,dpi=img_dpi)
@@ -54,13 +57,13 @@ def angdist(alpha,beta):
     Calculates the minimal angular distance between two angles in radians.
 
     Parameters
-        alpha : :class:`float`
+        alpha : :class:`float` or :class:`numpy.ndarray`
             Angle in radians.
-        beta : :class:`float`
+        beta : :class:`float` or :class:`numpy.ndarray`
             Angle in radians.
     
     Returns
-        :class:`float`
+        :class:`float` or :class:`numpy.ndarray` : element-wise for arrays
 
     Examples
     ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -85,7 +88,7 @@ def angdist(alpha,beta):
         Distance in degrees: 90.0
     """
     diff = np.abs(alpha - beta) % (2 * np.pi)
-    return np.min([diff, 2 * np.pi - diff])
+    return np.minimum(diff, 2 * np.pi - diff)
 
 def _angspace(alpha,beta,n=200):
     """:meta-private:
@@ -96,7 +99,8 @@ def _angspace(alpha,beta,n=200):
     if ndots == 1: ndots = 2
     return np.linspace(alpha,beta,ndots)
 
-def map_from_curve(curve=None,xlim=(-1,1),ylim=(-1,1),resolution=200):
+def map_from_curve(curve=None,xlim=(-1,1),ylim=(-1,1),resolution=200,method='cdist',
+                   mask=None,max_memory=2**24,dtype='float64'):
     """
     Generates a map (2D matrix) where each point value is based on its proximity to the nearest
     point along a specified curve.
@@ -108,8 +112,30 @@ def map_from_curve(curve=None,xlim=(-1,1),ylim=(-1,1),resolution=200):
             x-axis boundaries of the map.
         ylim : :class:`tuple` or :class:`array-like`, optional
             y-axis boundaries of the map.
-        resolution : :class:`int`, optional
-            Number of grid points along each axis for the output map.
+        resolution : :class:`int` or :class:`tuple`, optional
+            Number of grid points along each axis for the output map, or ``(nx, ny)``.
+        method : :class:`str`, optional
+            Nearest-point engine (default: ``"cdist"``):
+
+            - ``"cdist"``: full distance matrix between grid and curve
+              (:func:`scipy.spatial.distance.cdist`).
+            - ``"grid"``: running minimum of the squared distances, separated along the axes of
+              the regular grid. Same map (up to rounding ties), faster and without the
+              ``resolution² × len(curve)`` matrix.
+            - ``"kdtree"``: :class:`scipy.spatial.cKDTree` queries. Best for long curves.
+        mask : :class:`matplotlib.path.Path`, :class:`matplotlib.patches.Patch` or :class:`numpy.ndarray`, optional
+            Region of the map to compute. A path (or patch) keeps the grid points inside it, grown
+            by one grid point so antialiased clip edges still get a value. A boolean
+            ``(ny, nx)`` array is used as it is. Points outside the mask are
+            ``NaN`` (transparent with :func:`colormapped_patch`).
+        max_memory : :class:`int` or :class:`None`, optional
+            Approximate limit in bytes of the temporary arrays (default: 16 MiB). The map is
+            computed in chunks of grid points under this limit, so the peak memory does not grow
+            with ``resolution``. ``None`` computes everything at once.
+        dtype : :class:`str` or :class:`numpy.dtype`, optional
+            ``"float64"`` (default) or ``"float32"``: type of the grid, the distances of the
+            ``"grid"`` method and the map. ``"float32"`` halves their memory, the map only changes
+            where two curve points are nearly at the same distance.
     
     Returns
         :class:`numpy.ndarray` : 2D array
@@ -145,24 +171,164 @@ def map_from_curve(curve=None,xlim=(-1,1),ylim=(-1,1),resolution=200):
          [-0.84769539 -0.498998   -0.15430862  0.10220441  1.        ]]
     """
     if curve is None: return None
+    if method not in ('cdist', 'grid', 'kdtree'):
+        raise ValueError(f'Unknown method {method}. Available methods are: cdist, grid, kdtree')
+    if np.dtype(dtype).name not in ('float32', 'float64'):
+        raise ValueError(f'Unknown dtype {dtype}. Available dtypes are: float32, float64')
+    curve = np.asarray(curve, dtype=dtype)
     
     # Values from curve
-    values = np.linspace(-1,1,len(curve))
+    values = np.linspace(-1,1,len(curve),dtype=dtype)
     
     # Mesh
-    x = np.linspace(*xlim, resolution)
-    y = np.linspace(*ylim, resolution)
-    grid_x, grid_y = np.meshgrid(x, y, indexing='xy')
-    grid_points = np.column_stack((grid_x.ravel(), grid_y.ravel()))
+    nx, ny = (resolution, resolution) if np.isscalar(resolution) else resolution
+    x = np.linspace(*xlim, nx, dtype=dtype)
+    y = np.linspace(*ylim, ny, dtype=dtype)
+    inside  = None if mask is None else _grid_mask(mask, x, y, max_memory)
+    nearest = np.zeros((ny, nx), dtype=np.intp)
 
     # Obtain the nearest point in the curve and use that value
-    distances             = cdist(grid_points, curve)
-    nearest_point_indexes = np.argmin(distances, axis=1)
-    map_flat              = values[nearest_point_indexes]
-    map_matrix            = map_flat.reshape(resolution, resolution)
+    if method == 'grid':
+        # Running minimum over blocks of rows: best and dist (float64), nearest (intp), closer (bool)
+        rows = _chunk_size(max_memory, 25*nx)
+        for start in range(0, ny, rows):
+            stop = min(start + rows, ny)
+            cols = slice(None)
+            if inside is not None:
+                hits = np.flatnonzero(np.any(inside[start:stop], axis=0))
+                if len(hits) == 0: continue
+                cols = slice(hits[0], hits[-1] + 1)
+            nearest[start:stop, cols] = _nearest_on_grid(curve, x[cols], y[start:stop])
+    else:
+        # Flat indexes of the grid points, in chunks: cdist holds a (chunk, len(curve)) matrix
+        pixels = None if inside is None else np.flatnonzero(inside)
+        total  = nx*ny if pixels is None else len(pixels)
+        chunk  = _chunk_size(max_memory, 8*len(curve) if method == 'cdist' else 64)
+        from scipy.spatial.distance import cdist
+        from scipy.spatial import cKDTree
+        tree   = cKDTree(curve) if method == 'kdtree' else None
+        for start in range(0, total, chunk):
+            stop  = min(start + chunk, total)
+            index = np.arange(start, stop) if pixels is None else pixels[start:stop]
+            row, col    = np.divmod(index, nx)
+            grid_points = np.column_stack((x[col], y[row]))
+            if method == 'cdist':
+                nearest.flat[index] = np.argmin(cdist(grid_points, curve), axis=1)
+            else:
+                nearest.flat[index] = tree.query(grid_points)[1]
+    map_matrix = values[nearest]
+    if inside is not None: map_matrix[~inside] = np.nan
     
     return map_matrix
 
+def _chunk_size(max_memory,item_bytes):
+    """:meta-private:
+    Number of items of ``item_bytes`` bytes that fit in ``max_memory`` (at least one)
+    """
+    if max_memory is None: return np.iinfo(np.intp).max
+    return max(1, int(max_memory // item_bytes))
+
+def _grid_mask(mask,x,y,max_memory=None,grow=True):
+    """:meta-private:
+    Boolean ``len(y)`` × ``len(x)`` mask of the grid points inside a path (or patch), grown by one
+    grid point in every direction (if ``grow``). Boolean arrays are returned as they are.
+
+    Curves are flattened by Agg with a tolerance in path units, far too coarse for diagrams of unit
+    size, so the test is done in grid coordinates (one unit per grid step).
+    """
+    if not isinstance(mask, (Path, Artist)):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (len(y), len(x)):
+            raise ValueError(f'Mask shape {mask.shape} does not match the map shape {(len(y), len(x))}')
+        return mask
+    step_x = (x[-1] - x[0]) / (len(x) - 1) if len(x) > 1 and x[-1] != x[0] else 1
+    step_y = (y[-1] - y[0]) / (len(y) - 1) if len(y) > 1 and y[-1] != y[0] else 1
+    to_grid = Affine2D().translate(-x[0], -y[0]).scale(1/step_x, 1/step_y)
+    path    = _get_path(mask)
+    inside  = np.empty((len(y), len(x)), dtype=bool)
+    rows    = _chunk_size(max_memory, 24*len(x))
+    for start in range(0, len(y), rows):
+        stop = min(start + rows, len(y))
+        grid_x, grid_y = np.meshgrid(np.arange(len(x)), np.arange(start, stop), indexing='xy')
+        points = np.column_stack((grid_x.ravel(), grid_y.ravel()))
+        inside[start:stop] = path.contains_points(points, to_grid).reshape(stop - start, len(x))
+    if not grow: return inside
+    # Grow one point (3x3 neighborhood)
+    grown = inside.copy()
+    grown[1:]  |= inside[:-1]
+    grown[:-1] |= inside[1:]
+    inside = grown.copy()
+    grown[:,1:]  |= inside[:,:-1]
+    grown[:,:-1] |= inside[:,1:]
+    return grown
+
+def _nearest_on_grid(curve,x,y):
+    """:meta-private:
+    Index of the nearest curve point to every node of the grid ``x`` × ``y``. The squared distance
+    is split as ``(x - cx)² + (y - cy)²``, and a running minimum is kept over the curve points, so
+    the memory used is only a few ``len(y) × len(x)`` arrays.
+    """
+    dx = (x[None,:] - curve[:,0][:,None])**2
+    dy = (y[None,:] - curve[:,1][:,None])**2
+    best    = dy[0][:,None] + dx[0][None,:]
+    nearest = np.zeros(best.shape, dtype=np.intp)
+    dist    = np.empty_like(best)
+    closer  = np.empty(best.shape, dtype=bool)
+    for k in range(1, len(curve)):
+        np.add(dy[k][:,None], dx[k][None,:], out=dist)
+        np.less(dist, best, out=closer)
+        np.copyto(best, dist, where=closer)
+        nearest[closer] = k
+    return nearest
+
+def compact_map(map_matrix,dtype='uint8'):
+    """
+    Stores a map from :func:`map_from_curve` (values from -1 to 1, ``NaN`` outside the mask) in a
+    smaller data type, to keep many maps in memory.
+
+    Unsigned integer types hold quantized levels: ``0`` marks the points without value (``NaN``) and
+    ``1`` to ``max`` are the levels from -1 to 1 (255 levels for ``"uint8"``, more than any
+    256-color colormap can show). :func:`colormapped_patch` draws these maps directly.
+
+    Parameters
+        map_matrix : :class:`numpy.ndarray`
+            Map with values from -1 to 1.
+        dtype : :class:`str` or :class:`numpy.dtype`, optional
+            ``"uint8"`` (default, 8 times smaller than ``float64``), ``"uint16"``, ``"float16"``,
+            ``"float32"`` or ``"float64"``.
+
+    Returns
+        :class:`numpy.ndarray`
+
+    Examples
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    .. code-block:: python
+        :class: in-block
+
+        import cachai.utilities as chu
+        import numpy as np
+
+        my_map = np.array([[-1, 0], [np.nan, 1]])
+        print(chu.compact_map(my_map))
+
+    .. code-block:: text
+        :class: out-block
+
+        [[  1 128]
+         [  0 255]]
+    """
+    dtype      = np.dtype(dtype)
+    map_matrix = np.asarray(map_matrix)
+    if dtype.kind == 'f': return map_matrix.astype(dtype)
+    if dtype.kind != 'u':
+        raise ValueError(f'Unknown map dtype {dtype}. Available dtypes are: '
+                         f'uint8, uint16, float16, float32, float64')
+    levels = np.iinfo(dtype).max
+    known  = ~np.isnan(map_matrix)
+    compact = np.zeros(map_matrix.shape, dtype=dtype)
+    compact[known] = 1 + np.rint((np.clip(map_matrix[known], -1, 1) + 1)/2 * (levels - 1))
+    return compact
+
 def colormapped_patch(patch,map_matrix,ax=None,colormap="coolwarm",
                       zorder=5,alpha=0.5,rasterized=False):
     """
@@ -170,10 +336,12 @@ def colormapped_patch(patch,map_matrix,ax=None,colormap="coolwarm",
     shape.
 
     Parameters
-        patch : :class:`matplotlib.patches.Patch` and similar
-            Matplotlib patch object to be filled with colors.
+        patch : :class:`matplotlib.patches.Patch` and similar, or :class:`matplotlib.path.Path`
+            Matplotlib patch object to be filled with colors. A path is interpreted in data
+            coordinates of ``ax``.
         map_matrix : :class:`numpy.ndarray`
-            2D array containing color values for the mapping.
+            2D array containing color values for the mapping, from -1 to 1, or the levels of a
+            compact map (see :func:`compact_map`).
             
     Returns
         :class:`matplotlib.image.AxesImage`
@@ -210,27 +378,70 @@ def colormapped_patch(patch,map_matrix,ax=None,colormap="coolwarm",
         chu.colormapped_patch(circle, gradient, ax=ax)
         plt.show()
     """
-    if ax is None: ax = plt.gca()
+    if ax is None:
+        from matplotlib import pyplot as plt
+        ax = plt.gca()
     
-    vertices   = patch.get_path().vertices
-    xmin, ymin = np.min(vertices, axis=0)
-    xmax, ymax = np.max(vertices, axis=0)
+    colormap, vmin, vmax = _map_colormap(map_matrix, colormap)
     
     img = ax.imshow(
         map_matrix, 
         cmap=colormap, 
-        extent=(xmin, xmax, ymin, ymax), 
+        extent=_patch_extent(patch), 
         origin='lower',
         aspect='auto',
-        clip_path=patch,
         clip_on=True,
         zorder=zorder,
         alpha=alpha,
         rasterized=rasterized,
-        vmin=-1, vmax=1
+        vmin=vmin, vmax=vmax
     )
+    if isinstance(patch, Path): img.set_clip_path(patch, ax.transData)
+    else: img.set_clip_path(patch)
     return img
 
+def _map_colormap(map_matrix, colormap):
+    """:meta-private:
+    Colormap and limits to draw a map from :func:`map_from_curve` (or its :func:`compact_map`)
+    """
+    if np.asarray(map_matrix).dtype.kind == 'u':
+        # Levels from 1 to max, 0 (no value) is under the range and transparent
+        vmax = np.iinfo(np.asarray(map_matrix).dtype).max + 0.5
+        if not isinstance(colormap, mcolors.Colormap): colormap = mpl.colormaps[colormap]
+        return colormap.with_extremes(under='none'), 0.5, vmax
+    return colormap, -1, 1
+
+def _patch_extent(patch):
+    """:meta-private:
+    Bounding box of a patch (or path) as ``(xmin, xmax, ymin, ymax)``
+    """
+    vertices   = _get_path(patch).vertices
+    xmin, ymin = np.min(vertices, axis=0)
+    xmax, ymax = np.max(vertices, axis=0)
+    return (xmin, xmax, ymin, ymax)
+
+def _set_colormapped_patch(img, patch, map_matrix, colormap='coolwarm'):
+    """:meta-private:
+    Change in place the patch, the map and the colormap of an image from :func:`colormapped_patch`
+    """
+    colormap, vmin, vmax = _map_colormap(map_matrix, colormap)
+    img.set_data(map_matrix)
+    img.set_extent(_patch_extent(patch))
+    img.set_cmap(colormap)
+    img.set_clim(vmin, vmax)
+    if isinstance(patch, Path): img.set_clip_path(patch, img.axes.transData)
+    else: img.set_clip_path(patch)
+
+def _get_path(patch):
+    """:meta-private:
+    Path of a patch in data coordinates (with its patch transform, as matplotlib draws it), or the
+    path itself
+    """
+    if isinstance(patch, Path): return patch
+    path = patch.get_path()
+    if hasattr(patch, 'get_patch_transform'): path = patch.get_patch_transform().transform_path(path)
+    return path
+
 def equidistant(points):
     """
     Resamples points along a curve to make them equidistant while preserving the overall shape.
@@ -275,12 +486,9 @@ def equidistant(points):
     total_length  = cumulative_length[-1]
     new_distances = np.linspace(0, total_length, len(points))
 
-    interp_x = interp1d(cumulative_length, points[:, 0], kind='linear')
-    interp_y = interp1d(cumulative_length, points[:, 1], kind='linear')
-    
-    # Equidistant curve
-    new_x = interp_x(new_distances)
-    new_y = interp_y(new_distances)
+    # Equidistant curve (linear interpolation, same values as scipy's interp1d)
+    new_x = np.interp(new_distances, cumulative_length, points[:, 0])
+    new_y = np.interp(new_distances, cumulative_length, points[:, 1])
     
     return np.column_stack((new_x, new_y))
 
@@ -727,6 +935,103 @@ def alpha_color(color, alpha=1.0, bg=(1.0,1.0,1.0)):
     b_result = (b*factor) + (bg_b*(1-factor))
     return (r_result,g_result,b_result)
 
+def blend_colormap(color1, color2):
+    """
+    Colormap blending two colors, as used by the chords of a Chord Diagram: ``color1`` along the
+    first third, a linear blend along the second third and ``color2`` along the last third (same
+    as ``seaborn.blend_palette([color1,color1,color2,color2],as_cmap=True)``).
+
+    Colormaps are memoized by color pair (least recently used cache of 1024 pairs), so every chord
+    between the same two colors, in any diagram, shares the same colormap. Do not modify it in
+    place, use copies (e.g. :meth:`matplotlib.colors.Colormap.with_extremes`) instead.
+
+    Parameters
+        color1 / color2 : :class:`str`, :class:`tuple` or :class:`array-like`
+            Any color accepted by :func:`matplotlib.colors.to_rgb`.
+
+    Returns
+        :class:`matplotlib.colors.LinearSegmentedColormap`
+
+    Examples
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    .. code-block:: python
+        :class: in-block
+
+        import cachai.utilities as chu
+        import matplotlib.colors as mcolors
+
+        my_cmap = chu.blend_colormap("red", "blue")
+
+        print(mcolors.to_hex(my_cmap(0.0)), mcolors.to_hex(my_cmap(0.5)), mcolors.to_hex(my_cmap(1.0)))
+        print(my_cmap is chu.blend_colormap((1, 0, 0), "blue"))
+
+    .. code-block:: text
+        :class: out-block
+
+        #ff0000 #800080 #0000ff
+        True
+    """
+    return _blend_colormap(mcolors.to_rgb(color1), mcolors.to_rgb(color2))
+
+@lru_cache(maxsize=1024)
+def _blend_colormap(rgb1, rgb2):
+    """:meta-private:
+    Memoized :func:`blend_colormap` (from RGB tuples)
+    """
+    return mcolors.LinearSegmentedColormap.from_list('blend', [rgb1, rgb1, rgb2, rgb2])
+
+def blend_lut(color1, color2):
+    """
+    Lookup table (``N × 3`` array of RGB colors) of :func:`blend_colormap`. The value ``v`` (0 to 1)
+    of the colormap is the row ``min(int(v*N), N-1)``. Tables are memoized by color pair and read
+    only, so they can be shared by the layers of a texture.
+
+    Parameters
+        color1 / color2 : :class:`str`, :class:`tuple` or :class:`array-like`
+            Any color accepted by :func:`matplotlib.colors.to_rgb`.
+
+    Returns
+        :class:`numpy.ndarray` : ``float32`` array with shape ``(256, 3)``
+
+    Examples
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    .. code-block:: python
+        :class: in-block
+
+        import cachai.utilities as chu
+
+        lut = chu.blend_lut("red", "blue")
+
+        print(lut.shape, lut[0], lut[-1])
+
+    .. code-block:: text
+        :class: out-block
+
+        (256, 3) [1. 0. 0.] [0. 0. 1.]
+    """
+    return _blend_lut(mcolors.to_rgb(color1), mcolors.to_rgb(color2))
+
+@lru_cache(maxsize=1024)
+def _blend_lut(rgb1, rgb2):
+    """:meta-private:
+    Memoized :func:`blend_lut` (from RGB tuples)
+    """
+    colormap = _blend_colormap(rgb1, rgb2)
+    lut = colormap(np.arange(colormap.N))[:, :3].astype(np.float32)
+    lut.flags.writeable = False
+    return lut
+
+def _hls_palette(n_colors, h=0.01, l=0.6, s=0.65):
+    """:meta-private:
+    Evenly spaced hues in the HLS color space, the default colors of a Chord Diagram (same as
+    ``seaborn.hls_palette(n_colors)``, without importing seaborn)
+    """
+    hues  = np.linspace(0, 1, int(n_colors) + 1)[:-1]
+    hues += h
+    hues %= 1
+    hues -= hues.astype(int)
+    return [colorsys.hls_to_rgb(hue, l, s) for hue in hues]
+
 # f-string pre-defined colors
 _fstr_colors = {'white':255,'black':232,'light_gray':245,'dark_gray':237,'gold':220,
                'red':196,'blue':21,'green':118,'magenta':165,'mint':87,'orange':202}